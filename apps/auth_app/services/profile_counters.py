@@ -0,0 +1,17 @@
+# auth_app/services/profile_counters.py
+
+from common.counters import CounterGroup
+from apps.auth_app.models import UserProfile
+
+# Keyed by user id: the judge records submissions without loading profiles.
+COUNTERS = CounterGroup(
+    UserProfile, ("total_submissions", "problems_solved"), lookup="user_id", create_missing=True
+)
+
+
+def record_submission(user_id, first_solve):
+    COUNTERS.incr(user_id, total_submissions=1, problems_solved=int(first_solve))
+
+
+def live(profile):
+    return COUNTERS.live(profile)
@@ -13,6 +13,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.conf import settings
 from apps.auth_app.services.otp_service import OTPService
+from apps.auth_app.services import profile_counters
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated
 # from .models import User, UserProfile
@@ -629,7 +630,7 @@ class UserStatsView(APIView):
             
             data = {
                 "totalProblems": 150,
-                "solvedProblems": getattr(profile, 'problems_solved', 0),
+                "solvedProblems": profile_counters.live(profile)["problems_solved"],
                 "easyCount": 0,
                 "mediumCount": 0,
                 "hardCount": 0,
@@ -0,0 +1,60 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from apps.problem_app.models import Submission
+from apps.problem_app.services import judge_queue
+
+
+class JudgeConsumer(AsyncWebsocketConsumer):
+
+    async def connect(self):
+        self.job_id = self.scope["url_route"]["kwargs"]["submission_id"]
+        user = self.scope.get("user")
+
+        if not user or user.is_anonymous:
+            await self.close()
+            return
+
+        if not await self.owns_job(user, self.job_id):
+            await self.close()
+            return
+
+        self.group_name = judge_queue.judge_group_name(self.job_id)
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(
+                self.group_name,
+                self.channel_name
+            )
+
+    async def judge_verdict(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "verdict",
+            "index": event.get("index"),
+            "total": event.get("total"),
+            "verdict": event.get("verdict"),
+        }))
+
+    async def judge_result(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "result",
+            "result": event.get("result"),
+        }))
+
+    @database_sync_to_async
+    def owns_job(self, user, job_id):
+        # Queued runs have no DB row; their owner is kept with the pending result.
+        if job_id.startswith("run-"):
+            result = judge_queue.get_result(job_id)
+            return bool(result) and result.get("user_id") == str(user.id)
+
+        if not job_id.isdigit():
+            return False
+        return Submission.objects.filter(id=job_id, user=user).exists()
@@ -20,6 +20,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+    async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
             await self.channel_layer.group_discard(
                 self.group_name,
@@ -38,3 +39,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             "created_at": event.get("created_at"),
         }))
 
+    async def judge_result(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "judge_result",
+            "job_id": event.get("job_id"),
+            "result": event.get("result"),
+        }))
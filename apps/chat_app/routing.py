@@ -1,8 +1,10 @@
 from django.urls import re_path
 from .consumers.chat_consumer import ChatConsumer
 from .consumers.notification_consumer import NotificationConsumer
+from .consumers.judge_consumer import JudgeConsumer
 
 websocket_urlpatterns = [
     re_path(r"ws/chat/(?P<conversation_id>[^/]+)/$", ChatConsumer.as_asgi()),
     re_path(r"^/?ws/notifications/$", NotificationConsumer.as_asgi()),
+    re_path(r"^/?ws/judge/(?P<submission_id>[\w-]+)/$", JudgeConsumer.as_asgi()),
 ]
\ No newline at end of file
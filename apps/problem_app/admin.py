@@ -12,5 +12,11 @@ class TestCaseInline(admin.TabularInline):
 class ProblemAdmin(admin.ModelAdmin):
     list_display = ("title", "difficulty", "created_at")
     inlines = [TestCaseInline]
+    readonly_fields = ("testcase_version",)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change:
+            form.instance.bump_testcase_version()
 
 
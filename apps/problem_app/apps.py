@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProblemAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.problem_app'
+
+    def ready(self):
+        import apps.problem_app.signals
@@ -0,0 +1,351 @@
+// Long-lived Java judge worker.
+// Started by java_daemon with `java JudgeDaemon.java`, it compiles
+// submissions in memory with javax.tools, loads each one in its own
+// throwaway class loader and calls Runner.run() (see java_runner.py) on a
+// fresh thread with a wall-clock deadline.
+//
+// Requests on stdin are a one-byte opcode:
+//   'P'                  ping; answered with a 'P' frame
+//   'J' + 7 fields       job: key, Solution.java, Runner.java, stdin bytes,
+//                        timeout ms, output limit bytes, record prefix;
+//                        each field is an int32 length followed by bytes
+//   'C'                  cancel the running job (ignored when idle)
+// Replies on stdout are frames of a one-byte type, an int32 length and a
+// UTF-8 payload:
+//   'P' ready / pong     'X' compile errors    'K' compiled in <ms>
+//   'R' one record line  'O' console stdout    'E' console stderr
+//   'D' "<status> <cpu ms> <restart>", status is ok, output, cancelled or timeout
+// Threads cannot be killed safely, so a job that overruns its deadline (or
+// leaves threads behind) ends the whole JVM once 'D' is sent; the pool
+// starts a new daemon.
+//
+// This file is run as a single-file source program and must not depend on
+// anything but the JDK.
+
+import java.io.*;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+import javax.tools.*;
+
+public class JudgeDaemon {
+    static final int CACHE_SIZE = 64;
+    static final long CANCEL_GRACE_MS = 100;
+    static final long JOB_STACK_BYTES = 256L << 20;
+
+    static final Object WRITE_LOCK = new Object();
+    static DataOutputStream out;
+    static DataInputStream in;
+
+    // Compiled class files of recent submissions, keyed by the judge's compile-cache key.
+    static final Map<String, Map<String, byte[]>> COMPILED = new LinkedHashMap<>(16, 0.75f, true) {
+        @Override
+        protected boolean removeEldestEntry(Map.Entry<String, Map<String, byte[]>> eldest) {
+            return size() > CACHE_SIZE;
+        }
+    };
+
+    static final class CancelledError extends Error {
+        CancelledError() { super("Job cancelled", null, false, false); }
+    }
+
+    static final class OutputLimitError extends Error {
+        OutputLimitError() { super("Console output limit exceeded", null, false, false); }
+    }
+
+    // State of the job currently running; the daemon runs one job at a time.
+    static final class Job {
+        final long outputLimit;
+        final String prefix;
+        final ByteArrayOutputStream stdout = new ByteArrayOutputStream();
+        final ByteArrayOutputStream stderr = new ByteArrayOutputStream();
+        long outputBytes;
+        volatile boolean outputExceeded;
+        volatile boolean cancelled;
+        volatile long cpuMs;
+
+        Job(long outputLimit, String prefix) {
+            this.outputLimit = outputLimit;
+            this.prefix = prefix;
+        }
+    }
+
+    static volatile Job current;
+
+    // System.out / System.err of user code: buffered per job and metered against its output limit.
+    static final class Console extends OutputStream {
+        private final boolean isErr;
+
+        Console(boolean isErr) { this.isErr = isErr; }
+
+        @Override
+        public void write(int b) { write(new byte[] {(byte) b}, 0, 1); }
+
+        @Override
+        public void write(byte[] b, int off, int len) {
+            Job job = current;
+            if (job == null) return;
+            synchronized (job) {
+                if (job.outputExceeded) throw new OutputLimitError();
+                job.outputBytes += len;
+                if (job.outputLimit > 0 && job.outputBytes > job.outputLimit) {
+                    job.outputExceeded = true;
+                    throw new OutputLimitError();
+                }
+                (isErr ? job.stderr : job.stdout).write(b, off, len);
+            }
+        }
+    }
+
+    // Runner's OUT: each complete line goes back to the judge as an 'R' frame straight away.
+    static final class RecordStream extends OutputStream {
+        private final Job job;
+        private final ByteArrayOutputStream line = new ByteArrayOutputStream();
+
+        RecordStream(Job job) { this.job = job; }
+
+        @Override
+        public void write(int b) {
+            if (job.cancelled) throw new CancelledError();
+            if (b == '\n') {
+                frame('R', line.toByteArray());
+                line.reset();
+            } else {
+                line.write(b);
+            }
+        }
+
+        @Override
+        public void write(byte[] b, int off, int len) {
+            for (int i = off; i < off + len; i++) write(b[i]);
+        }
+    }
+
+    static final class SubmissionLoader extends ClassLoader {
+        private final Map<String, byte[]> classes;
+
+        SubmissionLoader(Map<String, byte[]> classes) {
+            // The platform loader keeps the daemon's own classes out of reach.
+            super(ClassLoader.getPlatformClassLoader());
+            this.classes = classes;
+        }
+
+        @Override
+        protected Class<?> findClass(String name) throws ClassNotFoundException {
+            byte[] bytes = classes.get(name);
+            if (bytes == null) throw new ClassNotFoundException(name);
+            return defineClass(name, bytes, 0, bytes.length);
+        }
+    }
+
+    static void frame(int type, byte[] payload) {
+        synchronized (WRITE_LOCK) {
+            try {
+                out.writeByte(type);
+                out.writeInt(payload.length);
+                out.write(payload);
+                out.flush();
+            } catch (IOException e) {
+                // The judge went away; nothing left to report to.
+                Runtime.getRuntime().halt(1);
+            }
+        }
+    }
+
+    static void frame(int type, String payload) {
+        frame(type, payload.getBytes(StandardCharsets.UTF_8));
+    }
+
+    static byte[] field() throws IOException {
+        byte[] data = new byte[in.readInt()];
+        in.readFully(data);
+        return data;
+    }
+
+    static String text() throws IOException {
+        return new String(field(), StandardCharsets.UTF_8);
+    }
+
+    static JavaFileObject source(String name, String code) {
+        return new SimpleJavaFileObject(URI.create("string:///" + name + ".java"), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) { return code; }
+        };
+    }
+
+    static Map<String, byte[]> compile(JavaCompiler compiler, StandardJavaFileManager files,
+                                       String solution, String runner, StringBuilder errors) {
+        Map<String, byte[]> classes = new HashMap<>();
+        JavaFileManager memory = new ForwardingJavaFileManager<JavaFileManager>(files) {
+            @Override
+            public JavaFileObject getJavaFileForOutput(Location location, String className,
+                                                       JavaFileObject.Kind kind, FileObject sibling) {
+                return new SimpleJavaFileObject(URI.create("mem:///" + className + kind.extension), kind) {
+                    @Override
+                    public OutputStream openOutputStream() {
+                        return new ByteArrayOutputStream() {
+                            @Override
+                            public void close() { classes.put(className, toByteArray()); }
+                        };
+                    }
+                };
+            }
+        };
+
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        boolean ok = compiler.getTask(
+            null, memory, diagnostics, List.of("-proc:none", "-nowarn"), null,
+            List.of(source("Solution", solution), source("Runner", runner))
+        ).call();
+        if (ok) return classes;
+
+        // Same shape as javac's command-line output: "Solution.java:3: error: ..."
+        for (Diagnostic<? extends JavaFileObject> d : diagnostics.getDiagnostics()) {
+            if (d.getKind() != Diagnostic.Kind.ERROR) continue;
+            String name = d.getSource() == null ? "" : d.getSource().getName().replaceFirst("^/", "");
+            errors.append(name).append(':').append(d.getLineNumber()).append(": error: ")
+                  .append(d.getMessage(Locale.ROOT)).append('\n');
+        }
+        return null;
+    }
+
+    static List<MemoryPoolMXBean> heapPools() {
+        List<MemoryPoolMXBean> pools = new ArrayList<>();
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP) pools.add(pool);
+        }
+        return pools;
+    }
+
+    static void runJob(JavaCompiler compiler, StandardJavaFileManager files) throws IOException {
+        String key = text();
+        String solution = text();
+        String runner = text();
+        byte[] stdin = field();
+        long timeoutMs = Long.parseLong(text());
+        long outputLimit = Long.parseLong(text());
+        String prefix = text();
+
+        long compileStart = System.nanoTime();
+        Map<String, byte[]> classes = COMPILED.get(key);
+        if (classes == null) {
+            StringBuilder errors = new StringBuilder();
+            classes = compile(compiler, files, solution, runner, errors);
+            if (classes == null) {
+                frame('X', errors.toString());
+                return;
+            }
+            COMPILED.put(key, classes);
+        }
+        frame('K', String.valueOf((System.nanoTime() - compileStart) / 1e6));
+
+        Job job = new Job(outputLimit, prefix);
+        PrintStream records = new PrintStream(new RecordStream(job), false, StandardCharsets.UTF_8);
+        Map<String, byte[]> loaded = classes;
+        boolean[] finished = new boolean[1];
+
+        List<MemoryPoolMXBean> pools = heapPools();
+        long baseline = 0;
+        for (MemoryPoolMXBean pool : pools) {
+            pool.resetPeakUsage();
+            baseline += pool.getUsage().getUsed();
+        }
+
+        ThreadGroup group = new ThreadGroup("judge-job");
+        Thread thread = new Thread(group, () -> {
+            long cpuStart = ManagementFactory.getThreadMXBean().getCurrentThreadCpuTime();
+            try {
+                // A new loader per job gives every submission fresh static state.
+                Method run = new SubmissionLoader(loaded).loadClass("Runner")
+                    .getMethod("run", InputStream.class, PrintStream.class);
+                finished[0] = (Boolean) run.invoke(null, new ByteArrayInputStream(stdin), records);
+            } catch (Throwable e) {
+                Throwable cause = e instanceof InvocationTargetException ? e.getCause() : e;
+                if (!job.cancelled && !(cause instanceof OutputLimitError)) {
+                    synchronized (job) {
+                        job.stderr.writeBytes(cause.toString().getBytes(StandardCharsets.UTF_8));
+                    }
+                }
+            } finally {
+                job.cpuMs = (ManagementFactory.getThreadMXBean().getCurrentThreadCpuTime() - cpuStart) / 1_000_000;
+            }
+        }, "judge-job", JOB_STACK_BYTES);
+
+        current = job;
+        thread.start();
+        long deadline = System.nanoTime() + timeoutMs * 1_000_000L;
+        String status = null;
+        try {
+            while (thread.isAlive()) {
+                thread.join(10);
+                while (in.available() > 0) {
+                    if (in.read() == 'C' && !job.cancelled) {
+                        job.cancelled = true;
+                        thread.interrupt();
+                        deadline = Math.min(deadline, System.nanoTime() + CANCEL_GRACE_MS * 1_000_000L);
+                    }
+                }
+                if (thread.isAlive() && System.nanoTime() > deadline) {
+                    status = job.cancelled ? "cancelled" : "timeout";
+                    break;
+                }
+            }
+        } catch (InterruptedException e) {
+            status = "timeout";
+        }
+        current = null;
+
+        if (status != null) {
+            // The job thread is still running and cannot be stopped: give up the whole JVM.
+            frame('D', status + " 0 1");
+            Runtime.getRuntime().halt(0);
+        }
+
+        if (finished[0] && !job.cancelled) {
+            long peak = 0;
+            for (MemoryPoolMXBean pool : pools) peak += pool.getPeakUsage().getUsed();
+            double peakMb = Math.max(0, peak - baseline) / (1024.0 * 1024.0);
+            frame('R', prefix + "END\t{\"peak_memory\": " + peakMb + "}");
+        }
+        synchronized (job) {
+            frame('O', job.stdout.toByteArray());
+            frame('E', job.stderr.toByteArray());
+        }
+
+        status = job.outputExceeded ? "output" : job.cancelled ? "cancelled" : "ok";
+        // Threads the submission started would keep running into the next job.
+        boolean leaked = group.activeCount() > 0;
+        frame('D', status + " " + job.cpuMs + " " + (leaked ? 1 : 0));
+        if (leaked) Runtime.getRuntime().halt(0);
+    }
+
+    public static void main(String[] args) throws IOException {
+        out = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(FileDescriptor.out), 1 << 16));
+        in = new DataInputStream(new BufferedInputStream(new FileInputStream(FileDescriptor.in), 1 << 16));
+        // User code must never read the request stream.
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        System.setOut(new PrintStream(new Console(false), true, StandardCharsets.UTF_8));
+        System.setErr(new PrintStream(new Console(true), true, StandardCharsets.UTF_8));
+
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            // A JRE without javac: let the judge fall back to the subprocess runner.
+            Runtime.getRuntime().halt(1);
+        }
+        StandardJavaFileManager files = compiler.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8);
+        frame('P', "");
+
+        while (true) {
+            int op = in.read();
+            if (op < 0) return;
+            if (op == 'P') frame('P', "");
+            else if (op == 'J') runJob(compiler, files);
+            // A 'C' that arrives after its job finished is ignored.
+        }
+    }
+}
@@ -3,36 +3,172 @@
 # Generate per-testcase judge results
 
 import json
+import math
 
-def _normalize(val):
-    if val is None:
-        return None
-    
-     
-    if isinstance(val, (bool, int, float, list, dict)):
-        if isinstance(val, list):
-            return [_normalize(x) for x in val]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EXACT = "exact"
+FLOAT = "float"
+UNORDERED = "unordered"
+WHITESPACE = "whitespace"
+
+MODE_CHOICES = (
+    (EXACT, "Exact"),
+    (FLOAT, "Float tolerance"),
+    (UNORDERED, "Unordered list"),
+    (WHITESPACE, "Whitespace-insensitive string"),
+)
+
+DEFAULT_EPSILON = 1e-6
+# Numeric lists at least this long are compared with NumPy when it is installed.
+NUMPY_MIN_SIZE = 256
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _coerce(val):
+    # Compiled harnesses print plain text; recover the JSON value it stands for.
+    if not isinstance(val, str):
         return val
-    
-     
-    if isinstance(val, str):
-        val_stripped = val.strip()
-        if val_stripped.lower() == "true": return True
-        if val_stripped.lower() == "false": return False
-        
-        try:
-            parsed = json.loads(val_stripped)
-            return _normalize(parsed)  
-        except:
-            return val_stripped 
-            
+    val_stripped = val.strip()
+    if val_stripped.lower() == "true": return True
+    if val_stripped.lower() == "false": return False
+    try:
+        parsed = json.loads(val_stripped)
+    except ValueError:
+        return val_stripped
+    # A JSON string may itself encode a value (e.g. '"123"').
+    return _coerce(parsed) if isinstance(parsed, str) else parsed
+
+
+def _normalize(val):
+    val = _coerce(val)
+    if isinstance(val, list):
+        return [_normalize(x) for x in val]
+    if isinstance(val, dict):
+        return {k: _normalize(v) for k, v in val.items()}
     return val
 
-def compare(actual, expected):
-    norm_actual = _normalize(actual)
-    norm_expected = _normalize(expected)
-    
-    return str(norm_actual).replace(" ", "") == str(norm_expected).replace(" ", "")
+
+def _canonical(val):
+    return json.dumps(_normalize(val), sort_keys=True)
+
+
+class Comparator:
+    """
+    Walks actual and expected values together and stops at the first
+    difference. `expected` must already be prepared with prepare(); the
+    actual value is coerced lazily, one level at a time.
+    """
+
+    def __init__(self, mode=EXACT, epsilon=DEFAULT_EPSILON):
+        self.mode = mode or EXACT
+        self.epsilon = DEFAULT_EPSILON if epsilon is None else epsilon
+
+    @classmethod
+    def for_problem(cls, problem):
+        return cls(getattr(problem, "comparison_mode", EXACT), getattr(problem, "float_tolerance", None))
+
+    def prepare(self, expected):
+        expected = _normalize(expected)
+        if self.mode == UNORDERED and isinstance(expected, list):
+            expected = sorted(expected, key=_canonical)
+        return expected
+
+    def matches(self, actual, expected):
+        if self.mode == UNORDERED:
+            actual = _coerce(actual)
+            if isinstance(actual, list) and isinstance(expected, list):
+                if len(actual) != len(expected):
+                    return False
+                actual = sorted(actual, key=_canonical)
+        return self._equal(actual, expected)
+
+    def _equal(self, a, b):
+        a = _coerce(a)
+
+        if isinstance(a, bool) or isinstance(b, bool):
+            return type(a) is type(b) and a == b
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            if self.mode == FLOAT and (isinstance(a, float) or isinstance(b, float)):
+                return math.isclose(a, b, rel_tol=self.epsilon, abs_tol=self.epsilon)
+            return a == b
+        if isinstance(a, str) and isinstance(b, str):
+            if self.mode == WHITESPACE:
+                return a.split() == b.split()
+            return a == b
+        if isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                return False
+            if len(a) >= NUMPY_MIN_SIZE:
+                result = self._numpy_equal(a, b)
+                if result is not None:
+                    return result
+            for x, y in zip(a, b):
+                if not self._equal(x, y):
+                    return False
+            return True
+        if isinstance(a, dict) and isinstance(b, dict):
+            if a.keys() != b.keys():
+                return False
+            return all(self._equal(a[k], b[k]) for k in b)
+        return a == b
+
+    def _numpy_equal(self, a, b):
+        """
+        Vectorized comparison of flat numeric lists; None if not applicable.
+        Only used when both lists hold one exact type, so it never accepts
+        what the element-wise walk would reject (bools as ints, ints
+        rounded to float64).
+        """
+        if np is None:
+            return None
+        kind = _homogeneous(a)
+        if kind is None or _homogeneous(b) is not kind:
+            return None
+        dtype = np.int64 if kind is int else np.float64
+        x = np.asarray(a, dtype=dtype)
+        y = np.asarray(b, dtype=dtype)
+        if self.mode == FLOAT and kind is float:
+            return bool(np.allclose(x, y, rtol=self.epsilon, atol=self.epsilon))
+        return bool(np.array_equal(x, y))
+
+
+def _homogeneous(values):
+    """int or float if every element is exactly that type (ints within int64), else None."""
+    kind = type(values[0])
+    if kind not in (int, float) or any(type(v) is not kind for v in values):
+        return None
+    if kind is int and (min(values) < INT64_MIN or max(values) > INT64_MAX):
+        return None
+    return kind
+
+
+DEFAULT_COMPARATOR = Comparator()
+
+
+def compare(actual, expected, comparator=DEFAULT_COMPARATOR):
+    return comparator.matches(actual, comparator.prepare(expected))
+
+def case_matches(tc, actual):
+    # Judge bundles carry a per-problem comparator and the expected output already prepared.
+    comparator = getattr(tc, "comparator", None)
+    if comparator is None:
+        return compare(actual, tc.expected_output)
+    return comparator.matches(actual, tc.expected_value)
+
+def judge_case(tc, actual, runtime, error=None):
+    passed = case_matches(tc, actual)
+    return {
+        "input": tc.input,
+        "expected": tc.expected_output,
+        "actual": actual,
+        "passed": passed,
+        "runtime": runtime,
+        "error": error if not passed else None
+    }
 
 def judge(exec_result, testcases):
     results = []
@@ -49,16 +185,16 @@ def judge(exec_result, testcases):
             })
         return results
 
+    if exec_result.failed_index is not None:
+        # Fail-fast runs stop at the first failing test; nothing after it was executed.
+        testcases = list(testcases)[:exec_result.failed_index + 1]
+
     for i, tc in enumerate(testcases):
         actual = exec_result.outputs[i] if i < len(exec_result.outputs) else None
-        passed = compare(actual, tc.expected_output)
-        
-        results.append({
-            "input": tc.input,
-            "expected": tc.expected_output,
-            "actual": actual,
-            "passed": passed,
-            "runtime": exec_result.runtimes[i] if i < len(exec_result.runtimes) else 0,
-            "error": exec_result.error if not passed and i >= len(exec_result.outputs) else None
-        })
+        results.append(judge_case(
+            tc,
+            actual,
+            exec_result.runtimes[i] if i < len(exec_result.runtimes) else 0,
+            exec_result.error if i >= len(exec_result.outputs) else None
+        ))
     return results
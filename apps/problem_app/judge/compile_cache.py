@@ -0,0 +1,137 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+BUILD_LOCK_STRIPES = 64
+# Eviction trims the cache to this share of max_bytes, so the directory scan
+# runs once per LOW_WATER slack worth of new builds rather than on every one.
+LOW_WATER = 0.8
+# Other processes share the directory; rescan at least this often (seconds)
+# so their builds are counted too.
+RESCAN_INTERVAL = 300
+
+
+class CompileCache:
+    """
+    Content-addressed store for compiled judge artifacts.
+    Each entry is a directory named after the build hash; the directory
+    mtime doubles as the LRU timestamp. The total size is tracked from the
+    builds this process stores and only rescanned when it passes max_bytes.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._build_locks = [threading.Lock() for _ in range(BUILD_LOCK_STRIPES)]
+        self._size = None  # bytes, as of the last scan plus our own puts since
+        self._scanned_at = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(language, flags, harness_version, *sources):
+        h = hashlib.sha256()
+        for part in (language, " ".join(flags), harness_version, *sources):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def build_lock(self, key):
+        """Serialises builds of the same key so concurrent shards compile once."""
+        return self._build_locks[int(key[:8], 16) % BUILD_LOCK_STRIPES]
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        path = self._entry(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, build_dir, filenames):
+        staging = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        added = 0
+        try:
+            for name in filenames:
+                shutil.copy2(os.path.join(build_dir, name), os.path.join(staging, name))
+                added += os.path.getsize(os.path.join(staging, name))
+            try:
+                os.rename(staging, self._entry(key))
+            except OSError:
+                # Another worker stored the same build first.
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._account(added)
+        return self._entry(key)
+
+    def _account(self, added):
+        with self._lock:
+            stale = self._size is None or time.monotonic() - self._scanned_at > RESCAN_INTERVAL
+            if not stale:
+                self._size += added
+                if self._size <= self.max_bytes:
+                    return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith(".tmp-"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+                )
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Scan the cache and, if it is over max_bytes, drop LRU entries down to the low-water mark."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for _, size, path in entries:
+                    if total <= self.max_bytes * LOW_WATER:
+                        break
+                    shutil.rmtree(path, ignore_errors=True)
+                    total -= size
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_compile_cache():
+    global _cache
+
+    max_bytes = getattr(settings, "JUDGE_COMPILE_CACHE_MAX_BYTES", 0)
+    if max_bytes <= 0:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            root = getattr(settings, "JUDGE_COMPILE_CACHE_DIR", None) or os.path.join(
+                tempfile.gettempdir(), "codearc-compile-cache"
+            )
+            _cache = CompileCache(root, max_bytes)
+        return _cache
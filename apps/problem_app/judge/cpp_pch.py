@@ -0,0 +1,257 @@
+# Shared C++ harness header, precompiled once per set of compiler flags.
+# Every generated solution.cpp starts with `#include "judge_harness.h"`;
+# g++ picks up judge_harness.h.gch from the same include directory when it
+# exists and was built with matching flags, and silently parses the plain
+# header otherwise, so a missing or stale .gch only costs compile time.
+
+import hashlib
+import os
+import stat
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+HEADER_NAME = "judge_harness.h"
+
+OPTIMIZATION_CHOICES = (
+    ("O0", "-O0"),
+    ("O1", "-O1"),
+    ("O2", "-O2"),
+    ("O3", "-O3"),
+    ("Os", "-Os"),
+)
+
+# Flags that don't change the generated code and need no separate .gch.
+NEUTRAL_FLAGS = {"-pipe"}
+
+HEADER = """#pragma once
+#include <algorithm>
+#include <array>
+#include <bitset>
+#include <chrono>
+#include <climits>
+#include <cmath>
+#include <cstdlib>
+#include <cstring>
+#include <deque>
+#include <fstream>
+#include <functional>
+#include <iomanip>
+#include <iostream>
+#include <list>
+#include <map>
+#include <numeric>
+#include <queue>
+#include <set>
+#include <sstream>
+#include <stack>
+#include <string>
+#include <tuple>
+#include <unordered_map>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+// Everything the generated runner needs lives in its own namespace, so
+// submissions are free to use these names themselves.
+namespace judge_harness {
+
+// Records go to $JUDGE_RESULT_FD so they never mix with the user's std::cout.
+std::ofstream judge_out;
+
+// Helper to print results
+void print_res(int v) { judge_out << v; }
+void print_res(long long v) { judge_out << v; }
+void print_res(double v) { judge_out << v; }
+void print_res(const std::string& v) { judge_out << v; }
+void print_res(bool v) { judge_out << (v ? "true" : "false"); }
+template<typename T>
+void print_res(const std::vector<T>& v) {
+    judge_out << "[";
+    for(size_t i=0; i<v.size(); ++i) {
+        print_res(v[i]);
+        if(i < v.size()-1) judge_out << ",";
+    }
+    judge_out << "]";
+}
+
+// Helpers to decode typed arguments from stdin (see judge/wire.py)
+void read_val(int& v) { std::cin >> v; }
+void read_val(long long& v) { std::cin >> v; }
+void read_val(double& v) { std::cin >> v; }
+void read_val(bool& v) { int x = 0; std::cin >> x; v = x != 0; }
+void read_val(std::string& v) {
+    size_t n = 0;
+    std::cin >> n;
+    std::cin.get();
+    v.assign(n, '\\0');
+    if (n) std::cin.read(&v[0], n);
+}
+void read_val(std::vector<bool>& v) {
+    size_t n = 0;
+    std::cin >> n;
+    v.assign(n, false);
+    for (size_t i = 0; i < n; ++i) { int x = 0; std::cin >> x; v[i] = x != 0; }
+}
+template<typename T>
+void read_val(std::vector<T>& v) {
+    size_t n = 0;
+    std::cin >> n;
+    v.resize(n);
+    for (auto& x : v) read_val(x);
+}
+
+// Peak RSS of this process; rusage from the judge would include the parent's at fork.
+void print_meta() {
+    std::ifstream status("/proc/self/status");
+    std::string line;
+    while (std::getline(status, line)) {
+        if (line.rfind("VmHWM:", 0) == 0) {
+            judge_out << "{\\"peak_memory\\": " << std::stol(line.substr(6)) / 1024.0 << "}";
+            return;
+        }
+    }
+    judge_out << "{}";
+}
+
+}  // namespace judge_harness
+"""
+
+# A flag set whose header failed to precompile is not retried for this
+# long; its compiles use the plain header meanwhile.
+FAILURE_BACKOFF = 300
+
+_building = set()
+_failed = {}
+_default_root = None
+_lock = threading.Lock()
+
+
+def compile_flags(optimization=None, pipe=None):
+    """g++ flags for a problem; blank/None values use the JUDGE_CPP_* defaults."""
+    optimization = optimization or getattr(settings, "JUDGE_CPP_OPTIMIZATION", "O0")
+    if pipe is None:
+        pipe = getattr(settings, "JUDGE_CPP_PIPE", True)
+    return [f"-{optimization}"] + (["-pipe"] if pipe else [])
+
+
+def _private_dir(path):
+    """
+    path as a 0700 directory owned by this user, or a fresh private temp
+    directory when path is someone else's: headers in a directory other
+    users can write to would be compiled into every submission.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return tempfile.mkdtemp(prefix="codearc-cpp-pch-")
+    info = os.lstat(path)
+    if stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077:
+        return path
+    return tempfile.mkdtemp(prefix="codearc-cpp-pch-")
+
+
+def _root():
+    global _default_root
+
+    configured = getattr(settings, "JUDGE_CPP_PCH_DIR", None)
+    if configured:
+        return configured
+    with _lock:
+        if _default_root is None:
+            _default_root = _private_dir(os.path.join(tempfile.gettempdir(), f"codearc-cpp-pch-{os.getuid()}"))
+        return _default_root
+
+
+def _codegen_flags(flags):
+    return [flag for flag in flags if flag not in NEUTRAL_FLAGS]
+
+
+def _directory(flags):
+    h = hashlib.sha256()
+    for part in (HEADER, *_codegen_flags(flags)):
+        h.update(part.encode())
+        h.update(b"\0")
+    return os.path.join(_root(), h.hexdigest()[:16])
+
+
+def _build(directory, flags):
+    """
+    Compile the header into directory/judge_harness.h.gch; False if g++
+    failed, in which case the directory is not tried again for FAILURE_BACKOFF.
+    """
+    header = os.path.join(directory, HEADER_NAME)
+    staging = f"{header}.gch.{uuid.uuid4().hex}"
+    built = False
+    try:
+        process = subprocess.run(
+            ["g++", *_codegen_flags(flags), "-x", "c++-header", header, "-o", staging],
+            capture_output=True,
+            timeout=120,
+        )
+        if process.returncode == 0:
+            # Atomic, so a concurrent compile never sees a half-written .gch.
+            os.replace(staging, header + ".gch")
+            built = True
+        return built
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+        with _lock:
+            if built:
+                _failed.pop(directory, None)
+            else:
+                _failed[directory] = time.monotonic() + FAILURE_BACKOFF
+
+
+def _build_in_background(directory, flags):
+    try:
+        _build(directory, flags)
+    finally:
+        with _lock:
+            _building.discard(directory)
+
+
+def include_dir(flags, wait=False):
+    """
+    Directory holding the harness header for these flags. If its .gch is
+    not built yet, it is built in the background (or before returning,
+    with `wait`) while compiles go ahead with the plain header.
+    """
+    directory = _directory(flags)
+    header = os.path.join(directory, HEADER_NAME)
+    if not os.path.exists(header):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        staging = f"{header}.{uuid.uuid4().hex}"
+        with open(staging, "w") as f:
+            f.write(HEADER)
+        os.replace(staging, header)
+
+    if not getattr(settings, "JUDGE_CPP_PCH", True) or os.path.exists(header + ".gch"):
+        return directory
+    with _lock:
+        if _failed.get(directory, 0) > time.monotonic():
+            return directory
+    if wait:
+        _build(directory, flags)
+        return directory
+
+    with _lock:
+        if directory in _building:
+            return directory
+        _building.add(directory)
+    threading.Thread(target=_build_in_background, args=(directory, flags), daemon=True).start()
+    return directory
+
+
+def warm():
+    """Build the precompiled header for the default flags; judge workers call this at start-up."""
+    return include_dir(compile_flags(), wait=True)
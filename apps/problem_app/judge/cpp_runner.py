@@ -1,8 +1,24 @@
 import subprocess
-import tempfile
 import os
-import json
+from contextlib import nullcontext
+from functools import lru_cache
 from .execution_base import ExecutionResult
+from . import cpp_pch, workspace
+from .compile_cache import CompileCache, get_compile_cache
+from .streaming import RECORD_PREFIX, RESULT_FD_ENV, RecordCollector, collected_result, fail_fast_expected, parse_plain_value, stream_process
+from .limits import address_space_bytes
+from .wire import typed_input
+from .timing import COMPILE, HARNESS, clock, elapsed_ms, span
+
+HARNESS_VERSION = "7"
+
+CPP_TYPES = {
+    "int": "int",
+    "long": "long long",
+    "double": "double",
+    "bool": "bool",
+    "string": "std::string",
+}
 
 def _to_cpp_literal(val):
     if isinstance(val, bool):
@@ -27,45 +43,78 @@ def _to_cpp_literal(val):
         return f"{{ {contents} }}"
     return str(val)
 
-def run_cpp(user_code, testcases, function_name):
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cpp_file = os.path.join(tmpdir, "solution.cpp")
-            binary_file = os.path.join(tmpdir, "solution")
-            if os.name == 'nt':
-                binary_file += ".exe"
-            
-            test_calls = []
-            for tc in testcases:
-                args_str = [_to_cpp_literal(arg) for arg in tc.input]
-                args_decl = ""
-                arg_names = []
-                for idx, arg in enumerate(args_str):
-                    var_name = f"arg{idx}"
-                    args_decl += f"auto {var_name} = {arg};\n"
-                    arg_names.append(var_name)
-                
-                test_calls.append(f"""
-                {{
+def _cpp_type(base, depth):
+    cpp_type = CPP_TYPES[base]
+    for _ in range(depth):
+        cpp_type = f"std::vector<{cpp_type}>"
+    return cpp_type
+
+def _record_call(function_name, arg_names):
+    return f"""
                     auto start = std::chrono::high_resolution_clock::now();
-                    {args_decl}
                     auto res = sol.{function_name}({", ".join(arg_names)});
                     auto end = std::chrono::high_resolution_clock::now();
                     auto duration = std::chrono::duration<double, std::milli>(end - start).count();
-                    std::cout << "RES:";
-                    print_res(res);
-                    std::cout << std::endl;
-                    std::cout << "TIME:" << duration << std::endl;
+                    judge_harness::judge_out << "{RECORD_PREFIX}REC\\t" << duration << "\\t";
+                    judge_harness::print_res(res);
+                    judge_harness::judge_out << std::endl;
+"""
+
+@lru_cache(maxsize=256)
+def _stdin_main(types, function_name):
+    """Test loop that decodes typed arguments from stdin; depends only on the signature."""
+    decls = "".join(
+        f"                    {_cpp_type(base, depth)} arg{idx}; judge_harness::read_val(arg{idx});\n"
+        for idx, (base, depth) in enumerate(types)
+    )
+    arg_names = [f"arg{idx}" for idx in range(len(types))]
+    return f"""
+    size_t test_count = 0;
+    std::cin >> test_count;
+    for (size_t t = 0; t < test_count; ++t) {{
+                {{
+{decls}{_record_call(function_name, arg_names)}
+                }}
+    }}
+"""
+
+def _literal_main(testcases, function_name):
+    """Legacy test loop with inputs embedded as literals, for signatures we can't decode."""
+    test_calls = []
+    for tc in testcases:
+        args_str = [_to_cpp_literal(arg) for arg in tc.input]
+        args_decl = ""
+        arg_names = []
+        for idx, arg in enumerate(args_str):
+            var_name = f"arg{idx}"
+            args_decl += f"auto {var_name} = {arg};\n"
+            arg_names.append(var_name)
+
+        test_calls.append(f"""
+                {{
+                    {args_decl}
+{_record_call(function_name, arg_names)}
                 }}
                 """)
+    return " ".join(test_calls)
 
-            with open(cpp_file, "w") as f:
-                f.write(f"""
-#include <iostream>
-#include <vector>
-#include <string>
-#include <chrono>
-#include <algorithm>
+def run_cpp(user_code, testcases, function_name, on_record=None, fail_fast=False, parameters=None, timeout=5, memory_limit=None,
+            compile_flags=None, time_limit=None):
+    try:
+        with workspace.get_workspace().sandbox() as tmpdir:
+            cpp_file = os.path.join(tmpdir, "solution.cpp")
+            binary_file = os.path.join(tmpdir, "solution")
+            if os.name == 'nt':
+                binary_file += ".exe"
+
+            started = clock()
+            types, stdin_data = typed_input(testcases, parameters)
+            if types is not None:
+                main_body = _stdin_main(tuple(types), function_name)
+            else:
+                main_body = _literal_main(testcases, function_name)
+
+            source = f"""#include "{cpp_pch.HEADER_NAME}"
 
 using namespace std;
 
@@ -73,76 +122,53 @@ using namespace std;
 {user_code}
 // --- USER CODE END ---
 
-// Helper to print results
-void print_res(int v) {{ std::cout << v; }}
-void print_res(long long v) {{ std::cout << v; }}
-void print_res(double v) {{ std::cout << v; }}
-void print_res(const std::string& v) {{ std::cout << v; }}
-void print_res(bool v) {{ std::cout << (v ? "true" : "false"); }}
-template<typename T>
-void print_res(const std::vector<T>& v) {{
-    std::cout << "[";
-    for(size_t i=0; i<v.size(); ++i) {{
-        print_res(v[i]);
-        if(i < v.size()-1) std::cout << ",";
-    }}
-    std::cout << "]";
-}}
-
 int main() {{
+    judge_harness::judge_out.open(std::string("/dev/fd/") + std::getenv("{RESULT_FD_ENV}"));
     Solution sol;
-    std::cout << "---RESULT_JSON_START---" << std::endl;
-    {" ".join(test_calls)}
+    {main_body}
+    judge_harness::judge_out << "{RECORD_PREFIX}END\\t";
+    judge_harness::print_meta();
+    judge_harness::judge_out << std::endl;
     return 0;
 }}
-""")
-
-            compile_cmd = ["g++", "solution.cpp", "-o", "solution"]
-            compile_process = subprocess.run(
-                compile_cmd,
-                cwd=tmpdir,
-                capture_output=True,
-                text=True
-            )
+"""
 
-            if compile_process.returncode != 0:
-                return ExecutionResult(error=compile_process.stderr, error_type="Compilation Error")
+            phases = {HARNESS: elapsed_ms(started)}
 
-            run_process = subprocess.run(
-                [binary_file],
-                cwd=tmpdir,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            flags = compile_flags or cpp_pch.compile_flags()
+            cache = get_compile_cache()
+            cache_key = CompileCache.key("cpp", flags, HARNESS_VERSION, cpp_pch.HEADER, source) if cache else None
+
+            with span(phases, COMPILE), (cache.build_lock(cache_key) if cache else nullcontext()):
+                cached_dir = cache.get(cache_key) if cache else None
+
+                if cached_dir:
+                    binary_file = os.path.join(cached_dir, os.path.basename(binary_file))
+                else:
+                    with open(cpp_file, "w") as f:
+                        f.write(source)
 
-            if run_process.stderr:
-                return ExecutionResult(error=run_process.stderr, error_type="Runtime Error")
-
-            full_stdout = run_process.stdout
-            if "---RESULT_JSON_START---" not in full_stdout:
-                return ExecutionResult(error="Judge failed to produce output", error_type="Internal Error")
-
-            parts = full_stdout.split("---RESULT_JSON_START---")
-            stdout = parts[0].strip()
-            lines = parts[1].strip().split("\n")
-            
-            outputs = []
-            runtimes = []
-            for line in lines:
-                if line.startswith("RES:"):
-                    val = line[4:].strip()
-                    if val.startswith("[") and val.endswith("]"):
-                        try: val = json.loads(val)
-                        except: pass
-                    elif val == "true": val = True
-                    elif val == "false": val = False
-                    outputs.append(val)
-                elif line.startswith("TIME:"):
-                    try: runtimes.append(float(line[5:].strip()))
-                    except: runtimes.append(0.0)
-
-            return ExecutionResult(outputs=outputs, runtimes=runtimes, stdout=stdout)
+                    compile_cmd = ["g++", *flags, "-I", cpp_pch.include_dir(flags), "solution.cpp", "-o", "solution"]
+                    compile_process = subprocess.run(
+                        compile_cmd,
+                        cwd=tmpdir,
+                        capture_output=True,
+                        text=True
+                    )
+
+                    if compile_process.returncode != 0:
+                        return ExecutionResult(error=compile_process.stderr, error_type="Compilation Error", phases=phases)
+
+                    if cache:
+                        cached_dir = cache.put(cache_key, tmpdir, [os.path.basename(binary_file)])
+                        binary_file = os.path.join(cached_dir, os.path.basename(binary_file))
+
+            collector = RecordCollector(parse_plain_value, on_record, fail_fast_expected(testcases, fail_fast), case_limit=time_limit)
+            stderr = stream_process(
+                [binary_file], collector, timeout=timeout, cwd=tmpdir, stdin_data=stdin_data,
+                address_space=address_space_bytes(memory_limit)
+            )
+            return collected_result(collector, stderr, phases)
     except subprocess.TimeoutExpired:
         return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
     except Exception as e:
@@ -1,12 +1,127 @@
-from .python_runner import run_python
-from .js_runner import run_js
-from .java_runner import run_java
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .execution_base import ExecutionResult
+from .python_pool import run_python_pooled
+from .js_pool import run_js_pooled
+from .java_daemon import run_java_daemon
 from .cpp_runner import run_cpp
+from .streaming import STARTUP_GRACE
+from .timing import merge_shards
 
-def dispatch(language, code, testcases, fn):
-    lang = language.lower()
-    if lang == "python": return run_python(code,testcases,fn)
-    if lang == "javascript": return run_js(code,testcases,fn)
-    if lang == "java": return run_java(code,testcases,fn)
-    if lang == "cpp": return run_cpp(code,testcases,fn)
+DEFAULT_TIMEOUT = 5
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def _max_concurrency():
+    return getattr(settings, "JUDGE_MAX_CONCURRENCY", 0) or os.cpu_count() or 1
+
+
+def _concurrency_budget():
+    """Process-wide cap on harness processes started for shards."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = threading.BoundedSemaphore(_max_concurrency())
+        return _budget
+
+
+def _run(lang, code, testcases, fn, on_record, fail_fast, parameters, timeout, memory_limit, compile_flags=None,
+         time_limit=None):
+    if lang == "python": return run_python_pooled(code,testcases,fn,on_record,fail_fast,timeout,memory_limit,time_limit)
+    if lang == "javascript": return run_js_pooled(code,testcases,fn,on_record,fail_fast,timeout,memory_limit,time_limit)
+    if lang == "java": return run_java_daemon(code,testcases,fn,on_record,fail_fast,parameters,timeout,memory_limit,time_limit)
+    if lang == "cpp": return run_cpp(code,testcases,fn,on_record,fail_fast,parameters,timeout,memory_limit,compile_flags,time_limit)
     raise ValueError("Unsupported language")
+
+
+def _timeout(time_limit, count):
+    """
+    Budget for a whole run. Each case is held to time_limit by the record
+    collector, so this only has to bound how long one request can take:
+    it grows with the cases but stops at JUDGE_RUN_TIMEOUT, while always
+    leaving room for one case to use its full limit.
+    """
+    if not time_limit:
+        return DEFAULT_TIMEOUT
+    ceiling = getattr(settings, "JUDGE_RUN_TIMEOUT", 10)
+    return max(time_limit + STARTUP_GRACE, min(time_limit * count + STARTUP_GRACE, ceiling))
+
+
+def _shards(testcases):
+    min_tests = getattr(settings, "JUDGE_SHARD_MIN_TESTS", 0)
+    if min_tests <= 0 or len(testcases) < 2 * min_tests:
+        return [testcases]
+
+    count = min(len(testcases) // min_tests, os.cpu_count() or 1, _max_concurrency())
+    size = math.ceil(len(testcases) / count)
+    return [testcases[i:i + size] for i in range(0, len(testcases), size)]
+
+
+def _offset_record(on_record, offset):
+    if on_record is None:
+        return None
+    return lambda index, actual, runtime: on_record(offset + index, actual, runtime)
+
+
+def _merge(shards, results):
+    """Concatenate shard results in test order; the first error or failure wins."""
+    merged = ExecutionResult()
+    console = []
+    offset = 0
+    for shard, result in zip(shards, results):
+        if result.stdout:
+            console.append(result.stdout)
+        # A case over its time limit still leaves the cases before it judged.
+        if result.error and result.failed_index is None:
+            # Every shard ran, so the phase timings and usage cover all of them.
+            return ExecutionResult(
+                error=result.error, error_type=result.error_type, stdout="\n".join(console),
+                memory=max(r.memory for r in results), cpu_time=sum(r.cpu_time for r in results),
+                phases=merge_shards([r.phases for r in results]),
+            )
+
+        merged.outputs.extend(result.outputs)
+        merged.runtimes.extend(result.runtimes)
+        merged.memory = max(merged.memory, result.memory)
+        merged.cpu_time += result.cpu_time
+        if result.failed_index is not None:
+            merged.failed_index = offset + result.failed_index
+            merged.error, merged.error_type = result.error, result.error_type
+            break
+        offset += len(shard)
+
+    merged.stdout = "\n".join(console)
+    merged.phases = merge_shards([result.phases for result in results])
+    return merged
+
+
+def dispatch(language, code, testcases, fn, on_record=None, fail_fast=False, parameters=None,
+             time_limit=None, memory_limit=None, compile_flags=None):
+    lang = language.lower()
+    shards = _shards(testcases)
+    if len(shards) == 1:
+        return _run(
+            lang, code, testcases, fn, on_record, fail_fast, parameters,
+            _timeout(time_limit, len(testcases)), memory_limit, compile_flags, time_limit
+        )
+
+    budget = _concurrency_budget()
+    offsets = [sum(len(s) for s in shards[:i]) for i in range(len(shards))]
+
+    def run_shard(shard, offset):
+        with budget:
+            return _run(
+                lang, code, shard, fn, _offset_record(on_record, offset), fail_fast,
+                parameters, _timeout(time_limit, len(shard)), memory_limit, compile_flags, time_limit
+            )
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        results = list(executor.map(run_shard, shards, offsets))
+    return _merge(shards, results)
@@ -1,11 +1,20 @@
 from dataclasses import dataclass, field
-from typing import List, Any, Optional
+from typing import Dict, List, Any, Optional
+
+MEMORY_LIMIT_EXCEEDED = "Memory Limit Exceeded"
+OUTPUT_LIMIT_EXCEEDED = "Output Limit Exceeded"
+TIME_LIMIT_EXCEEDED = "Time Limit Exceeded"
+# Errors that decide the verdict of the whole run instead of showing up as wrong answers.
+LIMIT_VERDICTS = (MEMORY_LIMIT_EXCEEDED, OUTPUT_LIMIT_EXCEEDED, TIME_LIMIT_EXCEEDED)
 
 @dataclass
 class ExecutionResult:
     outputs: List[Any] = field(default_factory=list)
     runtimes: List[float] = field(default_factory=list)
-    memory: float = 0.0
+    memory: float = 0.0  # peak RSS, MB
+    cpu_time: float = 0.0  # user + system, ms
     stdout: str = ""
     error: Optional[str] = None
-    error_type: Optional[str] = None 
+    error_type: Optional[str] = None
+    failed_index: Optional[int] = None
+    phases: Dict[str, float] = field(default_factory=dict)  # wall time per judge phase, ms
@@ -0,0 +1,209 @@
+import atexit
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+from .execution_base import MEMORY_LIMIT_EXCEEDED, ExecutionResult
+from .compile_cache import CompileCache
+from .java_runner import COMPILE_FLAGS, HARNESS_VERSION, java_sources, run_java
+from .limits import Usage, output_limit_bytes
+from .python_pool import HEADER, WorkerError, WorkerPool, read_exact
+from .streaming import RECORD_PREFIX, RecordCollector, collected_result, fail_fast_expected, parse_plain_value
+from .timing import COMPILE, HARNESS, clock, elapsed_ms
+
+DAEMON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "JudgeDaemon.java")
+FRAME = struct.Struct(">cI")
+
+
+class JavaDaemon:
+    """
+    A long-lived JVM running JudgeDaemon.java: submissions are compiled in
+    memory and each job runs in a throwaway class loader, so only the first
+    job pays for JVM start-up and JIT warm-up.
+    """
+
+    def __init__(self, heap_mb=512, start_timeout=30):
+        self.process = subprocess.Popen(
+            ["java", f"-Xmx{heap_mb}m", "-XX:+UseSerialGC", DAEMON_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.start_timeout = start_timeout
+        self.ready = False
+        self.jobs = 0
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    def _send(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def _receive(self, deadline):
+        fd = self.process.stdout.fileno()
+        kind, size = FRAME.unpack(read_exact(fd, FRAME.size, deadline))
+        return kind, read_exact(fd, size, deadline).decode("utf-8", errors="replace")
+
+    def _wait_ready(self):
+        # The JVM compiles JudgeDaemon.java on start, so the first lease waits for its 'P'.
+        if not self.ready:
+            self._receive(time.monotonic() + self.start_timeout)
+            self.ready = True
+
+    def ping(self, timeout=2):
+        if self.process.poll() is not None:
+            return False
+        try:
+            self._wait_ready()
+            self._send(b"P")
+            return self._receive(time.monotonic() + timeout)[0] == b"P"
+        except (OSError, ValueError, WorkerError):
+            self.broken = True
+            return False
+
+    def run(self, key, solution, runner, stdin_data, collector, phases, timeout=5, output_limit=0):
+        """
+        Judge one submission; returns (status, stdout, stderr, cpu ms), or
+        None with phases[COMPILE] set and stderr holding javac's errors.
+        """
+        fields = (
+            key, solution, runner, stdin_data or b"",
+            str(int(timeout * 1000)), str(output_limit), RECORD_PREFIX,
+        )
+        request = b"J" + b"".join(
+            HEADER.pack(len(data)) + data
+            for data in (f.encode() if isinstance(f, str) else f for f in fields)
+        )
+        collector.stop = lambda: self._send(b"C")
+        stdout = stderr = ""
+        try:
+            self._wait_ready()
+            sent = clock()
+            self._send(request)
+            # Compiling counts against the start-up budget, running against the time limit.
+            deadline = time.monotonic() + self.start_timeout
+            while True:
+                kind, payload = self._receive(deadline)
+                if kind == b"K":
+                    phases[COMPILE] = elapsed_ms(sent)
+                    collector.spawned_at = clock()
+                    collector.start_watch()
+                    deadline = time.monotonic() + timeout + 2
+                elif kind == b"X":
+                    phases[COMPILE] = elapsed_ms(sent)
+                    status = None
+                    stderr = payload
+                    break
+                elif kind == b"R":
+                    collector.feed_line(payload)
+                elif kind == b"O":
+                    stdout = payload
+                elif kind == b"E":
+                    stderr = payload
+                elif kind == b"D":
+                    collector.exited_at = clock()
+                    status, cpu_time, restart = payload.split()
+                    # The daemon exits after a timeout or leaked threads.
+                    self.broken = restart == "1"
+                    break
+        except (OSError, ValueError, WorkerError) as e:
+            self.broken = True
+            raise WorkerError(str(e))
+        finally:
+            collector.stop_watch()
+
+        self.jobs += 1
+        self.last_used = time.monotonic()
+        if status is None:
+            return None, stdout, stderr, 0.0
+        return status, stdout, stderr, float(cpu_time)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+
+    size = getattr(settings, "JUDGE_JAVA_DAEMON_POOL_SIZE", 0)
+    if size <= 0 or os.name == "nt" or shutil.which("java") is None:
+        return None
+
+    with _pool_lock:
+        # Daemons belong to the process that started them; rebuild after fork.
+        if _pool is None or _pool_pid != os.getpid():
+            heap_mb = getattr(settings, "JUDGE_JAVA_DAEMON_HEAP_MB", 512)
+            start_timeout = getattr(settings, "JUDGE_JAVA_DAEMON_START_TIMEOUT", 30)
+            _pool = WorkerPool(
+                lambda: JavaDaemon(heap_mb, start_timeout),
+                size=size,
+                max_jobs=getattr(settings, "JUDGE_JAVA_DAEMON_MAX_JOBS", 500),
+                lease_timeout=getattr(settings, "JUDGE_JAVA_DAEMON_LEASE_TIMEOUT", 1.0),
+                health_check_interval=getattr(settings, "JUDGE_JAVA_DAEMON_HEALTH_CHECK_INTERVAL", 30),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+
+
+def run_java_daemon(user_code, testcases, function_name, on_record=None, fail_fast=False, parameters=None, timeout=5, memory_limit=None, time_limit=None):
+    pool = get_pool()
+    if pool is None:
+        return run_java(user_code, testcases, function_name, on_record, fail_fast, parameters, timeout, memory_limit, time_limit)
+
+    started = clock()
+    solution_source, runner_source, stdin_data = java_sources(user_code, testcases, function_name, parameters)
+    key = CompileCache.key("java", COMPILE_FLAGS, HARNESS_VERSION, solution_source, runner_source)
+    phases = {HARNESS: elapsed_ms(started)}
+    collector = RecordCollector(
+        parse_plain_value, on_record, fail_fast_expected(testcases, fail_fast), output_limit_bytes(),
+        case_limit=time_limit,
+    )
+    try:
+        with pool.lease() as daemon:
+            status, stdout, stderr, cpu_time = daemon.run(
+                key, solution_source, runner_source, stdin_data, collector, phases,
+                timeout, collector.output_limit
+            )
+    except WorkerError:
+        if collector.outputs:
+            return ExecutionResult(error="Judge worker crashed", error_type="Internal Error")
+        # No idle daemon, or it died before running anything: use a fresh JVM.
+        return run_java(user_code, testcases, function_name, on_record, fail_fast, parameters, timeout, memory_limit, time_limit)
+
+    if status is None:
+        return ExecutionResult(error=stderr, error_type="Compilation Error", phases=phases)
+    if status == "timeout":
+        return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
+
+    collector.console = [stdout]
+    collector.output_exceeded = status == "output"
+    collector.usage = Usage(cpu_time=cpu_time)
+    result = collected_result(collector, stderr, phases)
+    # The daemon's heap is shared, so the problem's limit is checked against the job's peak.
+    if memory_limit and not result.error and result.memory > memory_limit:
+        return ExecutionResult(
+            error=f"Heap usage {result.memory:.1f} MB exceeded {memory_limit} MB",
+            error_type=MEMORY_LIMIT_EXCEEDED,
+            cpu_time=result.cpu_time,
+            memory=result.memory,
+            phases=result.phases,
+        )
+    return result
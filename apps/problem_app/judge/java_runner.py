@@ -1,8 +1,68 @@
 import subprocess
-import tempfile
 import os
-import json
+from contextlib import nullcontext
+from functools import lru_cache
 from .execution_base import ExecutionResult
+from .compile_cache import CompileCache, get_compile_cache
+from . import workspace
+from .streaming import RECORD_PREFIX, RESULT_FD_ENV, RecordCollector, collected_result, fail_fast_expected, parse_plain_value, stream_process
+from .wire import typed_input
+from .timing import COMPILE, HARNESS, clock, elapsed_ms, span
+
+HARNESS_VERSION = "5"
+COMPILE_FLAGS = []
+
+JAVA_TYPES = {
+    "int": ("int", "in.nextInt()"),
+    "long": ("long", "in.nextLong()"),
+    "double": ("double", "in.nextDouble()"),
+    "bool": ("boolean", "in.nextBool()"),
+    "string": ("String", "in.nextString()"),
+}
+
+# Decodes the typed token stream described in judge/wire.py.
+INPUT_READER = """
+    static final class Input {
+        private final java.io.InputStream in;
+        private final byte[] buf = new byte[1 << 16];
+        private int len = 0, pos = 0;
+
+        Input(java.io.InputStream in) { this.in = in; }
+
+        private int read() throws java.io.IOException {
+            if (pos == len) {
+                len = in.read(buf, 0, buf.length);
+                pos = 0;
+                if (len <= 0) { len = 0; return -1; }
+            }
+            return buf[pos++] & 0xff;
+        }
+
+        String next() throws java.io.IOException {
+            int c = read();
+            while (c == ' ' || c == '\\n' || c == '\\r' || c == '\\t') c = read();
+            StringBuilder sb = new StringBuilder();
+            while (c != -1 && c != ' ' && c != '\\n' && c != '\\r' && c != '\\t') {
+                sb.append((char) c);
+                c = read();
+            }
+            return sb.toString();
+        }
+
+        int nextInt() throws java.io.IOException { return Integer.parseInt(next()); }
+        long nextLong() throws java.io.IOException { return Long.parseLong(next()); }
+        double nextDouble() throws java.io.IOException { return Double.parseDouble(next()); }
+        boolean nextBool() throws java.io.IOException { return !next().equals("0"); }
+
+        String nextString() throws java.io.IOException {
+            // next() already consumed the single separator after the length.
+            int n = nextInt();
+            byte[] data = new byte[n];
+            for (int i = 0; i < n; i++) data[i] = (byte) read();
+            return new String(data, java.nio.charset.StandardCharsets.UTF_8);
+        }
+    }
+"""
 
 def _to_java_literal(val):
     if isinstance(val, bool):
@@ -23,102 +83,170 @@ def _to_java_literal(val):
         return f"new Object[]{{{contents}}}"
     return str(val)
 
-def run_java(user_code, testcases, function_name):
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            java_solution_file = os.path.join(tmpdir, "Solution.java")
-            with open(java_solution_file, "w") as f:
-                f.write("import java.util.*;\nimport java.util.stream.*;\n" + user_code)
-            
-            java_runner_file = os.path.join(tmpdir, "Runner.java")
-            with open(java_runner_file, "w") as f:
-                f.write(f"""
+def _java_type(base, depth):
+    return JAVA_TYPES[base][0] + "[]" * depth
+
+def _reader_methods(types):
+    """One static decoder per (type, depth) used by the signature."""
+    methods = {}
+    for base, depth in types:
+        for d in range(depth, 0, -1):
+            name = f"read_{base}_{d}"
+            if name in methods:
+                break
+            elem = f"read_{base}_{d - 1}(in)" if d > 1 else JAVA_TYPES[base][1]
+            alloc = f"new {JAVA_TYPES[base][0]}[n]" + "[]" * (d - 1)
+            methods[name] = f"""
+    static {_java_type(base, d)} {name}(Input in) throws java.io.IOException {{
+        int n = in.nextInt();
+        {_java_type(base, d)} a = {alloc};
+        for (int i = 0; i < n; i++) a[i] = {elem};
+        return a;
+    }}
+"""
+    return "".join(methods.values())
+
+def _read_expr(base, depth):
+    return f"read_{base}_{depth}(in)" if depth else JAVA_TYPES[base][1]
+
+def _record_call(function_name, args):
+    return f"""
+            {{
+                long start = System.nanoTime();
+                Object res = sol.{function_name}({", ".join(args)});
+                long end = System.nanoTime();
+                OUT.print(PREFIX + "REC\\t" + (end - start) / 1e6 + "\\t");
+                if (res instanceof int[]) OUT.println(Arrays.toString((int[])res));
+                else if (res instanceof long[]) OUT.println(Arrays.toString((long[])res));
+                else if (res instanceof float[]) OUT.println(Arrays.toString((float[])res));
+                else if (res instanceof double[]) OUT.println(Arrays.toString((double[])res));
+                else if (res instanceof boolean[]) OUT.println(Arrays.toString((boolean[])res));
+                else if (res instanceof String[]) OUT.println(Arrays.toString((String[])res));
+                else if (res instanceof Object[]) OUT.println(Arrays.deepToString((Object[])res));
+                else OUT.println(res);
+            }}
+"""
+
+def _runner_source(body, helpers=""):
+    return f"""
 import java.util.*;
 import java.util.stream.*;
 
 public class Runner {{
-    public static void main(String[] args) {{
+{helpers}
+    public static void main(String[] args) throws Exception {{
+        // Records go to $JUDGE_RESULT_FD so they never mix with the user's System.out.
+        java.io.PrintStream OUT = new java.io.PrintStream(new java.io.BufferedOutputStream(
+            new java.io.FileOutputStream("/dev/fd/" + System.getenv("{RESULT_FD_ENV}")), 1 << 16), true, "UTF-8");
+        if (run(System.in, OUT)) OUT.println("{RECORD_PREFIX}END\\t" + peakMemory());
+    }}
+
+    // Runs every test case; the judge daemon calls this directly with its own streams.
+    public static boolean run(java.io.InputStream IN, java.io.PrintStream OUT) {{
         Solution sol = new Solution();
-        String DELIM = "---RESULT_JSON_START---";
-        System.out.println(DELIM);
+        String PREFIX = "{RECORD_PREFIX}";
         
         try {{
-""")
-                for tc in testcases:
-                    args_str = [_to_java_literal(arg) for arg in tc.input]
-                    f.write(f"""
-            {{
-                long start = System.nanoTime();
-                Object res = sol.{function_name}({", ".join(args_str)});
-                long end = System.nanoTime();
-                System.out.print("RES:");
-                if (res instanceof int[]) System.out.println(Arrays.toString((int[])res));
-                else if (res instanceof long[]) System.out.println(Arrays.toString((long[])res));
-                else if (res instanceof float[]) System.out.println(Arrays.toString((float[])res));
-                else if (res instanceof double[]) System.out.println(Arrays.toString((double[])res));
-                else if (res instanceof boolean[]) System.out.println(Arrays.toString((boolean[])res));
-                else if (res instanceof String[]) System.out.println(Arrays.toString((String[])res));
-                else if (res instanceof Object[]) System.out.println(Arrays.deepToString((Object[])res));
-                else System.out.println(res);
-                System.out.println("TIME:" + (end - start) / 1e6);
+{body}
+            return true;
+        }} catch (Throwable e) {{
+            OUT.println(PREFIX + "ERR\\t" + e.toString());
+            return false;
+        }}
+    }}
+
+    static String peakMemory() {{
+        try {{
+            for (String line : java.nio.file.Files.readAllLines(java.nio.file.Paths.get("/proc/self/status"))) {{
+                if (line.startsWith("VmHWM:")) {{
+                    long kb = Long.parseLong(line.substring(6).trim().split("\\\\s+")[0]);
+                    return "{{\\"peak_memory\\": " + (kb / 1024.0) + "}}";
+                }}
             }}
-""")
-                f.write("""
-        } catch (Throwable e) {
-            System.out.println("ERR:" + e.toString());
-        }
-    }
-}
-""")
+        }} catch (Exception ignored) {{}}
+        return "{{}}";
+    }}
+}}
+"""
 
-            compile_process = subprocess.run(
-                ["javac", "Solution.java", "Runner.java"],
-                cwd=tmpdir,
-                capture_output=True,
-                text=True
-            )
-            
-            if compile_process.returncode != 0:
-                return ExecutionResult(error=compile_process.stderr, error_type="Compilation Error")
-
-            run_process = subprocess.run(
-                ["java", "Runner"],
-                cwd=tmpdir,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+@lru_cache(maxsize=256)
+def _stdin_runner(types, function_name):
+    """Runner that decodes typed arguments from stdin; depends only on the signature."""
+    decls = "".join(
+        f"                {_java_type(base, depth)} arg{idx} = {_read_expr(base, depth)};\n"
+        for idx, (base, depth) in enumerate(types)
+    )
+    body = f"""
+            Input in = new Input(IN);
+            int testCount = in.nextInt();
+            for (int t = 0; t < testCount; t++) {{
+{decls}{_record_call(function_name, [f"arg{idx}" for idx in range(len(types))])}
+            }}
+"""
+    return _runner_source(body, INPUT_READER + _reader_methods(types))
+
+def _literal_runner(testcases, function_name):
+    """Legacy runner with inputs embedded as literals, for signatures we can't decode."""
+    calls = [
+        _record_call(function_name, [_to_java_literal(arg) for arg in tc.input])
+        for tc in testcases
+    ]
+    return _runner_source("".join(calls))
+
+def _heap_flags(memory_limit):
+    # The JVM reserves far more address space than it uses, so cap the heap instead of RLIMIT_AS.
+    return [f"-Xmx{memory_limit}m"] if memory_limit else []
 
-            if run_process.stderr:
-                return ExecutionResult(error=run_process.stderr, error_type="Runtime Error")
-
-            full_stdout = run_process.stdout
-            if "---RESULT_JSON_START---" not in full_stdout:
-                return ExecutionResult(error="Judge failed to produce output", error_type="Internal Error")
-
-            parts = full_stdout.split("---RESULT_JSON_START---")
-            stdout = parts[0].strip()
-            lines = parts[1].strip().split("\n")
-            
-            outputs = []
-            runtimes = []
-            for line in lines:
-                if line.startswith("RES:"):
-                    val = line[4:].strip()
-                    if val.startswith("[") and val.endswith("]"):
-                        try: val = json.loads(val)
-                        except: pass
-                    elif val == "true": val = True
-                    elif val == "false": val = False
-                    elif val == "null": val = None
-                    outputs.append(val)
-                elif line.startswith("ERR:"):
-                     return ExecutionResult(error=line[4:].strip(), error_type="Runtime Error")
-                elif line.startswith("TIME:"):
-                    try: runtimes.append(float(line[5:].strip()))
-                    except: runtimes.append(0.0)
-
-            return ExecutionResult(outputs=outputs, runtimes=runtimes, stdout=stdout)
+def java_sources(user_code, testcases, function_name, parameters=None):
+    """(Solution.java, Runner.java, stdin bytes or None) for a submission."""
+    solution_source = "import java.util.*;\nimport java.util.stream.*;\n" + user_code
+
+    types, stdin_data = typed_input(testcases, parameters)
+    if types is not None:
+        runner_source = _stdin_runner(tuple(types), function_name)
+    else:
+        runner_source = _literal_runner(testcases, function_name)
+    return solution_source, runner_source, stdin_data
+
+def run_java(user_code, testcases, function_name, on_record=None, fail_fast=False, parameters=None, timeout=5, memory_limit=None, time_limit=None):
+    try:
+        with workspace.get_workspace().sandbox() as tmpdir:
+            started = clock()
+            solution_source, runner_source, stdin_data = java_sources(user_code, testcases, function_name, parameters)
+            phases = {HARNESS: elapsed_ms(started)}
+
+            cache = get_compile_cache()
+            cache_key = CompileCache.key("java", COMPILE_FLAGS, HARNESS_VERSION, solution_source, runner_source) if cache else None
+
+            with span(phases, COMPILE), (cache.build_lock(cache_key) if cache else nullcontext()):
+                classpath = cache.get(cache_key) if cache else None
+
+                if not classpath:
+                    with open(os.path.join(tmpdir, "Solution.java"), "w") as f:
+                        f.write(solution_source)
+                    with open(os.path.join(tmpdir, "Runner.java"), "w") as f:
+                        f.write(runner_source)
+
+                    compile_process = subprocess.run(
+                        ["javac", *COMPILE_FLAGS, "Solution.java", "Runner.java"],
+                        cwd=tmpdir,
+                        capture_output=True,
+                        text=True
+                    )
+
+                    if compile_process.returncode != 0:
+                        return ExecutionResult(error=compile_process.stderr, error_type="Compilation Error", phases=phases)
+
+                    classpath = tmpdir
+                    if cache:
+                        class_files = [name for name in os.listdir(tmpdir) if name.endswith(".class")]
+                        classpath = cache.put(cache_key, tmpdir, class_files)
+
+            collector = RecordCollector(parse_plain_value, on_record, fail_fast_expected(testcases, fail_fast), case_limit=time_limit)
+            stderr = stream_process(
+                ["java", *_heap_flags(memory_limit), "-cp", classpath, "Runner"], collector, timeout=timeout, cwd=tmpdir, stdin_data=stdin_data
+            )
+            return collected_result(collector, stderr, phases)
     except subprocess.TimeoutExpired:
         return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
     except Exception as e:
@@ -0,0 +1,89 @@
+import atexit
+import os
+import shutil
+import threading
+
+from django.conf import settings
+
+from .execution_base import ExecutionResult
+from .js_runner import run_js
+from .limits import Usage, output_limit_bytes
+from .python_pool import PythonWorker, WorkerError, WorkerPool
+from .streaming import RecordCollector, collected_result, fail_fast_expected, parse_json_value
+from .timing import HARNESS, clock, elapsed_ms
+
+JS_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js_worker.js")
+
+
+class NodeWorker(PythonWorker):
+    """A pre-started node process that runs each job in a fresh worker_threads isolate."""
+
+    command = ["node", JS_WORKER_PATH]
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+
+    size = getattr(settings, "JUDGE_JS_POOL_SIZE", 0)
+    if size <= 0 or os.name == "nt" or shutil.which("node") is None:
+        return None
+
+    with _pool_lock:
+        # Workers belong to the process that started them; rebuild after fork.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = WorkerPool(
+                NodeWorker,
+                size=size,
+                max_jobs=getattr(settings, "JUDGE_JS_POOL_MAX_JOBS", 500),
+                lease_timeout=getattr(settings, "JUDGE_JS_POOL_LEASE_TIMEOUT", 1.0),
+                health_check_interval=getattr(settings, "JUDGE_JS_POOL_HEALTH_CHECK_INTERVAL", 30),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+
+
+def run_js_pooled(user_code, testcases, function_name, on_record=None, fail_fast=False, timeout=5, memory_limit=None, time_limit=None):
+    pool = get_pool()
+    if pool is None:
+        return run_js(user_code, testcases, function_name, on_record, fail_fast, timeout, memory_limit, time_limit)
+
+    started = clock()
+    collector = RecordCollector(
+        parse_json_value, on_record, fail_fast_expected(testcases, fail_fast), output_limit_bytes(),
+        case_limit=time_limit,
+    )
+    inputs = [tc.input for tc in testcases]
+    phases = {HARNESS: elapsed_ms(started)}
+    try:
+        with pool.lease() as worker:
+            reply = worker.run({
+                "code": user_code,
+                "testcases": inputs,
+                "function_name": function_name,
+                "heap_mb": memory_limit,
+                "output_limit": collector.output_limit,
+            }, collector, timeout)
+    except WorkerError:
+        if collector.outputs:
+            return ExecutionResult(error="Judge worker crashed", error_type="Internal Error")
+        # Pool saturated or worker died before running anything: fall back to a fresh node process.
+        return run_js(user_code, testcases, function_name, on_record, fail_fast, timeout, memory_limit, time_limit)
+
+    if reply.get("timeout"):
+        return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
+
+    collector.console = [reply.get("stdout", "")]
+    collector.output_exceeded = reply.get("output_exceeded", False)
+    collector.usage = Usage(cpu_time=reply.get("cpu_time", 0.0))
+    return collected_result(collector, reply.get("stderr"), phases)
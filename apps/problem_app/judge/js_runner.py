@@ -1,73 +1,56 @@
 import subprocess
-import tempfile
 import json
-import os
+from . import workspace
 from .execution_base import ExecutionResult
+from .streaming import RECORD_PREFIX, RESULT_FD_ENV, RecordCollector, collected_result, fail_fast_expected, parse_json_value, stream_process
+from .wire import json_input
+from .timing import HARNESS, clock, elapsed_ms
 
-def run_js(user_code, testcases, function_name):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".js") as f:
-        file_path = f.name
-        f.write(user_code.encode())
-        f.write(b"\n\n")
-        f.write(f"""
-const RESULT_DELIMITER = '---RESULT_JSON_START---';
-const testcases = {json.dumps([tc.input for tc in testcases])};
-const results = [];
-const runtimes = [];
+def _heap_flags(memory_limit):
+    # V8 reserves far more address space than it uses, so cap the heap instead of RLIMIT_AS.
+    return [f"--max-old-space-size={memory_limit}"] if memory_limit else []
+
+def run_js(user_code, testcases, function_name, on_record=None, fail_fast=False, timeout=5, memory_limit=None, time_limit=None):
+    started = clock()
+    source = user_code.encode() + b"\n\n" + f"""
+const RECORD_PREFIX = {json.dumps(RECORD_PREFIX)};
+const JUDGE_OUT = Number(process.env[{json.dumps(RESULT_FD_ENV)}]);
+const testcases = require("fs").readFileSync(0, "utf8").split("\\n").filter(Boolean).map(line => JSON.parse(line));
 
 testcases.forEach(args => {{
+    if (!Array.isArray(args)) args = [args];
     const start = performance.now();
+    let res;
     try {{
-        const res = {function_name}(...args);
-        results.push(res);
+        res = {function_name}(...args);
     }} catch (e) {{
-        results.push(e.message);
+        res = e.message;
     }}
     const end = performance.now();
-    runtimes.push(end - start);
+    require("fs").writeSync(JUDGE_OUT, RECORD_PREFIX + "REC\\t" + (end - start) + "\\t" + JSON.stringify(res === undefined ? null : res) + "\\n");
 }});
 
-process.stdout.write("\\n" + RESULT_DELIMITER + "\\n");
-process.stdout.write(JSON.stringify({{
-    results: results,
-    runtimes: runtimes,
-    peak_memory: process.memoryUsage().heapUsed / 1024 / 1024
-}}));
-""".encode())
+let meta = {{}};
+try {{
+    const hwm = /VmHWM:\\s+(\\d+)/.exec(require("fs").readFileSync("/proc/self/status", "utf8"));
+    if (hwm) meta.peak_memory = Number(hwm[1]) / 1024;
+}} catch (e) {{}}
+require("fs").writeSync(JUDGE_OUT, RECORD_PREFIX + "END\\t" + JSON.stringify(meta) + "\\n");
+""".encode()
 
     try:
-        process = subprocess.run(
-            ["node", file_path],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-
-        if process.stderr:
-            return ExecutionResult(error=process.stderr, error_type="Runtime Error")
-
-        full_stdout = process.stdout
-        if "---RESULT_JSON_START---" not in full_stdout:
-            return ExecutionResult(error="Judge failed to produce output", error_type="Internal Error")
-
-        parts = full_stdout.split("---RESULT_JSON_START---")
-        stdout = parts[0].strip()
-        
-        try:
-            data = json.loads(parts[1].strip())
-            return ExecutionResult(
-                outputs=data.get("results", []),
-                runtimes=data.get("runtimes", []),
-                memory=data.get("peak_memory", 0.0),
-                stdout=stdout
+        with workspace.script(source, ".js") as script:
+            stdin_data = json_input(testcases)
+            phases = {HARNESS: elapsed_ms(started)}
+            collector = RecordCollector(parse_json_value, on_record, fail_fast_expected(testcases, fail_fast), case_limit=time_limit)
+            # A memfd resolves to "/memfd:... (deleted)"; run it by its /dev/fd path.
+            stderr = stream_process(
+                ["node", "--preserve-symlinks-main", *_heap_flags(memory_limit), script.path], collector,
+                timeout=timeout, cwd=script.cwd, stdin_data=stdin_data, pass_fds=script.pass_fds
             )
-        except (json.JSONDecodeError, KeyError) as e:
-            return ExecutionResult(error=f"Failed to parse results: {str(e)}", error_type="Internal Error", stdout=stdout)
+            return collected_result(collector, stderr, phases)
 
     except subprocess.TimeoutExpired:
         return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
     except Exception as e:
         return ExecutionResult(error=str(e), error_type="Runtime Error")
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
@@ -0,0 +1,182 @@
+// Long-lived Node.js judge worker.
+// Started by js_pool, it reads length-prefixed JSON jobs from stdin (the
+// same framing as python_zygote.py) and runs each submission in a fresh
+// worker_threads Worker, so every job gets its own V8 isolate and globals,
+// a heap limit and a timeout, without paying for a new node process.
+// Each result record is forwarded to stdout as {"record": line} as soon as
+// it arrives, followed by a final {"done": true, ...} frame.
+//
+// This file is executed as a standalone script and must not require
+// anything from the project.
+
+"use strict";
+
+const fs = require("fs");
+const { Worker } = require("worker_threads");
+
+const HEADER_SIZE = 4;
+
+// Runs inside the Worker. Console output is posted back to the daemon so it
+// can be metered against the output limit.
+const HARNESS = `
+"use strict";
+const { parentPort, workerData } = require("worker_threads");
+const util = require("util");
+const v8 = require("v8");
+const vm = require("vm");
+globalThis.require = require;
+
+const emit = stream => (...args) => parentPort.postMessage({ [stream]: util.format(...args) + "\\n" });
+console.log = console.info = console.debug = emit("stdout");
+console.error = console.warn = console.trace = emit("stderr");
+process.stdout.write = chunk => { parentPort.postMessage({ stdout: String(chunk) }); return true; };
+process.stderr.write = chunk => { parentPort.postMessage({ stderr: String(chunk) }); return true; };
+
+parentPort.once("message", ({ code, testcases, functionName, prefix }) => {
+    let fn;
+    try {
+        // Same scoping as appending the harness to the user's file: an
+        // unknown function name fails per test case, not at load time.
+        fn = vm.runInThisContext(
+            "(function () {\\n" + code + "\\nreturn (...args) => " + functionName + "(...args);\\n})()",
+            { filename: "solution.js", lineOffset: -1 }
+        );
+    } catch (e) {
+        parentPort.postMessage({ stderr: String((e && e.stack) || e) });
+        parentPort.postMessage({ failed: true });
+        return;
+    }
+
+    for (let args of testcases) {
+        if (!Array.isArray(args)) args = [args];
+        const start = performance.now();
+        let res;
+        try {
+            res = fn(...args);
+        } catch (e) {
+            res = e.message;
+        }
+        const end = performance.now();
+        parentPort.postMessage({
+            record: prefix + "REC\\t" + (end - start) + "\\t" + JSON.stringify(res === undefined ? null : res),
+        });
+    }
+
+    const heap = v8.getHeapStatistics();
+    parentPort.postMessage({ record: prefix + "END\\t" + JSON.stringify({ peak_memory: heap.total_heap_size / 1048576 }) });
+    parentPort.postMessage({ finished: true });
+});
+`;
+
+function writeFrame(obj) {
+    const data = Buffer.from(JSON.stringify(obj));
+    const header = Buffer.alloc(HEADER_SIZE);
+    header.writeUInt32BE(data.length);
+    fs.writeSync(1, Buffer.concat([header, data]));
+}
+
+// One booted Worker kept ready for the next job with the same heap limit.
+let spare = null;
+
+function startWorker(heapMb) {
+    const options = { eval: true, stdout: true, stderr: true };
+    if (heapMb) options.resourceLimits = { maxOldGenerationSizeMb: heapMb };
+    return { heapMb, worker: new Worker(HARNESS, options) };
+}
+
+function takeWorker(heapMb) {
+    let entry = spare;
+    spare = null;
+    if (entry && entry.heapMb !== heapMb) {
+        entry.worker.terminate();
+        entry = null;
+    }
+    return (entry || startWorker(heapMb)).worker;
+}
+
+let current = null;
+
+function runJob(job) {
+    const heapMb = job.heap_mb || 0;
+    const worker = takeWorker(heapMb);
+    const cpuStart = process.cpuUsage();
+    const state = { worker, stdout: [], stderr: [], outputBytes: 0, done: false };
+    current = state;
+
+    const finish = (status) => {
+        if (state.done) return;
+        state.done = true;
+        current = null;
+        clearTimeout(timer);
+        worker.removeAllListeners();
+        worker.on("error", () => {});
+        worker.terminate();
+
+        const cpu = process.cpuUsage(cpuStart);
+        const reply = { done: true, cpu_time: (cpu.user + cpu.system) / 1000 };
+        if (status === "timeout") {
+            reply.timeout = true;
+        } else {
+            reply.stdout = state.stdout.join("");
+            if (status === "output") reply.output_exceeded = true;
+            else reply.stderr = state.stderr.join("");
+            if (status === "cancelled") reply.cancelled = true;
+        }
+        writeFrame(reply);
+        // Boot the next isolate while the judge is busy with this result.
+        setImmediate(() => { if (!spare) spare = startWorker(heapMb); });
+    };
+    state.finish = finish;
+
+    const timer = setTimeout(() => finish("timeout"), Math.max(1, job.timeout || 5) * 1000);
+
+    worker.on("message", (message) => {
+        if (message.record !== undefined) {
+            writeFrame({ record: message.record });
+        } else if (message.stdout !== undefined || message.stderr !== undefined) {
+            const text = message.stdout !== undefined ? message.stdout : message.stderr;
+            state.outputBytes += Buffer.byteLength(text);
+            if (job.output_limit && state.outputBytes > job.output_limit) {
+                finish("output");
+                return;
+            }
+            (message.stdout !== undefined ? state.stdout : state.stderr).push(text);
+        } else if (message.finished || message.failed) {
+            finish("ok");
+        }
+    });
+    // Uncaught errors, including hitting resourceLimits ("JS heap out of memory").
+    worker.on("error", (e) => state.stderr.push(String((e && e.stack) || e)));
+    worker.on("exit", () => finish("ok"));
+
+    worker.postMessage({
+        code: job.code,
+        testcases: job.testcases,
+        functionName: job.function_name,
+        prefix: job.record_prefix,
+    });
+}
+
+function handle(message) {
+    if (message.ping) {
+        writeFrame({ pong: true });
+    } else if (message.cancel) {
+        // Ignored if it arrives after the job it was meant for finished.
+        if (current) current.finish("cancelled");
+    } else {
+        runJob(message);
+    }
+}
+
+let pending = Buffer.alloc(0);
+process.stdin.on("data", (chunk) => {
+    pending = Buffer.concat([pending, chunk]);
+    while (pending.length >= HEADER_SIZE) {
+        const size = pending.readUInt32BE(0);
+        if (pending.length < HEADER_SIZE + size) break;
+        const body = pending.subarray(HEADER_SIZE, HEADER_SIZE + size);
+        pending = pending.subarray(HEADER_SIZE + size);
+        handle(JSON.parse(body.toString("utf8")));
+    }
+});
+process.stdin.on("end", () => process.exit(0));
@@ -0,0 +1,123 @@
+# Resource limits and accounting for harness processes.
+# Limits are applied with prlimit() right after spawn (preexec_fn is not
+# safe in a threaded web/worker process) and usage is collected from the
+# kernel with wait4(), so CPU time and peak RSS are reported the same way
+# for every language without instrumenting user code.
+
+import math
+import os
+import signal
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OOM_MARKERS = ("MemoryError", "std::bad_alloc", "OutOfMemoryError", "heap out of memory")
+
+
+@dataclass
+class Usage:
+    cpu_time: float = 0.0  # ms, user + system
+    max_rss: float = 0.0  # MB
+    signal: Optional[int] = None
+
+    @classmethod
+    def from_rusage(cls, status, rusage):
+        return cls(
+            cpu_time=(rusage.ru_utime + rusage.ru_stime) * 1000,
+            max_rss=rusage.ru_maxrss / 1024,
+            signal=os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+        )
+
+
+def address_space_bytes(memory_limit):
+    """RLIMIT_AS for a problem's memory limit (MB), with room for the runtime itself."""
+    if not memory_limit:
+        return None
+    overhead = getattr(settings, "JUDGE_MEMORY_OVERHEAD_MB", 64)
+    return (memory_limit + overhead) * 1024 * 1024
+
+
+def output_limit_bytes():
+    """Cap on the console output (stdout + stderr) of one run; 0 disables it."""
+    return getattr(settings, "JUDGE_OUTPUT_LIMIT_BYTES", 8 * 1024 * 1024)
+
+
+def apply_limits(pid, timeout, address_space=None):
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    cpu = max(1, math.ceil(timeout))
+    try:
+        resource.prlimit(pid, resource.RLIMIT_CPU, (cpu, cpu + 1))
+        if address_space:
+            resource.prlimit(pid, resource.RLIMIT_AS, (address_space, address_space))
+    except (ProcessLookupError, PermissionError, ValueError):
+        # Already exited, or limits lowered beyond what we may raise.
+        pass
+
+
+def kill(process):
+    """
+    SIGKILL without Popen.kill(), whose internal poll() could reap the
+    child before wait_with_usage() collects its rusage.
+    """
+    if not hasattr(os, "wait4"):
+        process.kill()
+        return
+    if process.returncode is None:
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def wait_with_usage(process, timeout):
+    """
+    Popen.wait() replacement that reaps with wait4() to capture rusage.
+    Kills the process and raises subprocess.TimeoutExpired on timeout.
+    """
+    if not hasattr(os, "wait4"):
+        process.wait(timeout=timeout)
+        return None
+
+    reaped = {}
+
+    def reap():
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+            reaped["status"], reaped["rusage"] = status, rusage
+        except ChildProcessError:
+            # Reaped elsewhere (e.g. a concurrent Popen.poll()); usage is lost.
+            pass
+
+    reaper = threading.Thread(target=reap, daemon=True)
+    reaper.start()
+    reaper.join(timeout)
+
+    timed_out = reaper.is_alive()
+    if timed_out:
+        kill(process)
+        reaper.join()
+
+    if "status" in reaped:
+        process.returncode = os.waitstatus_to_exitcode(reaped["status"])
+    if timed_out:
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    if "status" not in reaped:
+        return None
+    return Usage.from_rusage(reaped["status"], reaped["rusage"])
+
+
+def hit_cpu_limit(usage):
+    return usage is not None and usage.signal == getattr(signal, "SIGXCPU", None)
+
+
+def is_out_of_memory(message):
+    return bool(message) and any(marker in message for marker in OOM_MARKERS)
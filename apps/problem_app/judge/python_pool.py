@@ -0,0 +1,242 @@
+import atexit
+import json
+import os
+import queue
+import select
+import struct
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .execution_base import ExecutionResult
+from .limits import Usage, address_space_bytes, output_limit_bytes
+from .python_runner import run_python
+from .streaming import RECORD_PREFIX, RecordCollector, collected_result, fail_fast_expected, parse_json_value
+from .timing import HARNESS, clock, elapsed_ms
+
+ZYGOTE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_zygote.py")
+HEADER = struct.Struct(">I")
+
+
+class WorkerError(Exception):
+    pass
+
+
+def read_exact(fd, size, deadline):
+    buf = b""
+    while len(buf) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WorkerError("Worker did not respond in time")
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            continue
+        chunk = os.read(fd, size - len(buf))
+        if not chunk:
+            raise WorkerError("Worker closed the pipe")
+        buf += chunk
+    return buf
+
+
+class PythonWorker:
+    """
+    A pre-started zygote process that forks one child per job. Subclasses
+    swap in another `command` that speaks the same framing (js_worker.js).
+    """
+
+    command = ["python", "-u", ZYGOTE_PATH]
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.jobs = 0
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    def _send(self, payload):
+        data = json.dumps(payload).encode()
+        self.process.stdin.write(HEADER.pack(len(data)) + data)
+        self.process.stdin.flush()
+
+    def _receive(self, deadline):
+        fd = self.process.stdout.fileno()
+        (size,) = HEADER.unpack(read_exact(fd, HEADER.size, deadline))
+        return json.loads(read_exact(fd, size, deadline))
+
+    def ping(self, timeout=2):
+        if self.process.poll() is not None:
+            return False
+        try:
+            self._send({"ping": True})
+            return self._receive(time.monotonic() + timeout).get("pong", False)
+        except (OSError, ValueError, WorkerError):
+            self.broken = True
+            return False
+
+    def run(self, job, collector, timeout=5):
+        deadline = time.monotonic() + timeout + 2
+        collector.stop = lambda: self._send({"cancel": True})
+        try:
+            collector.spawned_at = clock()
+            self._send({**job, "timeout": timeout, "record_prefix": RECORD_PREFIX})
+            collector.start_watch()
+            while True:
+                frame = self._receive(deadline)
+                if frame.get("done"):
+                    collector.exited_at = clock()
+                    break
+                collector.feed_line(frame["record"])
+        except (OSError, ValueError, WorkerError) as e:
+            self.broken = True
+            raise WorkerError(str(e))
+        finally:
+            # The worker goes back to the pool; its cancel hook must not fire for a later job.
+            collector.stop_watch()
+
+        self.jobs += 1
+        self.last_used = time.monotonic()
+        return frame
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class WorkerPool:
+    """
+    Fixed-size set of long-lived workers leased one job at a time. A worker
+    is anything `worker_factory` returns with the PythonWorker interface:
+    `process`, `jobs`, `broken`, `last_used`, `ping()` and `close()`.
+    """
+
+    def __init__(self, worker_factory, size, max_jobs, lease_timeout, health_check_interval):
+        self.worker_factory = worker_factory
+        self.size = size
+        self.max_jobs = max_jobs
+        self.lease_timeout = lease_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = self.worker_factory()
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _retire(self, worker):
+        worker.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        self._add_worker()
+
+    def _checkout(self):
+        try:
+            worker = self._idle.get(timeout=self.lease_timeout)
+        except queue.Empty:
+            raise WorkerError("No idle judge worker available")
+
+        idle_for = time.monotonic() - worker.last_used
+        if worker.process.poll() is not None or (
+            idle_for > self.health_check_interval and not worker.ping()
+        ):
+            self._retire(worker)
+            raise WorkerError("Judge worker failed health check")
+        return worker
+
+    @contextmanager
+    def lease(self):
+        worker = self._checkout()
+        try:
+            yield worker
+        finally:
+            if worker.broken or worker.jobs >= self.max_jobs:
+                self._retire(worker)
+            else:
+                self._idle.put(worker)
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+
+    size = getattr(settings, "JUDGE_PYTHON_POOL_SIZE", 0)
+    if size <= 0 or os.name == "nt":
+        return None
+
+    with _pool_lock:
+        # Workers belong to the process that started them; rebuild after fork.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = WorkerPool(
+                PythonWorker,
+                size=size,
+                max_jobs=getattr(settings, "JUDGE_PYTHON_POOL_MAX_JOBS", 200),
+                lease_timeout=getattr(settings, "JUDGE_PYTHON_POOL_LEASE_TIMEOUT", 1.0),
+                health_check_interval=getattr(settings, "JUDGE_PYTHON_POOL_HEALTH_CHECK_INTERVAL", 30),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+
+
+def run_python_pooled(user_code, testcases, function_name, on_record=None, fail_fast=False, timeout=5, memory_limit=None, time_limit=None):
+    pool = get_pool()
+    if pool is None:
+        return run_python(user_code, testcases, function_name, on_record, fail_fast, timeout, memory_limit, time_limit)
+
+    started = clock()
+    collector = RecordCollector(
+        parse_json_value, on_record, fail_fast_expected(testcases, fail_fast), output_limit_bytes(),
+        case_limit=time_limit,
+    )
+    inputs = [tc.input for tc in testcases]
+    phases = {HARNESS: elapsed_ms(started)}
+    try:
+        with pool.lease() as worker:
+            reply = worker.run({
+                "code": user_code,
+                "testcases": inputs,
+                "function_name": function_name,
+                "address_space": address_space_bytes(memory_limit),
+                "output_limit": collector.output_limit,
+            }, collector, timeout)
+    except WorkerError:
+        if collector.outputs:
+            return ExecutionResult(error="Judge worker crashed", error_type="Internal Error")
+        # Pool saturated or worker died before running anything: fall back to a cold interpreter.
+        return run_python(user_code, testcases, function_name, on_record, fail_fast, timeout, memory_limit, time_limit)
+
+    if reply.get("timeout"):
+        return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
+
+    collector.console = [reply.get("stdout", "")]
+    collector.output_exceeded = reply.get("output_exceeded", False)
+    collector.usage = Usage(cpu_time=reply.get("cpu_time", 0.0), max_rss=reply.get("max_rss", 0.0))
+    return collected_result(collector, reply.get("stderr"), phases)
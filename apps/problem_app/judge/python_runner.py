@@ -1,89 +1,63 @@
 import subprocess
-import tempfile
-import json
-import os
+from . import workspace
 from .execution_base import ExecutionResult
-
-def run_python(user_code, testcases, function_name):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".py") as f:
-        file_path = f.name
-        f.write(user_code.encode())
-        f.write(b"\n\n")
-        f.write(b"""
+from .streaming import RECORD_PREFIX, RESULT_FD_ENV, RecordCollector, collected_result, fail_fast_expected, parse_json_value, stream_process
+from .limits import address_space_bytes
+from .wire import json_input
+from .timing import HARNESS, clock, elapsed_ms
+
+def run_python(user_code, testcases, function_name, on_record=None, fail_fast=False, timeout=5, memory_limit=None, time_limit=None):
+    started = clock()
+    source = user_code.encode() + b"\n\n" + f"""
 import json
+import os
+import sys
 import time
-import tracemalloc
-
-tracemalloc.start()
 
-RESULT_DELIMITER = '---RESULT_JSON_START---'
-results = []
-runtimes = []
+RECORD_PREFIX = {RECORD_PREFIX!r}
+_judge_out = os.fdopen(int(os.environ[{RESULT_FD_ENV!r}]), "w", buffering=1)
 
-testcases = []
-""")
-        for tc in testcases:
-            f.write(f"testcases.append({tc.input})\n".encode())
-
-        f.write(f"""
-for args in testcases:
+for line in sys.stdin:
+    args = json.loads(line)
     start = time.perf_counter()
     try:
         if isinstance(args, list):
             res = {function_name}(*args)
         else:
             res = {function_name}(args)
+    except MemoryError:
+        raise
     except Exception as e:
         res = str(e)
     end = time.perf_counter()
 
-    results.append(res)
-    runtimes.append((end - start) * 1000)
-
-current, peak = tracemalloc.get_traced_memory()
-tracemalloc.stop()
-
-print(RESULT_DELIMITER)
-print(json.dumps({{
-    "results": results,
-    "runtimes": runtimes,
-    "peak_memory": peak / 1024 / 1024
-}}))
-""".encode())
+    print(RECORD_PREFIX + "REC\\t" + str((end - start) * 1000) + "\\t" + json.dumps(res), file=_judge_out)
 
+def _peak_rss():
     try:
-        process = subprocess.run(
-            ["python", file_path],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return {{"peak_memory": int(line.split()[1]) / 1024}}
+    except OSError:
+        pass
+    return {{}}
 
-        if process.stderr:
-            return ExecutionResult(error=process.stderr, error_type="Runtime Error")
+print(RECORD_PREFIX + "END\\t" + json.dumps(_peak_rss()), file=_judge_out)
+""".encode()
 
-        full_stdout = process.stdout
-        if "---RESULT_JSON_START---" not in full_stdout:
-            return ExecutionResult(error="Judge failed to produce output", error_type="Internal Error")
-
-        parts = full_stdout.split("---RESULT_JSON_START---")
-        stdout = parts[0].strip()
-        
-        try:
-            data = json.loads(parts[1].strip())
-            return ExecutionResult(
-                outputs=data.get("results", []),
-                runtimes=data.get("runtimes", []),
-                memory=data.get("peak_memory", 0.0),
-                stdout=stdout
+    try:
+        with workspace.script(source, ".py") as script:
+            stdin_data = json_input(testcases)
+            phases = {HARNESS: elapsed_ms(started)}
+            collector = RecordCollector(parse_json_value, on_record, fail_fast_expected(testcases, fail_fast), case_limit=time_limit)
+            stderr = stream_process(
+                ["python", script.path], collector, timeout=timeout, cwd=script.cwd, stdin_data=stdin_data,
+                address_space=address_space_bytes(memory_limit), pass_fds=script.pass_fds
             )
-        except (json.JSONDecodeError, KeyError) as e:
-            return ExecutionResult(error=f"Failed to parse results: {str(e)}", error_type="Internal Error", stdout=stdout)
+            return collected_result(collector, stderr, phases)
 
     except subprocess.TimeoutExpired:
         return ExecutionResult(error="Execution timed out", error_type="Timeout Error")
     except Exception as e:
         return ExecutionResult(error=str(e), error_type="Runtime Error")
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
@@ -0,0 +1,207 @@
+# Long-lived Python judge worker (zygote).
+# Started by python_pool with the heavy imports already done, it reads
+# length-prefixed JSON jobs from stdin, forks a fresh child per job and
+# forwards each result record back to stdout using the same framing,
+# followed by a final {"done": true} frame.
+#
+# This file is executed as a standalone script and must not import
+# anything from the project.
+
+import json
+import os
+import resource
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+
+# Don't let user code import sibling judge modules.
+if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+    sys.path.pop(0)
+
+HEADER = struct.Struct(">I")
+
+
+def _read_exact(fd, size):
+    buf = b""
+    while len(buf) < size:
+        chunk = os.read(fd, size - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+def read_frame(fd):
+    # Unbuffered reads: a buffered stream could hold a cancel frame that
+    # select() on the descriptor would then never report.
+    header = _read_exact(fd, HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    (size,) = HEADER.unpack(header)
+    return json.loads(_read_exact(fd, size))
+
+
+def write_frame(stream, obj):
+    data = json.dumps(obj).encode()
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _run_child(job, out_w, err_w, res_w):
+    os.setsid()
+    os.dup2(out_w, 1)
+    os.dup2(err_w, 2)
+    sys.stdout = os.fdopen(1, "w", buffering=1)
+    sys.stderr = os.fdopen(2, "w", buffering=1)
+    records = os.fdopen(res_w, "w", buffering=1)
+
+    cpu_limit = max(1, int(job.get("timeout", 5)) + 1)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    if job.get("address_space"):
+        resource.setrlimit(resource.RLIMIT_AS, (job["address_space"], job["address_space"]))
+
+    prefix = job["record_prefix"]
+    try:
+        namespace = {"__name__": "__main__"}
+        exec(compile(job["code"], "<solution>", "exec"), namespace)
+        fn = namespace[job["function_name"]]
+
+        for args in job["testcases"]:
+            start = time.perf_counter()
+            try:
+                if isinstance(args, list):
+                    res = fn(*args)
+                else:
+                    res = fn(args)
+            except MemoryError:
+                raise
+            except Exception as e:
+                res = str(e)
+            end = time.perf_counter()
+
+            sys.stdout.flush()
+            records.write(prefix + "REC\t" + str((end - start) * 1000) + "\t" + json.dumps(res) + "\n")
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        os._exit(1)
+
+    sys.stdout.flush()
+
+    records.write(prefix + "END\t{}\n")
+    records.close()
+    os._exit(0)
+
+
+def _collect(pid, out_r, err_r, res_r, timeout, output_limit, on_record, control):
+    chunks = {out_r: [], err_r: []}
+    output_bytes = 0
+    pending = b""
+    open_fds = {out_r, err_r, res_r}
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    cancelled = False
+    output_exceeded = False
+
+    while open_fds and not cancelled and not output_exceeded:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready, _, _ = select.select(list(open_fds) + [control], [], [], remaining)
+        for fd in ready:
+            if fd == control:
+                # The pool asks us to stop early (fail-fast mismatch).
+                message = read_frame(control)
+                cancelled = message is None or message.get("cancel", False)
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                open_fds.discard(fd)
+            elif fd == res_r:
+                # Forward each complete record as soon as it arrives.
+                pending += data
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    on_record(line.decode(errors="replace"))
+            else:
+                output_bytes += len(data)
+                if output_limit and output_bytes > output_limit:
+                    output_exceeded = True
+                    break
+                chunks[fd].append(data)
+
+    if timed_out or cancelled or output_exceeded:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # Stopped before the child's setsid(): its group doesn't exist yet.
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    _, status, rusage = os.wait4(pid, 0)
+
+    for fd in (out_r, err_r, res_r):
+        os.close(fd)
+    stdout, stderr = (b"".join(chunks[fd]).decode(errors="replace") for fd in (out_r, err_r))
+    return stdout, stderr, status, rusage, timed_out, cancelled, output_exceeded
+
+
+def handle(job, on_record):
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    res_r, res_w = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        for fd in (out_r, err_r, res_r, 0):
+            os.close(fd)
+        try:
+            _run_child(job, out_w, err_w, res_w)
+        finally:
+            os._exit(1)
+
+    for fd in (out_w, err_w, res_w):
+        os.close(fd)
+
+    stdout, stderr, status, rusage, timed_out, cancelled, output_exceeded = _collect(
+        pid, out_r, err_r, res_r, job.get("timeout", 5), job.get("output_limit"), on_record, sys.stdin.fileno()
+    )
+    usage = {
+        "cpu_time": (rusage.ru_utime + rusage.ru_stime) * 1000,
+        "max_rss": rusage.ru_maxrss / 1024,
+    }
+    if cancelled:
+        return {"done": True, "cancelled": True, "stdout": stdout, "stderr": stderr, **usage}
+    if timed_out:
+        return {"done": True, "timeout": True}
+    if output_exceeded:
+        return {"done": True, "output_exceeded": True, "stdout": stdout, **usage}
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU:
+        return {"done": True, "timeout": True}
+    return {"done": True, "stdout": stdout, "stderr": stderr, **usage}
+
+
+def main():
+    stdin = sys.stdin.fileno()
+    stdout = sys.stdout.buffer
+    while True:
+        job = read_frame(stdin)
+        if job is None:
+            break
+        if job.get("ping"):
+            write_frame(stdout, {"pong": True})
+            continue
+        if job.get("cancel"):
+            # Arrived after the job it was meant for had already finished.
+            continue
+        reply = handle(job, lambda line: write_frame(stdout, {"record": line}))
+        write_frame(stdout, reply)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# Incremental result protocol shared by every harness.
+# Harnesses write one framed record per line, as soon as it is available,
+# to the descriptor named by $JUDGE_RESULT_FD:
+#   @@JUDGE@@REC<TAB><runtime ms><TAB><value>   one per finished test case
+#   @@JUDGE@@ERR<TAB><message>                  harness-level failure
+#   @@JUDGE@@END<TAB><json meta>                all test cases finished
+# stdout and stderr carry only the user's own console output.
+
+import json
+import os
+import subprocess
+import threading
+from .comparison import case_matches
+from .execution_base import MEMORY_LIMIT_EXCEEDED, OUTPUT_LIMIT_EXCEEDED, TIME_LIMIT_EXCEEDED, ExecutionResult
+from .limits import apply_limits, hit_cpu_limit, is_out_of_memory, kill, output_limit_bytes, wait_with_usage
+from .timing import PARSE, clock, elapsed_ms, process_phases
+
+RECORD_PREFIX = "@@JUDGE@@"
+RESULT_FD_ENV = "JUDGE_RESULT_FD"
+READ_CHUNK = 65536
+# Wall-clock slack on top of a case's time limit before the watchdog gives up
+# on it (record framing, argument parsing, scheduling noise), plus start-up
+# allowance (interpreter/JVM boot) before the first case.
+CASE_GRACE = 0.5
+STARTUP_GRACE = 1
+WATCH_INTERVAL = 0.05
+
+
+def parse_json_value(raw):
+    return json.loads(raw)
+
+
+def parse_plain_value(raw):
+    val = raw.strip()
+    if val.startswith("[") and val.endswith("]"):
+        try: val = json.loads(val)
+        except: pass
+    elif val == "true": val = True
+    elif val == "false": val = False
+    elif val == "null": val = None
+    return val
+
+
+class RecordCollector:
+    """
+    Parses harness output line by line. When `expected` test cases are given
+    the collector runs in fail-fast mode: the first mismatching record is
+    remembered in `failed_index` and `stop` is called to end the run.
+    Console output is metered with count_output(); `stop` is also called
+    once it goes over `output_limit` bytes.
+    Whoever drives the process stamps `spawned_at` / `exited_at` so the
+    run can be split into timing phases.
+    With a `case_limit` (seconds), a case reporting a longer runtime, or one
+    still running after its limit between start_watch() and stop_watch(),
+    is recorded in `timed_out_index` and `stop` ends the run.
+    """
+
+    def __init__(self, parse_value, on_record=None, expected=None, output_limit=0, case_limit=None):
+        self.parse_value = parse_value
+        self.on_record = on_record
+        self.expected = expected
+        self.outputs = []
+        self.runtimes = []
+        self.console = []
+        self.output_limit = output_limit
+        self.output_bytes = 0
+        self.output_exceeded = False
+        self._output_lock = threading.Lock()
+        self.meta = None
+        self.error = None
+        self.failed_index = None
+        self.case_limit = case_limit
+        self.timed_out_index = None
+        self._watch_done = None
+        self.usage = None
+        self.stop = None
+        self.spawned_at = None
+        self.first_record_at = None
+        self.exited_at = None
+        self.parse_time = 0.0
+
+    @property
+    def finished(self):
+        return self.meta is not None
+
+    @property
+    def stdout(self):
+        return "".join(self.console).strip()
+
+    def count_output(self, size):
+        """Meter console bytes; False once the run is over its output limit."""
+        with self._output_lock:
+            self.output_bytes += size
+            if not self.output_limit or self.output_bytes <= self.output_limit:
+                return True
+            first = not self.output_exceeded
+            self.output_exceeded = True
+        if first and self.stop:
+            self.stop()
+        return False
+
+    def feed_line(self, line):
+        line = line.rstrip("\n")
+        if not line.startswith(RECORD_PREFIX):
+            self.console.append(line + "\n")
+            return
+
+        kind, _, body = line[len(RECORD_PREFIX):].partition("\t")
+        if self.failed_index is not None or self.timed_out_index is not None:
+            return
+        if kind == "REC":
+            if self.first_record_at is None:
+                self.first_record_at = clock()
+            started = clock()
+            runtime, _, raw = body.partition("\t")
+            try: runtime = float(runtime)
+            except ValueError: runtime = 0.0
+            try: value = self.parse_value(raw)
+            except ValueError: value = raw
+            self.parse_time += elapsed_ms(started)
+
+            index = len(self.outputs)
+            if self.case_limit and runtime > self.case_limit * 1000:
+                self._time_out(index)
+                return
+            self.outputs.append(value)
+            self.runtimes.append(runtime)
+            if self.on_record:
+                self.on_record(index, value, runtime)
+
+            if self.expected is not None and index < len(self.expected):
+                if not case_matches(self.expected[index], value):
+                    self.failed_index = index
+                    if self.stop:
+                        self.stop()
+        elif kind == "ERR":
+            self.error = body
+        elif kind == "END":
+            try: self.meta = json.loads(body) if body else {}
+            except json.JSONDecodeError: self.meta = {}
+
+    def _time_out(self, index):
+        self.timed_out_index = index
+        if self.stop:
+            self.stop()
+
+    def start_watch(self):
+        """Start timing cases against case_limit; every start_watch() needs a stop_watch()."""
+        if not self.case_limit:
+            return
+        self._watch_done = threading.Event()
+        threading.Thread(target=self._watch, args=(self._watch_done,), daemon=True).start()
+
+    def stop_watch(self):
+        if self._watch_done is not None:
+            self._watch_done.set()
+            self._watch_done = None
+
+    def _watch(self, done):
+        seen = 0
+        deadline = clock() + STARTUP_GRACE + self.case_limit + CASE_GRACE
+        while not done.wait(WATCH_INTERVAL):
+            if self.finished or self.failed_index is not None or self.timed_out_index is not None:
+                return
+            if len(self.outputs) != seen:
+                seen = len(self.outputs)
+                deadline = clock() + self.case_limit + CASE_GRACE
+            elif clock() > deadline:
+                self._time_out(seen)
+                return
+
+    def phases(self):
+        phases = process_phases(
+            self.spawned_at, self.first_record_at, self.exited_at,
+            self.runtimes[0] if self.runtimes else 0.0
+        )
+        phases[PARSE] = self.parse_time
+        return phases
+
+
+def fail_fast_expected(testcases, fail_fast):
+    return list(testcases) if fail_fast else None
+
+
+def _error_type(message):
+    return MEMORY_LIMIT_EXCEEDED if is_out_of_memory(message) else "Runtime Error"
+
+
+def collected_result(collector, stderr, phases=None):
+    """Build the run's result; `phases` holds timings taken before the process ran."""
+    result = _result(collector, stderr)
+    result.phases = {**(phases or {}), **collector.phases()}
+    return result
+
+
+def _result(collector, stderr):
+    usage = collector.usage
+    cpu_time = usage.cpu_time if usage else 0.0
+    memory = usage.max_rss if usage else 0.0
+    # Exec'd harnesses report their own high-water mark: the kernel's
+    # ru_maxrss for them also covers the judge process they were forked from.
+    if collector.meta and "peak_memory" in collector.meta:
+        memory = collector.meta["peak_memory"]
+
+    if collector.output_exceeded:
+        return ExecutionResult(
+            error=f"Console output exceeded {collector.output_limit} bytes",
+            error_type=OUTPUT_LIMIT_EXCEEDED,
+            outputs=collector.outputs,
+            runtimes=collector.runtimes,
+            cpu_time=cpu_time,
+            memory=memory,
+            stdout=collector.stdout,
+        )
+    if collector.timed_out_index is not None:
+        index = collector.timed_out_index
+        return ExecutionResult(
+            error=f"Test case {index + 1} exceeded the {collector.case_limit}s time limit",
+            error_type=TIME_LIMIT_EXCEEDED,
+            outputs=collector.outputs[:index],
+            runtimes=collector.runtimes[:index],
+            cpu_time=cpu_time,
+            memory=memory,
+            stdout=collector.stdout,
+            failed_index=index,
+        )
+    if stderr:
+        return ExecutionResult(error=stderr, error_type=_error_type(stderr), cpu_time=cpu_time, memory=memory)
+    if collector.error:
+        return ExecutionResult(error=collector.error, error_type=_error_type(collector.error), cpu_time=cpu_time, memory=memory)
+    if collector.failed_index is not None:
+        return ExecutionResult(
+            outputs=collector.outputs,
+            runtimes=collector.runtimes,
+            memory=memory,
+            cpu_time=cpu_time,
+            stdout=collector.stdout,
+            failed_index=collector.failed_index
+        )
+    if not collector.finished:
+        return ExecutionResult(error="Judge failed to produce output", error_type="Internal Error", stdout=collector.stdout)
+
+    return ExecutionResult(
+        outputs=collector.outputs,
+        runtimes=collector.runtimes,
+        memory=memory,
+        cpu_time=cpu_time,
+        stdout=collector.stdout
+    )
+
+
+def stream_process(cmd, collector, timeout, cwd=None, stdin_data=None, address_space=None, pass_fds=()):
+    """
+    Run cmd and feed the records it writes to $JUDGE_RESULT_FD to collector
+    line by line while it runs. stdout/stderr are read in bounded chunks and
+    metered against the output limit; the process is killed once it is hit.
+    `stdin_data` bytes are written to the process's stdin from a separate
+    thread so large inputs never deadlock against a full pipe. `pass_fds`
+    are extra descriptors the process inherits (e.g. a memfd script).
+    CPU time (and `address_space` bytes, if given) are capped with rlimits;
+    kernel-reported usage is stored on `collector.usage`.
+    Returns the captured stderr; raises subprocess.TimeoutExpired on timeout
+    or when the CPU limit is hit.
+    """
+    collector.output_limit = output_limit_bytes()
+    result_r, result_w = os.pipe()
+    collector.spawned_at = clock()
+    try:
+        process = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdin=subprocess.PIPE if stdin_data is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(result_w, *pass_fds),
+            env={**os.environ, RESULT_FD_ENV: str(result_w)},
+        )
+    except BaseException:
+        os.close(result_r)
+        raise
+    finally:
+        os.close(result_w)
+    apply_limits(process.pid, timeout, address_space)
+    stdout_chunks = []
+    stderr_chunks = []
+
+    def read_records():
+        with open(result_r, "r", encoding="utf-8", errors="replace") as results:
+            for line in results:
+                collector.feed_line(line)
+
+    def read_console(stream, chunks):
+        while True:
+            chunk = stream.read1(READ_CHUNK)
+            if not chunk:
+                break
+            # Past the limit the process is being killed; just drain the pipe.
+            if collector.count_output(len(chunk)):
+                chunks.append(chunk)
+
+    def write_stdin():
+        try:
+            process.stdin.write(stdin_data)
+            process.stdin.close()
+        except (BrokenPipeError, OSError, ValueError):
+            # The harness exited (or was stopped) before reading all of its input.
+            pass
+
+    collector.stop = lambda: kill(process)
+
+    readers = [
+        threading.Thread(target=read_records, daemon=True),
+        threading.Thread(target=read_console, args=(process.stdout, stdout_chunks), daemon=True),
+        threading.Thread(target=read_console, args=(process.stderr, stderr_chunks), daemon=True),
+    ]
+    if stdin_data is not None:
+        readers.append(threading.Thread(target=write_stdin, daemon=True))
+    for reader in readers:
+        reader.start()
+
+    collector.start_watch()
+    try:
+        collector.usage = wait_with_usage(process, timeout)
+        collector.exited_at = clock()
+    except subprocess.TimeoutExpired:
+        # Don't hang on pipes still held open by stray grandchildren.
+        for reader in readers:
+            reader.join(timeout=1)
+        raise
+    finally:
+        collector.stop_watch()
+
+    for reader in readers:
+        reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    collector.console.append(_decode(stdout_chunks))
+
+    if hit_cpu_limit(collector.usage):
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return _decode(stderr_chunks)
+
+
+def _decode(chunks):
+    return b"".join(chunks).decode("utf-8", errors="replace")
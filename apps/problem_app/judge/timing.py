@@ -0,0 +1,68 @@
+# Wall-clock breakdown of a judge run, in milliseconds per phase.
+
+import time
+from contextlib import contextmanager
+
+QUEUE_WAIT = "queue_wait"    # enqueued until a worker picked the job up
+FETCH = "fetch"              # loading the problem's test cases
+HARNESS = "harness"          # generating harness source and encoding inputs
+COMPILE = "compile"          # compile-cache lookup plus the compiler, if it ran
+START = "start"              # spawn until the harness is ready to run the first test
+EXECUTE = "execute"          # running the tests until the process exits
+PARSE = "parse"              # decoding records on the judge side
+COMPARE = "compare"          # checking outputs against expected values
+DB_WRITE = "db_write"        # saving the submission and problem counters
+PERCENTILES = "percentiles"  # ranking the submission against accepted ones
+
+PHASES = (QUEUE_WAIT, FETCH, HARNESS, COMPILE, START, EXECUTE, PARSE, COMPARE, DB_WRITE, PERCENTILES)
+
+
+def clock():
+    return time.perf_counter()
+
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+@contextmanager
+def span(phases, name):
+    """Add the time spent in the block to phases[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + elapsed_ms(start)
+
+
+def process_phases(spawned_at, first_record_at, exited_at, first_runtime):
+    """
+    Split a process's lifetime into start-up and execution. Start-up ends
+    where the first test began, i.e. when its record arrived minus the
+    runtime the harness measured for it.
+    """
+    if spawned_at is None or exited_at is None:
+        return {}
+    total = (exited_at - spawned_at) * 1000
+    if first_record_at is None:
+        start = total
+    else:
+        start = min(total, max(0.0, (first_record_at - spawned_at) * 1000 - first_runtime))
+    return {START: start, EXECUTE: total - start}
+
+
+def ordered(phases):
+    """Phases in pipeline order, rounded for storage."""
+    return {name: round(phases[name], 3) for name in PHASES if name in phases}
+
+
+def merge_shards(results):
+    """
+    Shards run side by side, so a phase costs the run as much as its
+    slowest shard.
+    """
+    merged = {}
+    for phases in results:
+        for name, value in phases.items():
+            merged[name] = max(merged.get(name, 0.0), value)
+    return merged
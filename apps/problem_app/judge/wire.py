@@ -0,0 +1,144 @@
+# Test case wire formats fed to harnesses on stdin.
+#
+# Python/JavaScript read one JSON array of arguments per line.
+#
+# C++/Java read a typed token stream derived from Problem.parameters:
+#   <test count> then, for every test case, each argument in order:
+#     int/long/double  -> the number
+#     bool             -> 1 or 0
+#     string           -> <byte length> <raw utf-8 bytes>
+#     array            -> <length> followed by each element
+# Tokens are separated by a single space, so generated harnesses only
+# depend on the function signature, never on the test data.
+
+import json
+import re
+
+SCALAR_TYPES = {
+    "int": "int",
+    "integer": "int",
+    "long": "long",
+    "float": "double",
+    "double": "double",
+    "number": "double",
+    "bool": "bool",
+    "boolean": "bool",
+    "str": "string",
+    "string": "string",
+}
+
+_CONTAINER = re.compile(r"^(list|vector|array)[\[<](.*)[\]>]$")
+
+
+def parse_type(type_str):
+    """Map a parameter type like "int[]" or "List[str]" to (base, depth), or None."""
+    t = (type_str or "").lower().replace(" ", "").replace("std::", "")
+    depth = t.count("[]")
+    t = t.replace("[]", "")
+
+    while True:
+        m = _CONTAINER.match(t)
+        if not m:
+            break
+        depth += 1
+        t = m.group(2)
+
+    if t in ("list", "array"):
+        # Untyped lists are treated as int lists, like the literal harnesses do.
+        return "int", depth + 1
+
+    base = SCALAR_TYPES.get(t)
+    if base is None:
+        return None
+    return base, depth
+
+
+def signature(parameters):
+    """Typed signature for a problem's parameters, or None if any type is unsupported."""
+    types = []
+    for param in parameters or []:
+        parsed = parse_type(param.get("type", ""))
+        if parsed is None:
+            return None
+        types.append(parsed)
+    return types
+
+
+def encode_json_lines(testcases):
+    return "".join(json.dumps(tc.input) + "\n" for tc in testcases).encode()
+
+
+def _encode_value(val, base, depth, out):
+    if depth:
+        if not isinstance(val, list):
+            raise ValueError(f"Expected a list, got {val!r}")
+        out.append(str(len(val)).encode())
+        for item in val:
+            _encode_value(item, base, depth - 1, out)
+        return
+
+    if base == "string":
+        data = str(val).encode()
+        out.append(str(len(data)).encode() + b" " + data)
+    elif base == "bool":
+        if isinstance(val, str):
+            val = val.strip().lower() == "true"
+        out.append(b"1" if val else b"0")
+    elif base == "double":
+        out.append(repr(float(val)).encode())
+    else:
+        out.append(str(int(val)).encode())
+
+
+def encode_typed(testcases, types):
+    """Encode test case inputs for a typed harness; raises ValueError on mismatched data."""
+    out = [str(len(testcases)).encode()]
+    for tc in testcases:
+        args = tc.input if isinstance(tc.input, list) else [tc.input]
+        if len(args) != len(types):
+            raise ValueError(f"Expected {len(types)} arguments, got {len(args)}")
+        for val, (base, depth) in zip(args, types):
+            try:
+                _encode_value(val, base, depth, out)
+            except TypeError as e:
+                raise ValueError(str(e))
+    return b" ".join(out) + b"\n"
+
+
+class PreparedCases(list):
+    """
+    Test cases with their wire encodings computed up front, so a cached
+    judge bundle can be run repeatedly without re-encoding its inputs.
+    Slices are plain lists and are encoded on demand.
+    """
+
+    def __init__(self, testcases, parameters=None):
+        super().__init__(testcases)
+        self.json_lines = encode_json_lines(self)
+        self.types = signature(parameters) if parameters else None
+        self.typed = None
+        if self.types is not None:
+            try:
+                self.typed = encode_typed(self, self.types)
+            except ValueError:
+                self.types = None
+
+
+def json_input(testcases):
+    if isinstance(testcases, PreparedCases):
+        return testcases.json_lines
+    return encode_json_lines(testcases)
+
+
+def typed_input(testcases, parameters):
+    """(signature, encoded input) for a typed harness, or (None, None) to fall back to literals."""
+    if isinstance(testcases, PreparedCases) and testcases.types is not None:
+        return testcases.types, testcases.typed
+
+    types = signature(parameters) if parameters else None
+    if types is None:
+        return None, None
+    try:
+        return types, encode_typed(testcases, types)
+    except ValueError:
+        return None, None
@@ -0,0 +1,147 @@
+# Scratch space for judge runs.
+# Each concurrent run leases a sandbox directory under the workspace root
+# (a RAM-backed /dev/shm by default) that is emptied and handed to the next
+# run instead of being created and destroyed per request. Interpreted
+# languages don't even need a file: the harness is written to a memfd and the
+# interpreter reads it as /dev/fd/N.
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SHM_DIR = "/dev/shm"
+
+
+@dataclass
+class Script:
+    path: str  # what to pass to the interpreter
+    cwd: str
+    pass_fds: tuple = ()
+
+
+def _usable(path):
+    # Compiled binaries run from the sandbox, so a noexec tmpfs is no good.
+    if not (os.path.isdir(path) and os.access(path, os.W_OK | os.X_OK)):
+        return False
+    return not os.statvfs(path).f_flag & getattr(os, "ST_NOEXEC", 0)
+
+
+def default_root():
+    base = SHM_DIR if _usable(SHM_DIR) else tempfile.gettempdir()
+    return os.path.join(base, "codearc-judge")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def reset(path):
+    """Remove everything inside path, keeping the directory itself."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+
+class Workspace:
+    """
+    Reusable sandbox directories for one process, named "<pid>-<n>" so
+    processes sharing a root never collide. Directories left behind by
+    processes that have exited are removed when a workspace is created.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pid = os.getpid()
+        self._free = []
+        self._created = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._sweep()
+
+    def _sweep(self):
+        for name in os.listdir(self.root):
+            pid = name.partition("-")[0]
+            if pid.isdigit() and (int(pid) == self.pid or not _alive(int(pid))):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    @contextmanager
+    def sandbox(self):
+        with self._lock:
+            if self._free:
+                path = self._free.pop()
+            else:
+                path = os.path.join(self.root, f"{self.pid}-{self._created}")
+                self._created += 1
+                os.makedirs(path, exist_ok=True)
+        try:
+            yield path
+        finally:
+            try:
+                reset(path)
+            except OSError as e:
+                # E.g. the job changed permissions; don't hand the directory out again.
+                logger.error(f"Failed to reset judge sandbox {path}: {str(e)}")
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                with self._lock:
+                    self._free.append(path)
+
+
+_workspace = None
+_workspace_lock = threading.Lock()
+
+
+def get_workspace():
+    global _workspace
+
+    root = getattr(settings, "JUDGE_WORKSPACE_DIR", None) or default_root()
+    with _workspace_lock:
+        # Sandboxes belong to the process that created them; start afresh after fork.
+        if _workspace is None or _workspace.root != root or _workspace.pid != os.getpid():
+            _workspace = Workspace(root)
+        return _workspace
+
+
+def _use_memfd():
+    return getattr(settings, "JUDGE_WORKSPACE_MEMFD", True) and hasattr(os, "memfd_create")
+
+
+@contextmanager
+def script(source, suffix):
+    """
+    Lease a sandbox and put `source` where an interpreter can run it from:
+    an in-memory file passed to the child as /dev/fd/N when memfd_create is
+    available, otherwise solution<suffix> inside the sandbox.
+    """
+    with get_workspace().sandbox() as cwd:
+        if not _use_memfd():
+            path = os.path.join(cwd, "solution" + suffix)
+            with open(path, "wb") as f:
+                f.write(source)
+            yield Script(path, cwd)
+            return
+
+        fd = os.memfd_create("solution" + suffix, os.MFD_CLOEXEC)
+        try:
+            with open(fd, "wb", closefd=False) as f:
+                f.write(source)
+            yield Script(f"/dev/fd/{fd}", cwd, (fd,))
+        finally:
+            os.close(fd)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.problem_app.models import Problem
+from apps.problem_app.services import perf_histogram
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-problem runtime/memory percentile histograms from accepted submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--problem', type=int, nargs='+', help='Problem ids (default: every problem)')
+
+    def handle(self, *args, **options):
+        problems = Problem.objects.order_by('id')
+        if options['problem']:
+            problems = problems.filter(id__in=options['problem'])
+
+        built = 0
+        for problem in problems.iterator():
+            counts = perf_histogram.rebuild(problem)
+            built += 1
+            summary = ", ".join(f"{language}: {count}" for language, count in sorted(counts.items()))
+            self.stdout.write(f"{problem.title}: {summary or 'no accepted submissions'}")
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt histograms for {built} problems.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.problem_app.services import solved_problems
+
+
+class Command(BaseCommand):
+    help = ('Fills the UserSolvedProblem table from accepted submissions and recounts '
+            'UserProfile.problems_solved (run while flush_counters is stopped)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        found = solved_problems.backfill(options['batch_size'])
+        self.stdout.write(f'{found} solved (user, problem) pairs.')
+        profiles = solved_problems.recount_profiles()
+        self.stdout.write(self.style.SUCCESS(f'Recounted problems_solved for {profiles} profiles.'))
@@ -20,6 +20,7 @@ class Command(BaseCommand):
                     scalar_indices.append(i)
 
             testcases = problem.testcases.all()
+            problem_fixed = False
             for tc in testcases:
                 tc_input = tc.input
                 modified = False
@@ -55,7 +56,11 @@ class Command(BaseCommand):
                 if modified:
                     tc.input = tc_input
                     tc.save()
+                    problem_fixed = True
                     fixed_count += 1
                     self.stdout.write(self.style.SUCCESS(f'Fixed testcase {tc.id} for problem: {problem.title} -> {tc_input}'))
 
+            if problem_fixed:
+                problem.bump_testcase_version()
+
         self.stdout.write(self.style.SUCCESS(f'Successfully fixed {fixed_count} test cases.'))
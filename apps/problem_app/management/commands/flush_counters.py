@@ -0,0 +1,36 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.auth_app.services import profile_counters
+from apps.problem_app.services import problem_counters
+
+logger = logging.getLogger(__name__)
+
+COUNTER_GROUPS = (problem_counters.COUNTERS, profile_counters.COUNTERS)
+
+
+class Command(BaseCommand):
+    help = 'Periodically applies buffered problem/profile counter increments from Redis to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5),
+                            help='Seconds between flushes')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE')
+        parser.add_argument('--once', action='store_true', help='Flush once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            for group in COUNTER_GROUPS:
+                try:
+                    rows = group.flush(options['batch_size'])
+                except Exception as e:
+                    logger.error(f"Failed to flush {group.key}: {str(e)}")
+                    continue
+                if rows:
+                    self.stdout.write(f"Flushed {group.key}: {rows} rows")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,71 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.problem_app.judge.timing import PHASES
+from apps.problem_app.services import judge_bench
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the judge pipeline on a fixed corpus and reports per-phase latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--languages', nargs='+', choices=judge_bench.LANGUAGES, default=list(judge_bench.LANGUAGES))
+        parser.add_argument('--sizes', nargs='+', type=int, default=list(judge_bench.DEFAULT_SIZES),
+                            help='Input sizes (array length / string length) to run each solution at')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--tests', type=int, default=10, help='Test cases per run')
+        parser.add_argument('--warm-compile', action='store_true',
+                            help='Reuse compiled binaries between runs instead of compiling fresh source each time')
+        parser.add_argument('--output', default='judge_bench.json', help='Where to write the JSON report')
+        parser.add_argument('--baseline', help='Earlier JSON report to compare p50s against')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        languages = []
+        for language in options['languages']:
+            if judge_bench.available(language):
+                languages.append(language)
+            else:
+                self.stdout.write(self.style.WARNING(f'Skipping {language}: toolchain not installed'))
+        if not languages:
+            raise CommandError('No language toolchains available')
+
+        report = judge_bench.run_benchmark(
+            languages=languages,
+            sizes=options['sizes'],
+            iterations=options['iterations'],
+            tests=options['tests'],
+            warmup=options['warmup'],
+            fresh_compile=not options['warm_compile'],
+            on_progress=self.print_row,
+        )
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            self.print_comparison(judge_bench.compare_reports(baseline, report))
+
+    def print_row(self, row):
+        header = f"{judge_bench.result_key(row)}  ({row['samples']} runs"
+        if row['errors']:
+            header += f", {row['errors']} failed: {row['first_error'][:80]}"
+        self.stdout.write(header + ")")
+
+        for name in (*PHASES, judge_bench.TOTAL):
+            stats = row['phases'].get(name)
+            if stats:
+                self.stdout.write(
+                    f"    {name:<8} p50 {stats['p50']:>9.2f}  p95 {stats['p95']:>9.2f}  p99 {stats['p99']:>9.2f} ms"
+                )
+
+    def print_comparison(self, rows):
+        self.stdout.write("p50 change vs baseline:")
+        for key, name, old, new, change in rows:
+            line = f"    {key:<32} {name:<8} {old:>9.2f} -> {new:>9.2f} ms  ({change:+.1f}%)"
+            self.stdout.write(self.style.WARNING(line) if change > 10 else line)
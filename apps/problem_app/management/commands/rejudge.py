@@ -0,0 +1,74 @@
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from apps.problem_app.models import Problem, Submission
+from apps.problem_app.services import rejudge
+
+
+class Command(BaseCommand):
+    help = "Re-judges a problem's submissions against its current test cases and rebuilds its counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--problem', type=int, required=True, help='Problem id')
+        parser.add_argument('--since', help='Only submissions created at or after this date/datetime (ISO 8601)')
+        parser.add_argument('--status', nargs='+', choices=[s for s, _ in Submission.STATUS_CHOICES],
+                            help='Only submissions with these verdicts (default: every finished submission)')
+        parser.add_argument('--workers', type=int, help='Judge processes (default: CPU count, 0 judges inline)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Submissions per bulk_update')
+        parser.add_argument('--checkpoint', help='Progress file (default: rejudge-<problem>.json)')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start over')
+
+    def handle(self, *args, **options):
+        try:
+            problem = Problem.objects.get(pk=options['problem'])
+        except Problem.DoesNotExist:
+            raise CommandError(f"Problem {options['problem']} does not exist")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError(f"Invalid --since value: {options['since']}")
+                since = datetime.combine(day, time.min)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        checkpoint_path = options['checkpoint'] or f"rejudge-{problem.id}.json"
+        checkpoint = rejudge.Checkpoint(checkpoint_path, problem, since, options['status'])
+        if options['restart']:
+            checkpoint.remove()
+        try:
+            if checkpoint.load():
+                self.stdout.write(f"Resuming after submission {checkpoint.last_id} ({checkpoint.judged} already judged)")
+        except rejudge.CheckpointMismatch as e:
+            raise CommandError(f"{e}. Use --restart to discard it.")
+
+        result = rejudge.rejudge_problem(
+            problem,
+            since=since,
+            statuses=options['status'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            checkpoint_path=checkpoint_path,
+            on_progress=self.print_progress,
+        )
+
+        for change, count in sorted(result.changed.items(), key=lambda item: -item[1]):
+            self.stdout.write(f"    {change:<48} {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-judged {result.judged} submissions of {problem.title}: "
+            f"{sum(result.changed.values())} verdicts changed, "
+            f"{problem.accepted_submissions}/{problem.total_submissions} accepted"
+        ))
+
+    def print_progress(self, checkpoint, total, rate):
+        percent = checkpoint.judged / total * 100 if total else 100.0
+        self.stdout.write(
+            f"{checkpoint.judged}/{total} ({percent:.1f}%)  {rate:.1f}/s  "
+            f"{sum(checkpoint.changed.values())} verdicts changed"
+        )
@@ -0,0 +1,80 @@
+import logging
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.problem_app.models import Problem, Submission
+from apps.problem_app.judge import cpp_pch, java_daemon
+from apps.problem_app.judge.timing import QUEUE_WAIT
+from apps.problem_app.services import judge_admission, judge_queue
+from apps.problem_app.services.judge_service import judge_pending_submission, run_code
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Consumes queued run/submit jobs from Redis and writes verdicts back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-timeout', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Start the JVM daemons and precompile the C++ harness header now so
+        # the first jobs don't pay for them.
+        java_daemon.get_pool()
+        cpp_pch.warm()
+        requeued = judge_queue.requeue_stale()
+        if requeued:
+            logger.warning(f"Requeued {requeued} judge jobs left by a stopped worker")
+        self.stdout.write(self.style.SUCCESS('Judge worker started.'))
+
+        while True:
+            job = judge_queue.pop_job(timeout=options['poll_timeout'])
+            if job is None:
+                if options['burst']:
+                    break
+                continue
+
+            close_old_connections()
+            try:
+                payload = self.process(job)
+            except Exception as e:
+                logger.error(f"Judge job {job.get('id')} failed: {str(e)}")
+                payload = {
+                    "success": False,
+                    "message": "An unexpected error occurred during code execution",
+                    "error": str(e)
+                }
+
+            payload["status"] = "Done"
+            payload["user_id"] = job["user_id"]
+            try:
+                judge_queue.store_result(job["id"], payload)
+                judge_queue.ack_job(job)
+            except Exception as e:
+                # The job stays on the processing list and is judged again.
+                logger.error(f"Failed to store judge result {job['id']}: {str(e)}")
+                continue
+            finally:
+                judge_admission.release(judge_admission.Ticket.from_job(job))
+
+            try:
+                judge_queue.publish_result(job["user_id"], job["id"], payload)
+            except Exception as e:
+                logger.error(f"Failed to push judge result {job['id']}: {str(e)}")
+
+            self.stdout.write(f"Judged {job['kind']} job {job['id']}: {payload.get('overallStatus')}")
+
+        self.stdout.write(self.style.SUCCESS('Judge worker stopped.'))
+
+    def process(self, job):
+        wait = judge_queue.queue_wait_ms(job)
+        phases = {QUEUE_WAIT: wait} if wait is not None else {}
+
+        if job["kind"] == "submit":
+            submission = Submission.objects.select_related("problem").get(id=job["submission_id"])
+            return judge_pending_submission(
+                submission, stream_id=job["id"], fail_fast=job.get("fail_fast", False), phases=phases
+            )
+
+        problem = Problem.objects.get(id=job["problem_id"])
+        return run_code(problem, job["language"], job["code"], stream_id=job["id"], phases=phases)
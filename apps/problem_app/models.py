@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from apps.problem_app.judge.comparison import DEFAULT_EPSILON, EXACT, MODE_CHOICES
+from apps.problem_app.judge.cpp_pch import OPTIMIZATION_CHOICES
 # Create your models here.
 
 class Category(models.Model):
@@ -58,6 +60,21 @@ class Problem(models.Model):
     time_limit = models.IntegerField(default=2)
     memory_limit = models.IntegerField(default=256)
 
+    # Stop judging a submission at its first failing test case.
+    fail_fast = models.BooleanField(default=False)
+
+    # How outputs are compared with expected outputs (see judge/comparison.py).
+    comparison_mode = models.CharField(max_length=20, choices=MODE_CHOICES, default=EXACT)
+    float_tolerance = models.FloatField(default=DEFAULT_EPSILON)
+
+    # g++ optimisation level and -pipe for C++ submissions; blank/null use the
+    # JUDGE_CPP_OPTIMIZATION / JUDGE_CPP_PIPE defaults.
+    cpp_optimization = models.CharField(max_length=2, choices=OPTIMIZATION_CHOICES, blank=True, default="")
+    cpp_pipe = models.BooleanField(null=True, blank=True)
+
+    # Bumped whenever test cases or judge settings change; part of cached verdict keys.
+    testcase_version = models.PositiveIntegerField(default=1)
+
     is_active = models.BooleanField(default=True, db_index=True)
     is_premium = models.BooleanField(default=False)
     visible = models.BooleanField(default=True)
@@ -82,6 +99,14 @@ class Problem(models.Model):
     def __str__(self):
         return self.title
 
+    def bump_testcase_version(self):
+        from apps.problem_app.services import judge_bundle
+
+        previous = self.testcase_version
+        Problem.objects.filter(pk=self.pk).update(testcase_version=models.F("testcase_version") + 1)
+        self.refresh_from_db(fields=["testcase_version"])
+        judge_bundle.invalidate(self.pk, previous)
+
     
 class TestCases(models.Model):
     problem = models.ForeignKey(
@@ -113,10 +138,14 @@ class Company(models.Model):
 
 class Submission(models.Model):
     STATUS_CHOICES = (
+        ("Pending", "Pending"),
+        ("Judging", "Judging"),
         ("Accepted", "Accepted"),
         ("Wrong Answer","Wrong Answer"),
         ("Runtime Error","Runtime Error"),
         ("Time Limit Exceeded", "Time Limit Exceeded"),
+        ("Memory Limit Exceeded", "Memory Limit Exceeded"),
+        ("Output Limit Exceeded", "Output Limit Exceeded"),
     )
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -130,9 +159,45 @@ class Submission(models.Model):
 
     runtime = models.FloatField(default=0.0) # in ms
     memory = models.FloatField(default=0.0)  # in MB
+    phase_timings = models.JSONField(default=dict, blank=True)  # ms per judge pipeline phase
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
 
+
+
+class PerformanceHistogram(models.Model):
+    """
+    DB snapshot of a problem's accepted runtime/memory histograms for one
+    language (see services/perf_histogram.py). Bucket index -> count.
+    """
+
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name="histograms")
+    language = models.CharField(max_length=20)
+    runtime_buckets = models.JSONField(default=dict)
+    memory_buckets = models.JSONField(default=dict)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['problem', 'language']
+
+    def __str__(self):
+        return f"{self.problem.title} ({self.language})"
+
+
+class UserSolvedProblem(models.Model):
+    """One row per problem a user has solved, written on their first accepted submission."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="solved_problems")
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name="solved_by")
+    first_solved_at = models.DateTimeField()
+    best_runtime = models.FloatField(default=0.0)  # in ms
+
+    class Meta:
+        unique_together = ['user', 'problem']
+
+    def __str__(self):
+        return f"{self.user} solved {self.problem.title}"
@@ -1,4 +1,4 @@
 from .category_serializer import CategorySerializer
 from .testcase_serializer import TestCasesSerializer
-from .problem_serializer import ProblemSerializer
+from .problem_serializer import ProblemListSerializer, ProblemSerializer
 from .submission_serializer import SubmissionSerializer
@@ -2,6 +2,14 @@ from rest_framework import serializers
 from ..models import Problem, TestCases, Category
 from .category_serializer import CategorySerializer
 from .testcase_serializer import TestCasesSerializer
+from ..services import problem_counters
+
+
+# Fields that change how submissions are judged.
+JUDGE_FIELDS = (
+    "function_name", "parameters", "return_type", "time_limit", "memory_limit",
+    "comparison_mode", "float_tolerance", "cpp_optimization", "cpp_pipe",
+)
 
 
 class ProblemSerializer(serializers.ModelSerializer):
@@ -41,6 +49,11 @@ class ProblemSerializer(serializers.ModelSerializer):
             "solution",
             "time_limit",
             "memory_limit",
+            "fail_fast",
+            "comparison_mode",
+            "float_tolerance",
+            "cpp_optimization",
+            "cpp_pipe",
             "is_premium",
             "visible",
             "status",
@@ -62,6 +75,10 @@ class ProblemSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         testcases_data = validated_data.pop("testcases", None)
+        judge_changed = any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in JUDGE_FIELDS
+        )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -72,6 +89,9 @@ class ProblemSerializer(serializers.ModelSerializer):
             for tc in testcases_data:
                 TestCases.objects.create(problem=instance, **tc)
 
+        if judge_changed or testcases_data is not None:
+            instance.bump_testcase_version()
+
         return instance
 
 
@@ -116,6 +136,66 @@ class ProblemSerializer(serializers.ModelSerializer):
         return "Active" if obj.is_active else "InActive"
 
     def get_acceptanceRate(self, obj):
-        if obj.total_submissions == 0:
-            return 0
-        return round((obj.accepted_submissions / obj.total_submissions) * 100, 2)
+        return problem_counters.acceptance_rate(obj)
+
+
+class ProblemListSerializer(serializers.ModelSerializer):
+    """
+    One row of the problem list: no statement, solution, starter code or
+    test cases. Pass `fields` to keep only some of the fields.
+    """
+
+    category = CategorySerializer(read_only=True)
+    is_solved = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
+    acceptanceRate = serializers.SerializerMethodField()
+
+    # Model columns behind each field, so list queries load only what's shown.
+    COLUMNS = {
+        "id": ("id",),
+        "title": ("title",),
+        "difficulty": ("difficulty",),
+        "category": ("category",),
+        "tags": ("tags",),
+        "is_premium": ("is_premium",),
+        "status": ("is_active",),
+        "is_solved": (),
+        "acceptanceRate": ("total_submissions", "accepted_submissions"),
+    }
+
+    class Meta:
+        model = Problem
+        fields = [
+            "id",
+            "title",
+            "difficulty",
+            "category",
+            "tags",
+            "is_premium",
+            "status",
+            "is_solved",
+            "acceptanceRate",
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def columns(cls, fields):
+        """Model columns needed to serialize `fields` (all fields when None)."""
+        names = cls.Meta.fields if fields is None else fields
+        return {"id"}.union(*(cls.COLUMNS[name] for name in names))
+
+    def get_is_solved(self, obj):
+        solved_ids = self.context.get("solved_problem_ids", set())
+        return obj.id in solved_ids
+
+    def get_status(self, obj):
+        return "Active" if obj.is_active else "InActive"
+
+    def get_acceptanceRate(self, obj):
+        return problem_counters.acceptance_rate(obj)
@@ -0,0 +1,172 @@
+# apps/problem_app/services/judge_admission.py
+
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from django.conf import settings
+from common.redis_client import redis_client
+from apps.problem_app.services import judge_metrics, judge_queue
+from apps.subscription_app.services.subscription_services.subscription_queries import get_active_subscription
+
+logger = logging.getLogger(__name__)
+
+# Leases are sorted sets of ticket tokens scored by when they were taken, so
+# tickets lost to a crashed process expire instead of leaking slots.
+SLOTS_KEY = "judge:admission:slots"
+USER_KEY = "judge:admission:user:{}"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+@dataclass
+class Ticket:
+    token: str
+    user_id: str
+    lane: str
+    holds_slot: bool
+
+    def to_job(self):
+        return {"token": self.token, "user_id": self.user_id, "lane": self.lane}
+
+    @classmethod
+    def from_job(cls, job):
+        data = job.get("admission")
+        if not data:
+            return None
+        return cls(data["token"], data["user_id"], data["lane"], holds_slot=False)
+
+
+def _slots():
+    return getattr(settings, "JUDGE_ADMISSION_SLOTS", 0)
+
+
+def _lease_seconds():
+    return getattr(settings, "JUDGE_ADMISSION_LEASE_SECONDS", 300)
+
+
+def _job_seconds():
+    return getattr(settings, "JUDGE_ADMISSION_JOB_SECONDS", 2)
+
+
+def is_enabled():
+    return _slots() > 0
+
+
+def lane_for(user):
+    """
+    (lane, in-flight limit) for a user. Plans pick them with the
+    "judge_lane" and "judge_concurrency" features.
+    """
+    lanes = getattr(settings, "JUDGE_ADMISSION_LANES", {})
+    lane = getattr(settings, "JUDGE_ADMISSION_DEFAULT_LANE", "free")
+    limit = getattr(settings, "JUDGE_ADMISSION_USER_LIMIT", 2)
+
+    subscription = get_active_subscription(user)
+    features = (subscription.plan.features or {}) if subscription else {}
+    if features.get("judge_lane") in lanes:
+        lane = features["judge_lane"]
+    try:
+        limit = int(features.get("judge_concurrency") or limit)
+    except (TypeError, ValueError):
+        pass
+    return lane, limit
+
+
+def lane_capacity(lane):
+    """Global slots a lane may fill; lower lanes leave headroom for higher ones."""
+    share = getattr(settings, "JUDGE_ADMISSION_LANES", {}).get(lane, 1.0)
+    return max(1, math.floor(_slots() * share))
+
+
+def _claim(key, token, limit, now):
+    """Add token to the lease set and keep it only if fewer than `limit` older leases are live."""
+    pipe = redis_client.pipeline()
+    pipe.zremrangebyscore(key, "-inf", now - _lease_seconds())
+    pipe.zadd(key, {token: now})
+    pipe.expire(key, _lease_seconds())
+    pipe.zrank(key, token)
+    rank = pipe.execute()[-1]
+    if rank is not None and rank < limit:
+        return True
+    redis_client.zrem(key, token)
+    return False
+
+
+def slots_in_use():
+    return redis_client.zcount(SLOTS_KEY, time.time() - _lease_seconds(), "+inf")
+
+
+def report_slots():
+    judge_metrics.SLOT_CAPACITY.set(_slots())
+    judge_metrics.SLOTS_IN_USE.set(slots_in_use())
+
+
+def retry_after():
+    """Seconds until a slot is likely free, from the backlog ahead of the caller."""
+    backlog = judge_queue.queue_depth() + slots_in_use()
+    return max(1, math.ceil((backlog + 1) * _job_seconds() / max(1, _slots())))
+
+
+def acquire(user, hold_slot=True):
+    """
+    Admit one judge run for user or raise AdmissionRejected. Synchronous
+    runs (`hold_slot`) also take a global execution slot; queued runs only
+    count against the user's in-flight limit and the queue length.
+    Returns None when admission is disabled or its Redis/plan lookups fail.
+    """
+    if not is_enabled():
+        return None
+
+    try:
+        # The plan lookup is a DB query; it degrades like Redis does.
+        lane, user_limit = lane_for(user)
+        ticket = Ticket(uuid.uuid4().hex, str(user.id), lane, hold_slot)
+        now = time.time()
+        user_key = USER_KEY.format(ticket.user_id)
+        if not _claim(user_key, ticket.token, user_limit, now):
+            raise AdmissionRejected(
+                f"You already have {user_limit} runs in progress", _job_seconds(), "user_limit"
+            )
+
+        if hold_slot:
+            if not _claim(SLOTS_KEY, ticket.token, lane_capacity(lane), now):
+                redis_client.zrem(user_key, ticket.token)
+                raise AdmissionRejected("The judge is busy, please retry shortly", retry_after(), "busy")
+        elif judge_queue.queue_depth() >= getattr(settings, "JUDGE_ADMISSION_MAX_QUEUE", 1000):
+            redis_client.zrem(user_key, ticket.token)
+            raise AdmissionRejected("The judge queue is full, please retry shortly", retry_after(), "queue_full")
+
+        judge_metrics.ADMISSIONS.inc(lane=lane, outcome="admitted")
+        if hold_slot:
+            report_slots()
+        return ticket
+    except AdmissionRejected as e:
+        judge_metrics.ADMISSIONS.inc(lane=lane, outcome=e.reason)
+        raise
+    except Exception as e:
+        # Don't take the judge down with Redis; run unthrottled instead.
+        logger.error(f"Judge admission unavailable: {str(e)}")
+        return None
+
+
+def release(ticket):
+    if ticket is None:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        pipe.zrem(USER_KEY.format(ticket.user_id), ticket.token)
+        if ticket.holds_slot:
+            pipe.zrem(SLOTS_KEY, ticket.token)
+        pipe.execute()
+        if ticket.holds_slot:
+            report_slots()
+    except Exception as e:
+        logger.error(f"Failed to release judge admission ticket {ticket.token}: {str(e)}")
+
@@ -0,0 +1,273 @@
+# apps/problem_app/services/judge_bench.py
+
+import platform
+import random
+import shutil
+import subprocess
+import uuid
+from datetime import datetime, timezone
+from django.conf import settings
+from apps.problem_app.judge.comparison import Comparator, judge
+from apps.problem_app.judge.dispatcher import dispatch
+from apps.problem_app.judge.timing import COMPARE, PHASES, clock, elapsed_ms, span
+from apps.problem_app.judge.wire import PreparedCases
+from apps.problem_app.services.judge_bundle import BundleCase
+
+LANGUAGES = ("python", "javascript", "java", "cpp")
+TOOLCHAINS = {
+    "python": (),
+    "javascript": ("node",),
+    "java": ("javac", "java"),
+    "cpp": ("g++",),
+}
+DEFAULT_SIZES = (10, 1000, 10000)
+PERCENTILES = (50, 95, 99)
+TOTAL = "total"
+
+# Reference solutions: every language must produce the same outputs so the
+# comparison phase does real work on each run.
+CORPUS = {
+    "prefix_sums": {
+        "function_name": "prefixSums",
+        "parameters": [{"name": "nums", "type": "int[]"}],
+        "solutions": {
+            "python": (
+                "def prefixSums(nums):\n"
+                "    out, total = [], 0\n"
+                "    for x in nums:\n"
+                "        total += x\n"
+                "        out.append(total)\n"
+                "    return out\n"
+            ),
+            "javascript": (
+                "function prefixSums(nums) {\n"
+                "    let total = 0;\n"
+                "    return nums.map(x => total += x);\n"
+                "}\n"
+            ),
+            "java": (
+                "class Solution {\n"
+                "    public long[] prefixSums(int[] nums) {\n"
+                "        long[] out = new long[nums.length];\n"
+                "        long total = 0;\n"
+                "        for (int i = 0; i < nums.length; i++) { total += nums[i]; out[i] = total; }\n"
+                "        return out;\n"
+                "    }\n"
+                "}\n"
+            ),
+            "cpp": (
+                "class Solution {\n"
+                "public:\n"
+                "    vector<long long> prefixSums(vector<int>& nums) {\n"
+                "        vector<long long> out;\n"
+                "        long long total = 0;\n"
+                "        for (int x : nums) { total += x; out.push_back(total); }\n"
+                "        return out;\n"
+                "    }\n"
+                "};\n"
+            ),
+        },
+    },
+    "count_vowels": {
+        "function_name": "countVowels",
+        "parameters": [{"name": "s", "type": "string"}],
+        "solutions": {
+            "python": (
+                "def countVowels(s):\n"
+                "    return sum(1 for c in s if c in 'aeiou')\n"
+            ),
+            "javascript": (
+                "function countVowels(s) {\n"
+                "    let count = 0;\n"
+                "    for (const c of s) if ('aeiou'.includes(c)) count++;\n"
+                "    return count;\n"
+                "}\n"
+            ),
+            "java": (
+                "class Solution {\n"
+                "    public int countVowels(String s) {\n"
+                "        int count = 0;\n"
+                "        for (int i = 0; i < s.length(); i++) if (\"aeiou\".indexOf(s.charAt(i)) >= 0) count++;\n"
+                "        return count;\n"
+                "    }\n"
+                "}\n"
+            ),
+            "cpp": (
+                "class Solution {\n"
+                "public:\n"
+                "    int countVowels(string s) {\n"
+                "        int count = 0;\n"
+                "        for (char c : s) if (string(\"aeiou\").find(c) != string::npos) count++;\n"
+                "        return count;\n"
+                "    }\n"
+                "};\n"
+            ),
+        },
+    },
+}
+
+_COMMENT = {"python": "#", "javascript": "//", "java": "//", "cpp": "//"}
+
+
+def _prefix_sums_case(rng, size):
+    nums = [rng.randint(-1000, 1000) for _ in range(size)]
+    out, total = [], 0
+    for x in nums:
+        total += x
+        out.append(total)
+    return [nums], out
+
+
+def _count_vowels_case(rng, size):
+    s = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(size))
+    return [s], sum(1 for c in s if c in "aeiou")
+
+
+_CASE_BUILDERS = {
+    "prefix_sums": _prefix_sums_case,
+    "count_vowels": _count_vowels_case,
+}
+
+
+def available(language):
+    return all(shutil.which(tool) for tool in TOOLCHAINS[language])
+
+
+def build_cases(benchmark, size, count, seed=0):
+    """Deterministic test cases for one corpus entry, prepared like a judge bundle."""
+    rng = random.Random(f"{benchmark}:{size}:{seed}")
+    comparator = Comparator()
+    cases = []
+    for i in range(count):
+        case_input, expected = _CASE_BUILDERS[benchmark](rng, size)
+        case = BundleCase(i, case_input, expected, order=i)
+        case.prepare(comparator)
+        cases.append(case)
+    return PreparedCases(cases, CORPUS[benchmark]["parameters"])
+
+
+def percentile(values, p):
+    """Linearly interpolated percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    """{phase: {"p50": ..., "p95": ..., "p99": ..., "mean": ...}} from per-run phase dicts."""
+    summary = {}
+    for name in (*PHASES, TOTAL):
+        values = [s[name] for s in samples if name in s]
+        if not values:
+            continue
+        summary[name] = {f"p{p}": round(percentile(values, p), 3) for p in PERCENTILES}
+        summary[name]["mean"] = round(sum(values) / len(values), 3)
+    return summary
+
+
+def run_once(language, benchmark, cases, nonce=None):
+    """
+    Judge one reference solution and return its phase timings (ms) plus an
+    error message if the run did not pass. A `nonce` makes the source unique
+    so the compile cache cannot serve it.
+    """
+    entry = CORPUS[benchmark]
+    code = entry["solutions"][language]
+    if nonce is not None:
+        code += f"\n{_COMMENT[language]} bench run {nonce}\n"
+
+    started = clock()
+    result = dispatch(language, code, cases, entry["function_name"], parameters=entry["parameters"])
+    phases = dict(result.phases)
+    with span(phases, COMPARE):
+        verdicts = judge(result, cases)
+    phases[TOTAL] = elapsed_ms(started)
+
+    error = None
+    if result.error:
+        error = f"{result.error_type}: {result.error}"
+    elif not all(v["passed"] for v in verdicts):
+        error = "Wrong Answer"
+    return phases, error
+
+
+def run_benchmark(languages=LANGUAGES, sizes=DEFAULT_SIZES, iterations=20, tests=10, warmup=1,
+                  fresh_compile=True, on_progress=None):
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    for benchmark in CORPUS:
+        for size in sizes:
+            cases = build_cases(benchmark, size, tests)
+            for language in languages:
+                samples, errors = [], []
+                for i in range(warmup + iterations):
+                    phases, error = run_once(
+                        language, benchmark, cases, f"{run_id}-{size}-{i}" if fresh_compile else None
+                    )
+                    if i < warmup:
+                        continue
+                    if error:
+                        errors.append(error)
+                    else:
+                        samples.append(phases)
+
+                row = {
+                    "benchmark": benchmark,
+                    "language": language,
+                    "size": size,
+                    "tests": tests,
+                    "samples": len(samples),
+                    "errors": len(errors),
+                    "first_error": errors[0] if errors else None,
+                    "phases": summarize(samples),
+                }
+                results.append(row)
+                if on_progress:
+                    on_progress(row)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "iterations": iterations,
+            "warmup": warmup,
+            "fresh_compile": fresh_compile,
+        },
+        "results": results,
+    }
+
+
+def result_key(row):
+    return f"{row['benchmark']}/{row['language']}/{row['size']}"
+
+
+def compare_reports(baseline, current, stat="p50"):
+    """Rows of (key, phase, baseline, current, change %) for results present in both reports."""
+    base = {result_key(row): row for row in baseline.get("results", [])}
+    rows = []
+    for row in current.get("results", []):
+        before = base.get(result_key(row))
+        if before is None:
+            continue
+        for name, stats in row["phases"].items():
+            old = before["phases"].get(name, {}).get(stat)
+            new = stats.get(stat)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((result_key(row), name, old, new, round(change, 1)))
+    return rows
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
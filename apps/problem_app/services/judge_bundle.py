@@ -0,0 +1,130 @@
+# apps/problem_app/services/judge_bundle.py
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from common.redis_client import redis_client
+from apps.problem_app.models import TestCases
+from apps.problem_app.judge.comparison import Comparator
+from apps.problem_app.judge.wire import PreparedCases
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_KEY = "judge:bundle:{}:{}"
+
+_bundles = OrderedDict()
+_lock = threading.Lock()
+
+
+class BundleCase:
+    """Detached test case with its expected output pre-normalized for comparison."""
+
+    __slots__ = ("id", "input", "expected_output", "is_sample", "order", "comparator", "expected_value")
+
+    def __init__(self, id, input, expected_output, is_sample=False, order=0):
+        self.id = id
+        self.input = input
+        self.expected_output = expected_output
+        self.is_sample = is_sample
+        self.order = order
+        self.comparator = None
+        self.expected_value = None
+
+    def prepare(self, comparator):
+        self.comparator = comparator
+        self.expected_value = comparator.prepare(self.expected_output)
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "input": self.input,
+            "expected_output": self.expected_output,
+            "is_sample": self.is_sample,
+            "order": self.order,
+        }
+
+
+class JudgeBundle:
+    """
+    Everything needed to judge a problem without touching its test case rows:
+    the cases in judge order plus their inputs in each runner's wire format.
+    """
+
+    def __init__(self, problem_id, version, parameters, cases, comparator):
+        self.problem_id = problem_id
+        self.version = version
+        for tc in cases:
+            tc.prepare(comparator)
+        self.testcases = PreparedCases(cases, parameters)
+
+    @property
+    def samples(self):
+        return [tc for tc in self.testcases if tc.is_sample]
+
+
+def _ttl():
+    return getattr(settings, "JUDGE_BUNDLE_TTL", 86400)
+
+
+def _l1_size():
+    return getattr(settings, "JUDGE_BUNDLE_L1_SIZE", 256)
+
+
+def _load_cases(problem):
+    key = BUNDLE_KEY.format(problem.id, problem.testcase_version)
+    try:
+        data = redis_client.get(key)
+        if data:
+            return [BundleCase(**item) for item in json.loads(data)]
+    except Exception as e:
+        logger.error(f"Failed to read judge bundle for problem {problem.id}: {str(e)}")
+
+    cases = [
+        BundleCase(tc.id, tc.input, tc.expected_output, tc.is_sample, tc.order)
+        for tc in TestCases.objects.filter(problem=problem).order_by("order", "id")
+    ]
+    try:
+        redis_client.setex(key, _ttl(), json.dumps([tc.as_dict() for tc in cases], default=str))
+    except Exception as e:
+        logger.error(f"Failed to store judge bundle for problem {problem.id}: {str(e)}")
+    return cases
+
+
+def get_bundle(problem):
+    """Judge bundle for the problem's current test case version."""
+    with _lock:
+        bundle = _bundles.get(problem.id)
+        if bundle is not None and bundle.version == problem.testcase_version:
+            _bundles.move_to_end(problem.id)
+            return bundle
+
+    bundle = JudgeBundle(
+        problem.id, problem.testcase_version, problem.parameters, _load_cases(problem),
+        Comparator.for_problem(problem)
+    )
+
+    if _l1_size() > 0:
+        with _lock:
+            _bundles[problem.id] = bundle
+            _bundles.move_to_end(problem.id)
+            while len(_bundles) > _l1_size():
+                _bundles.popitem(last=False)
+    return bundle
+
+
+def invalidate(problem_id, version=None):
+    """Drop cached bundles for a problem (all versions are superseded by a version bump anyway)."""
+    with _lock:
+        _bundles.pop(problem_id, None)
+    if version is not None:
+        try:
+            redis_client.delete(BUNDLE_KEY.format(problem_id, version))
+        except Exception as e:
+            logger.error(f"Failed to drop judge bundle for problem {problem_id}: {str(e)}")
+
+
+def clear_local():
+    with _lock:
+        _bundles.clear()
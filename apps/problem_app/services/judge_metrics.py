@@ -0,0 +1,54 @@
+# apps/problem_app/services/judge_metrics.py
+
+import logging
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+# Language labels come from request data; anything unknown is folded into one series.
+KNOWN_LANGUAGES = ("python", "javascript", "java", "cpp")
+
+PHASE_SECONDS = metrics.histogram(
+    "judge_phase_seconds",
+    "Wall time spent in each stage of the run/submit pipeline.",
+    ("kind", "language", "phase"),
+)
+JOBS = metrics.counter(
+    "judge_jobs_total",
+    "Judged runs and submissions by outcome.",
+    ("kind", "language", "status"),
+)
+QUEUE_DEPTH = metrics.gauge(
+    "judge_queue_depth",
+    "Jobs waiting in the judge queue.",
+)
+ADMISSIONS = metrics.counter(
+    "judge_admissions_total",
+    "Admission decisions for run/submit requests by plan lane.",
+    ("lane", "outcome"),
+)
+SLOTS_IN_USE = metrics.gauge(
+    "judge_slots_in_use",
+    "Global judge execution slots currently held (shared through Redis).",
+)
+SLOT_CAPACITY = metrics.gauge(
+    "judge_slot_capacity",
+    "Configured number of global judge execution slots.",
+)
+
+
+def _language(language):
+    language = (language or "").lower()
+    return language if language in KNOWN_LANGUAGES else "other"
+
+
+def record(kind, language, phases, status=None):
+    """Add one judged job's phase timings (ms) to the registry."""
+    try:
+        language = _language(language)
+        for phase, elapsed in phases.items():
+            PHASE_SECONDS.observe(elapsed / 1000, kind=kind, language=language, phase=phase)
+        if status:
+            JOBS.inc(kind=kind, language=language, status=status)
+    except Exception as e:
+        logger.error(f"Failed to record judge metrics: {str(e)}")
@@ -0,0 +1,169 @@
+# apps/problem_app/services/judge_queue.py
+
+import json
+import time
+import uuid
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from common.redis_client import redis_client
+
+QUEUE_KEY = "judge:queue"
+RESULT_KEY = "judge:result:{}"
+
+# Popped jobs move to the processing list until their result is stored, so a
+# worker that dies mid-job leaves them there to be queued again. Claims record
+# when each job was taken, by job id.
+PROCESSING_KEY = "judge:processing"
+CLAIMS_KEY = "judge:processing:claims"
+
+
+def _result_ttl():
+    return getattr(settings, "JUDGE_RESULT_TTL", 3600)
+
+
+def _stale_seconds():
+    return getattr(settings, "JUDGE_QUEUE_STALE_SECONDS", 300)
+
+
+def request_flag(request, name, default=False):
+    requested = request.data.get(name)
+    if requested is None:
+        return default
+    return str(requested).lower() in ("1", "true", "yes")
+
+
+def is_async_request(request):
+    return request_flag(request, "async", getattr(settings, "JUDGE_ASYNC", False))
+
+
+def enqueue_submission(submission, fail_fast=False, admission=None):
+    job = {
+        "id": str(submission.id),
+        "kind": "submit",
+        "submission_id": submission.id,
+        "user_id": str(submission.user_id),
+        "fail_fast": fail_fast,
+        "enqueued_at": time.time(),
+        "admission": admission.to_job() if admission else None,
+    }
+    redis_client.lpush(QUEUE_KEY, json.dumps(job))
+    return job["id"]
+
+
+def enqueue_run(user, problem, language, code, admission=None):
+    job = {
+        "id": f"run-{uuid.uuid4().hex}",
+        "kind": "run",
+        "problem_id": problem.id,
+        "language": language,
+        "code": code,
+        "user_id": str(user.id),
+        "enqueued_at": time.time(),
+        "admission": admission.to_job() if admission else None,
+    }
+    store_result(job["id"], {"status": "Pending", "user_id": job["user_id"]})
+    redis_client.lpush(QUEUE_KEY, json.dumps(job))
+    return job["id"]
+
+
+def pop_job(timeout=5):
+    """Take the oldest job, keeping it on the processing list until ack_job."""
+    item = redis_client.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+    if not item:
+        return None
+    job = json.loads(item)
+    redis_client.hset(CLAIMS_KEY, mapping={job["id"]: time.time()})
+    return job
+
+
+def _processing():
+    """(raw entry, job id) for every job on the processing list."""
+    return [(raw, json.loads(raw)["id"]) for raw in redis_client.lrange(PROCESSING_KEY, 0, -1)]
+
+
+def ack_job(job):
+    """Drop a job from the processing list once its result is stored."""
+    pipe = redis_client.pipeline()
+    for raw, job_id in _processing():
+        if job_id == job["id"]:
+            pipe.lrem(PROCESSING_KEY, 1, raw)
+    pipe.hdel(CLAIMS_KEY, job["id"])
+    pipe.execute()
+
+
+def requeue_stale():
+    """
+    Put jobs claimed more than JUDGE_QUEUE_STALE_SECONDS ago back at the
+    head of the queue; their worker died before storing a result. A job
+    with no claim yet is given one now and left for the next pass.
+    Returns how many jobs were queued again.
+    """
+    now = time.time()
+    claims = redis_client.hgetall(CLAIMS_KEY)
+    requeued = 0
+    for raw, job_id in _processing():
+        claimed = claims.get(job_id)
+        if claimed is None:
+            redis_client.hsetnx(CLAIMS_KEY, job_id, now)
+            continue
+        if now - float(claimed) < _stale_seconds():
+            continue
+        # Only the worker whose LREM removed the entry queues it again.
+        if redis_client.lrem(PROCESSING_KEY, 1, raw):
+            pipe = redis_client.pipeline()
+            pipe.rpush(QUEUE_KEY, raw)
+            pipe.hdel(CLAIMS_KEY, job_id)
+            pipe.execute()
+            requeued += 1
+    return requeued
+
+
+def queue_wait_ms(job):
+    """How long a popped job sat in the queue, or None for jobs queued before this was recorded."""
+    enqueued_at = job.get("enqueued_at")
+    if enqueued_at is None:
+        return None
+    return max(0.0, (time.time() - enqueued_at) * 1000)
+
+
+def queue_depth():
+    return redis_client.llen(QUEUE_KEY)
+
+
+def store_result(job_id, payload):
+    redis_client.setex(RESULT_KEY.format(job_id), _result_ttl(), json.dumps(payload, default=str))
+
+
+def get_result(job_id):
+    data = redis_client.get(RESULT_KEY.format(job_id))
+    return json.loads(data) if data else None
+
+
+def judge_group_name(job_id):
+    return f"judge_{job_id}"
+
+
+def publish_verdict(job_id, index, total, verdict):
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        judge_group_name(job_id),
+        {
+            "type": "judge_verdict",
+            "job_id": job_id,
+            "index": index,
+            "total": total,
+            "verdict": verdict,
+        }
+    )
+
+
+def publish_result(user_id, job_id, payload):
+    channel_layer = get_channel_layer()
+    event = {
+        "type": "judge_result",
+        "job_id": job_id,
+        "result": payload,
+    }
+    async_to_sync(channel_layer.group_send)(f"user_{str(user_id).replace('-', '')}", event)
+    async_to_sync(channel_layer.group_send)(judge_group_name(job_id), event)
@@ -0,0 +1,224 @@
+# apps/problem_app/services/judge_service.py
+
+import logging
+from apps.problem_app.models import Submission
+from apps.problem_app.judge.dispatcher import dispatch
+from apps.problem_app.judge.comparison import judge, judge_case
+from apps.problem_app.judge.cpp_pch import compile_flags
+from apps.problem_app.judge.execution_base import LIMIT_VERDICTS
+from apps.problem_app.judge.timing import COMPARE, DB_WRITE, FETCH, PERCENTILES, ordered, span
+from apps.auth_app.services import profile_counters
+from apps.problem_app.services import judge_bundle, judge_metrics, judge_queue, perf_histogram, problem_counters, solved_problems, verdict_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _format_error(exec_result):
+    error_msg = exec_result.error or ""
+    if exec_result.error_type and exec_result.error:
+        error_msg = f"{exec_result.error_type}:\n{error_msg}"
+    return error_msg
+
+
+def _verdict_streamer(stream_id, testcases):
+    """Publish each test case verdict to the job's websocket group as it completes."""
+    if not stream_id:
+        return None
+
+    def on_record(index, actual, runtime):
+        if index >= len(testcases):
+            return
+        tc = testcases[index]
+        verdict = judge_case(tc, actual, runtime)
+        if not tc.is_sample:
+            # Hidden cases stay hidden; the client only learns whether they passed.
+            verdict.pop("input")
+            verdict.pop("expected")
+        try:
+            judge_queue.publish_verdict(stream_id, index, len(testcases), verdict)
+        except Exception as e:
+            logger.error(f"Failed to stream verdict for {stream_id}: {str(e)}")
+
+    return on_record
+
+
+def execute(problem, language, code, testcases, on_record=None, fail_fast=False):
+    """Run code against testcases, reusing the cached result of an identical earlier run."""
+    key = verdict_cache.cache_key(problem, language, code, fail_fast) if verdict_cache.is_enabled() else None
+    cached = verdict_cache.get(key) if key else None
+    if cached is not None:
+        # The cached run's timings describe a different request.
+        cached.phases = {}
+        if on_record:
+            for index, (actual, runtime) in enumerate(zip(cached.outputs, cached.runtimes)):
+                on_record(index, actual, runtime)
+        return cached
+
+    exec_result = dispatch(
+        language, code, testcases, problem.function_name, on_record, fail_fast,
+        problem.parameters, problem.time_limit, problem.memory_limit,
+        compile_flags(problem.cpp_optimization, problem.cpp_pipe)
+    )
+    if key:
+        verdict_cache.put(key, exec_result)
+    return exec_result
+
+
+def _judged(problem, language, code, stream_id, fail_fast, phases):
+    """Fetch, execute and compare; every stage is timed into exec_result.phases."""
+    phases = dict(phases or {})
+    with span(phases, FETCH):
+        testcases = judge_bundle.get_bundle(problem).testcases
+
+    exec_result = execute(
+        problem, language, code, testcases, _verdict_streamer(stream_id, testcases), fail_fast
+    )
+    with span(phases, COMPARE):
+        results = judge(exec_result, testcases)
+    exec_result.phases = {**exec_result.phases, **phases}
+    return testcases, exec_result, results
+
+
+def run_code(problem, language, code, stream_id=None, phases=None):
+    """Judge code against every test case without recording a submission."""
+    testcases, exec_result, results = _judged(problem, language, code, stream_id, False, phases)
+
+    error_msg = exec_result.error or ""
+    if exec_result.error_type:
+        error_msg = f"{exec_result.error_type}:\n{error_msg}"
+
+    overall = "Accepted" if results and all(r["passed"] for r in results) else "Wrong Answer"
+    if exec_result.error and not results:
+        overall = "Error"
+    elif exec_result.error_type in LIMIT_VERDICTS:
+        overall = exec_result.error_type
+    judge_metrics.record("run", language, exec_result.phases, overall)
+
+    return {
+        "success": True,
+        "overallStatus": overall,
+        "testResults": results,
+        "consoleOutput": exec_result.stdout,
+        "error": error_msg,
+        "memory": round(exec_result.memory, 2),
+        "runtime": round(sum(exec_result.runtimes), 2)
+    }
+
+
+def grade_submission(problem, language, code, stream_id=None, fail_fast=False, phases=None):
+    testcases, exec_result, results = _judged(problem, language, code, stream_id, fail_fast, phases)
+
+    if not results and exec_result.error:
+        status_value = exec_result.error_type if exec_result.error_type else "Runtime Error"
+        passed = 0
+        total = len(testcases)
+        total_runtime = 0.0
+        memory_usage = 0.0
+    else:
+        passed = sum(1 for r in results if r.get("passed", False))
+        total = len(testcases)
+        total_runtime = sum(r.get("runtime", 0.0) for r in results)
+        status_value = "Accepted" if passed == total else "Wrong Answer"
+        if exec_result.error_type in LIMIT_VERDICTS:
+            status_value = exec_result.error_type
+        memory_usage = exec_result.memory
+
+    return {
+        "status": status_value,
+        "passed": passed,
+        "total": total,
+        "runtime": total_runtime,
+        "memory": memory_usage,
+        "failed_index": exec_result.failed_index,
+        "exec_result": exec_result,
+        "results": results,
+    }
+
+
+def update_submission_stats(submission, status_value):
+    """Count the submission for its problem and its author (write-behind, see common/counters.py)."""
+    try:
+        accepted = status_value == "Accepted"
+        problem_counters.record_submission(submission.problem_id, accepted)
+        first_solve = accepted and solved_problems.record_accepted(submission)
+        profile_counters.record_submission(submission.user_id, first_solve)
+    except Exception as e:
+        logger.error(f"Failed to update submission stats for {submission.pk}: {str(e)}")
+
+
+def compute_percentiles(problem, language, accepted, total_runtime, memory_usage):
+    """Record an accepted run in the problem's histograms and rank the run against them."""
+    return perf_histogram.observe(problem, language, total_runtime, memory_usage, accepted)
+
+
+def store_timings(submission, phases):
+    try:
+        submission.phase_timings = ordered(phases)
+        Submission.objects.filter(pk=submission.pk).update(phase_timings=submission.phase_timings)
+    except Exception as e:
+        logger.error(f"Failed to store timings for submission {submission.pk}: {str(e)}")
+
+
+def finalize_submission(submission, graded):
+    """Update problem counters and build the response payload for a judged submission."""
+    exec_result = graded["exec_result"]
+    phases = exec_result.phases
+    with span(phases, DB_WRITE):
+        update_submission_stats(submission, graded["status"])
+    with span(phases, PERCENTILES):
+        runtime_percentile, memory_percentile = compute_percentiles(
+            submission.problem, submission.language, graded["status"] == "Accepted",
+            graded["runtime"], graded["memory"]
+        )
+    store_timings(submission, phases)
+    judge_metrics.record("submit", submission.language, phases, graded["status"])
+
+    return {
+        "success": True,
+        "submission_id": submission.id,
+        "overallStatus": graded["status"],
+        "passed": graded["passed"],
+        "total": graded["total"],
+        "runtime": round(graded["runtime"], 2),
+        "memory": round(graded["memory"], 2),
+        "runtime_percentile": runtime_percentile,
+        "memory_percentile": memory_percentile,
+        "failed_index": graded["failed_index"],
+        "consoleOutput": exec_result.stdout,
+        "error": _format_error(exec_result),
+        "testResults": graded["results"]
+    }
+
+
+def judge_pending_submission(submission, stream_id=None, fail_fast=False, phases=None):
+    """Judge a queued submission row in place and return its result payload."""
+    phases = dict(phases or {})
+    with span(phases, DB_WRITE):
+        submission.status = "Judging"
+        submission.save(update_fields=["status"])
+
+    try:
+        graded = grade_submission(
+            submission.problem, submission.language, submission.code, stream_id, fail_fast, phases
+        )
+    except Exception as e:
+        logger.error(f"Error judging submission {submission.id}: {str(e)}")
+        submission.status = "Runtime Error"
+        submission.save(update_fields=["status"])
+        return {
+            "success": False,
+            "submission_id": submission.id,
+            "overallStatus": submission.status,
+            "message": "Error during code execution",
+            "error": str(e)
+        }
+
+    submission.status = graded["status"]
+    submission.passed_count = graded["passed"]
+    submission.total_count = graded["total"]
+    submission.runtime = graded["runtime"]
+    submission.memory = graded["memory"]
+    with span(graded["exec_result"].phases, DB_WRITE):
+        submission.save(update_fields=["status", "passed_count", "total_count", "runtime", "memory"])
+
+    return finalize_submission(submission, graded)
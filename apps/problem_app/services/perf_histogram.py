@@ -0,0 +1,216 @@
+# apps/problem_app/services/perf_histogram.py
+
+import logging
+import math
+from dataclasses import dataclass, field
+from django.conf import settings
+from common.redis_client import redis_client
+from apps.problem_app.models import PerformanceHistogram, Submission
+
+logger = logging.getLogger(__name__)
+
+# One hash per (problem, language): "r<i>"/"m<i>" bucket counts, "n" accepted
+# submissions recorded and "seeded" once the DB snapshot has been merged in.
+HISTOGRAM_KEY = "judge:hist:{}:{}"
+COUNT_FIELD = "n"
+SEEDED_FIELD = "seeded"
+
+
+class LogBuckets:
+    """Log-spaced buckets: bucket i holds values in [minimum * growth**i, minimum * growth**(i+1))."""
+
+    def __init__(self, minimum, growth, count):
+        self.minimum = minimum
+        self.growth = growth
+        self.count = count
+        self._log_growth = math.log(growth)
+
+    def index(self, value):
+        if value <= self.minimum:
+            return 0
+        return min(self.count - 1, int(math.log(value / self.minimum) / self._log_growth))
+
+    def share_above(self, value, index):
+        """Fraction of bucket `index` above value, assuming values are spread evenly in log space."""
+        if value <= self.minimum:
+            return 1.0
+        position = math.log(value / self.minimum) / self._log_growth - index
+        return min(1.0, max(0.0, 1.0 - position))
+
+
+RUNTIME = LogBuckets(0.001, 1.05, 400)  # ms, up to ~5 minutes
+MEMORY = LogBuckets(0.1, 1.05, 250)  # MB, up to ~20 GB
+
+
+def percent_above(counts, buckets, value, own=0):
+    """
+    Share (0-100) of recorded values greater than value, matching the old
+    `runtime__gt` count over all accepted submissions. `own` is 1 when value
+    itself has been recorded, so it doesn't count as beating itself.
+    """
+    total = sum(counts.values())
+    if total <= 1:
+        return 100.0
+    index = buckets.index(value)
+    above = sum(count for i, count in counts.items() if i > index)
+    same = counts.get(index, 0) - own
+    if same > 0:
+        above += same * buckets.share_above(value, index)
+    return round(above / total * 100, 2)
+
+
+@dataclass
+class Histogram:
+    runtime: dict = field(default_factory=dict)
+    memory: dict = field(default_factory=dict)
+    count: int = 0
+
+    def add(self, runtime, memory, count=1):
+        r, m = RUNTIME.index(runtime), MEMORY.index(memory)
+        self.runtime[r] = self.runtime.get(r, 0) + count
+        self.memory[m] = self.memory.get(m, 0) + count
+        self.count += count
+
+    def percentiles(self, runtime, memory, own=0):
+        return (
+            percent_above(self.runtime, RUNTIME, runtime, own),
+            percent_above(self.memory, MEMORY, memory, own),
+        )
+
+    @classmethod
+    def from_redis(cls, raw):
+        histogram = cls(count=int(raw.get(COUNT_FIELD, 0)))
+        for name, value in raw.items():
+            if name[0] == "r" and name[1:].isdigit():
+                histogram.runtime[int(name[1:])] = int(value)
+            elif name[0] == "m" and name[1:].isdigit():
+                histogram.memory[int(name[1:])] = int(value)
+        return histogram
+
+    def to_redis(self):
+        mapping = {f"r{i}": c for i, c in self.runtime.items()}
+        mapping.update({f"m{i}": c for i, c in self.memory.items()})
+        mapping[COUNT_FIELD] = self.count
+        mapping[SEEDED_FIELD] = 1
+        return mapping
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        if snapshot is None:
+            return cls()
+        return cls(
+            runtime={int(i): c for i, c in snapshot.runtime_buckets.items()},
+            memory={int(i): c for i, c in snapshot.memory_buckets.items()},
+            count=snapshot.count,
+        )
+
+
+def _key(problem_id, language):
+    return HISTOGRAM_KEY.format(problem_id, language)
+
+
+def _snapshot_every():
+    return getattr(settings, "JUDGE_HISTOGRAM_SNAPSHOT_EVERY", 50)
+
+
+def _load_snapshot(problem_id, language):
+    return Histogram.from_snapshot(
+        PerformanceHistogram.objects.filter(problem_id=problem_id, language=language).first()
+    )
+
+
+def save_snapshot(problem_id, language, histogram):
+    PerformanceHistogram.objects.update_or_create(
+        problem_id=problem_id,
+        language=language,
+        defaults={
+            "runtime_buckets": histogram.runtime,
+            "memory_buckets": histogram.memory,
+            "count": histogram.count,
+        },
+    )
+
+
+def _seed(key, problem_id, language):
+    """Merge the DB snapshot into a hash Redis doesn't have (first use or data loss); exactly one caller wins."""
+    if not redis_client.hsetnx(key, SEEDED_FIELD, 1):
+        return
+    snapshot = _load_snapshot(problem_id, language)
+    if not snapshot.count:
+        return
+    pipe = redis_client.pipeline()
+    for name, count in snapshot.to_redis().items():
+        if name != SEEDED_FIELD:
+            pipe.hincrby(key, name, count)
+    pipe.execute()
+
+
+def observe(problem, language, runtime, memory, accepted):
+    """
+    Record an accepted submission in its problem/language histogram and
+    return (runtime_percentile, memory_percentile) for the submission.
+    One Redis round trip in the common case; falls back to the DB
+    snapshot when Redis is unavailable.
+    """
+    key = _key(problem.id, language)
+    own = 1 if accepted else 0
+    try:
+        pipe = redis_client.pipeline()
+        if accepted:
+            pipe.hincrby(key, f"r{RUNTIME.index(runtime)}", 1)
+            pipe.hincrby(key, f"m{MEMORY.index(memory)}", 1)
+            pipe.hincrby(key, COUNT_FIELD, 1)
+        pipe.hgetall(key)
+        raw = pipe.execute()[-1]
+        if SEEDED_FIELD not in raw:
+            _seed(key, problem.id, language)
+            raw = redis_client.hgetall(key)
+        histogram = Histogram.from_redis(raw)
+    except Exception as e:
+        logger.error(f"Failed to update performance histogram {key}: {str(e)}")
+        histogram = _load_snapshot(problem.id, language)
+        own = 0
+
+    if own and histogram.count % _snapshot_every() == 0:
+        try:
+            save_snapshot(problem.id, language, histogram)
+        except Exception as e:
+            logger.error(f"Failed to snapshot performance histogram {key}: {str(e)}")
+    return histogram.percentiles(runtime, memory, own)
+
+
+def rebuild(problem):
+    """
+    Rebuild the problem's histograms from its accepted submissions and
+    replace both the DB snapshots and the Redis copies. Returns
+    {language: accepted submissions}.
+    """
+    histograms = {}
+    rows = Submission.objects.filter(problem=problem, status="Accepted").values_list(
+        "language", "runtime", "memory"
+    )
+    for language, runtime, memory in rows.iterator(chunk_size=2000):
+        histograms.setdefault(language, Histogram()).add(runtime, memory)
+
+    stale = set(
+        PerformanceHistogram.objects.filter(problem=problem).exclude(language__in=histograms)
+        .values_list("language", flat=True)
+    )
+    PerformanceHistogram.objects.filter(problem=problem, language__in=stale).delete()
+    for language, histogram in histograms.items():
+        save_snapshot(problem.id, language, histogram)
+
+    # Languages with too few submissions for a snapshot may only exist in Redis.
+    stale.update(lang for lang in problem.supported_languages or [] if lang not in histograms)
+    try:
+        pipe = redis_client.pipeline()
+        for language in stale:
+            pipe.delete(_key(problem.id, language))
+        for language, histogram in histograms.items():
+            pipe.delete(_key(problem.id, language))
+            pipe.hset(_key(problem.id, language), mapping=histogram.to_redis())
+        pipe.execute()
+    except Exception as e:
+        # The snapshots are correct; rebuild again once Redis is back.
+        logger.error(f"Failed to store performance histograms for problem {problem.id}: {str(e)}")
+    return {language: histogram.count for language, histogram in histograms.items()}
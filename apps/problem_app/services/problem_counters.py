@@ -0,0 +1,21 @@
+# apps/problem_app/services/problem_counters.py
+
+from common.counters import CounterGroup
+from apps.problem_app.models import Problem
+
+COUNTERS = CounterGroup(Problem, ("total_submissions", "accepted_submissions"))
+
+
+def record_submission(problem_id, accepted):
+    COUNTERS.incr(problem_id, total_submissions=1, accepted_submissions=int(accepted))
+
+
+def live(problem):
+    return COUNTERS.live(problem)
+
+
+def acceptance_rate(problem):
+    counts = live(problem)
+    if counts["total_submissions"] == 0:
+        return 0
+    return round((counts["accepted_submissions"] / counts["total_submissions"]) * 100, 2)
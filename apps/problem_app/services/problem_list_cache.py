@@ -0,0 +1,94 @@
+# apps/problem_app/services/problem_list_cache.py
+
+import hashlib
+import json
+import logging
+import time
+from django.conf import settings
+from django.db import transaction
+from common import metrics
+from common.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Pages are keyed by the catalogue version, so bumping it on any problem or
+# category write orphans every cached page; the orphans expire on their TTL.
+VERSION_KEY = "problems:catalogue:version"
+PAGE_KEY = "problems:list:{}:{}"
+
+REQUESTS = metrics.counter(
+    "problem_list_cache_requests_total",
+    "Problem list page lookups by result (hit, miss, bypass).",
+    ("result",),
+)
+BUILD_SECONDS = metrics.histogram(
+    "problem_list_build_seconds",
+    "Time spent querying and serializing a problem list page on a cache miss.",
+)
+
+
+def _ttl():
+    return getattr(settings, "PROBLEM_LIST_CACHE_TTL", 60)
+
+
+def is_enabled():
+    return _ttl() > 0
+
+
+def catalogue_version():
+    return redis_client.get(VERSION_KEY) or "0"
+
+
+def bump_version():
+    try:
+        redis_client.incr(VERSION_KEY)
+    except Exception as e:
+        logger.error(f"Failed to bump problem catalogue version: {str(e)}")
+
+
+def bump_version_on_commit():
+    """Bump once the current transaction commits, so no page is rebuilt from data about to change."""
+    transaction.on_commit(bump_version)
+
+
+def page_key(version, params):
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return PAGE_KEY.format(version, h)
+
+
+def _build(build):
+    started = time.monotonic()
+    payload = build()
+    BUILD_SECONDS.observe(time.monotonic() - started)
+    return payload
+
+
+def get_or_build(params, build):
+    """
+    The shared (not user-specific) payload of one list page: the cached
+    copy for params at the current catalogue version, or build() stored
+    for next time. Without Redis every request builds its own page.
+    """
+    if not is_enabled():
+        REQUESTS.inc(result="bypass")
+        return _build(build)
+
+    try:
+        key = page_key(catalogue_version(), params)
+        cached = redis_client.get(key)
+    except Exception as e:
+        logger.error(f"Failed to read problem list cache: {str(e)}")
+        REQUESTS.inc(result="bypass")
+        return _build(build)
+
+    if cached is not None:
+        REQUESTS.inc(result="hit")
+        return json.loads(cached)
+
+    REQUESTS.inc(result="miss")
+    payload = _build(build)
+    try:
+        redis_client.setex(key, _ttl(), json.dumps(payload))
+    except Exception as e:
+        logger.error(f"Failed to store problem list page: {str(e)}")
+    return payload
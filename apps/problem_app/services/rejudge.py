@@ -0,0 +1,207 @@
+# apps/problem_app/services/rejudge.py
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from apps.problem_app.models import Problem, Submission
+from apps.problem_app.services import judge_bundle, perf_histogram, problem_counters, solved_problems
+from apps.problem_app.services.judge_service import grade_submission
+
+logger = logging.getLogger(__name__)
+
+# Queued submissions are judged by the worker against the current test cases anyway.
+SKIPPED_STATUSES = ("Pending", "Judging")
+VERDICT_FIELDS = ["status", "passed_count", "total_count", "runtime", "memory"]
+POOL_SETTINGS = ("JUDGE_PYTHON_POOL_SIZE", "JUDGE_JS_POOL_SIZE", "JUDGE_JAVA_DAEMON_POOL_SIZE")
+
+_problem = None
+
+
+class CheckpointMismatch(Exception):
+    pass
+
+
+def _init_worker(problem):
+    global _problem
+
+    _problem = problem
+    # Each worker judges one submission at a time; one warm runtime per language is enough.
+    for name in POOL_SETTINGS:
+        setattr(settings, name, min(getattr(settings, name, 0), 1))
+
+
+def _judge(problem, submission_id, language, code):
+    try:
+        graded = grade_submission(problem, language, code)
+    except Exception as e:
+        logger.error(f"Error rejudging submission {submission_id}: {str(e)}")
+        return {"status": "Runtime Error", "passed_count": 0, "total_count": 0, "runtime": 0.0, "memory": 0.0}
+    return {
+        "status": graded["status"],
+        "passed_count": graded["passed"],
+        "total_count": graded["total"],
+        "runtime": graded["runtime"],
+        "memory": graded["memory"],
+    }
+
+
+def _judge_in_worker(job):
+    return _judge(_problem, *job)
+
+
+def submissions_to_rejudge(problem, since=None, statuses=None, after_id=0):
+    queryset = Submission.objects.filter(problem=problem, id__gt=after_id)
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    else:
+        queryset = queryset.exclude(status__in=SKIPPED_STATUSES)
+    return queryset.order_by("id")
+
+
+class Checkpoint:
+    """
+    Progress of one rejudge run, saved after every batch so an interrupted
+    run resumes after the last submission written back.
+    """
+
+    def __init__(self, path, problem, since, statuses):
+        self.path = path
+        self.scope = {
+            "problem_id": problem.id,
+            "testcase_version": problem.testcase_version,
+            "since": since.isoformat() if since else None,
+            "statuses": sorted(statuses or []),
+        }
+        self.last_id = 0
+        self.judged = 0
+        self.changed = {}
+
+    def load(self):
+        """Resume from the file if there is one; raises CheckpointMismatch if it belongs to another run."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("scope") != self.scope:
+            raise CheckpointMismatch(
+                f"{self.path} was written for {data.get('scope')}, not {self.scope}"
+            )
+        self.last_id = data["last_id"]
+        self.judged = data["judged"]
+        self.changed = data["changed"]
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        staging = f"{self.path}.tmp"
+        with open(staging, "w") as f:
+            json.dump({
+                "scope": self.scope,
+                "last_id": self.last_id,
+                "judged": self.judged,
+                "changed": self.changed,
+            }, f)
+        os.replace(staging, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def recompute_problem_stats(problem):
+    """Rebuild the problem's submission counters from its submissions in one query."""
+    # Increments still buffered are for submissions the count below includes.
+    problem_counters.COUNTERS.discard(problem.pk)
+    stats = Submission.objects.filter(problem=problem).exclude(status__in=SKIPPED_STATUSES).aggregate(
+        total=Count("id"), accepted=Count("id", filter=Q(status="Accepted"))
+    )
+    Problem.objects.filter(pk=problem.pk).update(
+        total_submissions=stats["total"], accepted_submissions=stats["accepted"]
+    )
+    problem.total_submissions = stats["total"]
+    problem.accepted_submissions = stats["accepted"]
+    return stats
+
+
+def _write_back(batch, verdicts, checkpoint):
+    updated = []
+    for submission, verdict in zip(batch, verdicts):
+        if submission.status != verdict["status"]:
+            change = f"{submission.status} -> {verdict['status']}"
+            checkpoint.changed[change] = checkpoint.changed.get(change, 0) + 1
+        for field, value in verdict.items():
+            setattr(submission, field, value)
+        updated.append(submission)
+    Submission.objects.bulk_update(updated, VERDICT_FIELDS)
+    checkpoint.last_id = batch[-1].id
+    checkpoint.judged += len(batch)
+    checkpoint.save()
+
+
+def rejudge_problem(problem, since=None, statuses=None, workers=None, batch_size=200,
+                    checkpoint_path=None, on_progress=None):
+    """
+    Re-judge a problem's submissions against its current test cases.
+    Submissions are streamed in id order and judged by a pool of `workers`
+    processes (0 judges in this process); verdicts are written back with
+    bulk_update one batch at a time; the problem's counters, percentile
+    histograms and solved rows are rebuilt at the end. Returns the final
+    Checkpoint.
+    """
+    checkpoint = Checkpoint(checkpoint_path, problem, since, statuses)
+    checkpoint.load()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    pool = None
+    if workers > 0:
+        # Forked workers inherit the cached judge bundle, so they never need
+        # the database; close our connections first so none are shared, and
+        # start every worker before the submission cursor is opened.
+        judge_bundle.get_bundle(problem)
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker, initargs=(problem,)
+        )
+        pool.submit(int).result()
+
+    queryset = submissions_to_rejudge(problem, since, statuses, checkpoint.last_id)
+    total = checkpoint.judged + queryset.count()
+    rows = queryset.only("id", "language", "code", "status").iterator(chunk_size=batch_size)
+    started = time.monotonic()
+    judged_before = checkpoint.judged
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            jobs = [(s.id, s.language, s.code) for s in batch]
+            if pool:
+                verdicts = list(pool.map(_judge_in_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+            else:
+                verdicts = [_judge(problem, *job) for job in jobs]
+            _write_back(batch, verdicts, checkpoint)
+
+            if on_progress:
+                elapsed = time.monotonic() - started
+                on_progress(checkpoint, total, (checkpoint.judged - judged_before) / elapsed if elapsed else 0.0)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    recompute_problem_stats(problem)
+    perf_histogram.rebuild(problem)
+    solved_problems.rebuild_for_problem(problem)
+    checkpoint.remove()
+    return checkpoint
@@ -0,0 +1,150 @@
+# apps/problem_app/services/solved_problems.py
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from common.redis_client import redis_client
+from apps.auth_app.models import UserProfile
+from apps.auth_app.services import profile_counters
+from apps.problem_app.models import Submission, UserSolvedProblem
+
+logger = logging.getLogger(__name__)
+
+# Redis set of the problem ids a user has solved. The LOADED member marks a
+# set built from the table; a set without it (e.g. one that expired while
+# being added to) is treated as missing and rebuilt.
+SOLVED_KEY = "solved:{}"
+LOADED = "*"
+
+
+def _ttl():
+    return getattr(settings, "SOLVED_CACHE_TTL", 86400)
+
+
+def _load(user_id):
+    """Build the user's cached set from the table and return their solved problem ids."""
+    solved = set(UserSolvedProblem.objects.filter(user_id=user_id).values_list("problem_id", flat=True))
+    key = SOLVED_KEY.format(user_id)
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    pipe.sadd(key, LOADED, *solved)
+    pipe.expire(key, _ttl())
+    pipe.execute()
+    return solved
+
+
+def solved_among(user, problem_ids):
+    """The subset of problem_ids the user has solved; only these ids are checked."""
+    problem_ids = list(problem_ids)
+    if not problem_ids or not user.is_authenticated:
+        return set()
+    try:
+        loaded, *flags = redis_client.smismember(SOLVED_KEY.format(user.id), [LOADED, *problem_ids])
+        if loaded:
+            return {problem_id for problem_id, flag in zip(problem_ids, flags) if flag}
+        return _load(user.id) & set(problem_ids)
+    except Exception as e:
+        logger.error(f"Failed to read solved problems for user {user.id}: {str(e)}")
+        return set(
+            UserSolvedProblem.objects.filter(user=user, problem_id__in=problem_ids)
+            .values_list("problem_id", flat=True)
+        )
+
+
+def record_accepted(submission):
+    """
+    Note an accepted submission: the first one for its problem creates the
+    UserSolvedProblem row, later ones may lower its best runtime.
+    Returns True on the user's first solve of the problem.
+    """
+    solved, created = UserSolvedProblem.objects.get_or_create(
+        user_id=submission.user_id,
+        problem_id=submission.problem_id,
+        defaults={"first_solved_at": submission.created_at, "best_runtime": submission.runtime},
+    )
+    if not created:
+        UserSolvedProblem.objects.filter(pk=solved.pk, best_runtime__gt=submission.runtime).update(
+            best_runtime=submission.runtime
+        )
+        return False
+
+    key = SOLVED_KEY.format(submission.user_id)
+    try:
+        # Only add to sets that are complete; a missing one is rebuilt on next read.
+        if redis_client.sismember(key, LOADED):
+            redis_client.sadd(key, submission.problem_id)
+    except Exception as e:
+        logger.error(f"Failed to cache solved problem for user {submission.user_id}: {str(e)}")
+    return True
+
+
+def rebuild_for_problem(problem):
+    """
+    Recreate a problem's solved rows from its accepted submissions (after
+    a rejudge) and correct the affected users' problems_solved counters.
+    """
+    before = set(UserSolvedProblem.objects.filter(problem=problem).values_list("user_id", flat=True))
+    rows = [
+        UserSolvedProblem(
+            user_id=row["user_id"], problem=problem,
+            first_solved_at=row["first_solved_at"], best_runtime=row["best_runtime"],
+        )
+        for row in Submission.objects.filter(problem=problem, status="Accepted").values("user_id").annotate(
+            first_solved_at=Min("created_at"), best_runtime=Min("runtime")
+        ).order_by().iterator()
+    ]
+    with transaction.atomic():
+        UserSolvedProblem.objects.filter(problem=problem).delete()
+        UserSolvedProblem.objects.bulk_create(rows, batch_size=1000)
+
+    after = {row.user_id for row in rows}
+    for user_id in before - after:
+        profile_counters.COUNTERS.incr(user_id, problems_solved=-1)
+    for user_id in after - before:
+        profile_counters.COUNTERS.incr(user_id, problems_solved=1)
+
+    changed = before ^ after
+    if changed:
+        try:
+            redis_client.delete(*(SOLVED_KEY.format(user_id) for user_id in changed))
+        except Exception as e:
+            logger.error(f"Failed to drop solved problem caches for problem {problem.id}: {str(e)}")
+    return len(rows)
+
+
+def backfill(batch_size=1000):
+    """
+    Create UserSolvedProblem rows for every solved (user, problem) pair in
+    the accepted submissions, keeping rows that already exist. Returns the
+    number of pairs found.
+    """
+    found = 0
+    batch = []
+    rows = Submission.objects.filter(status="Accepted").values("user_id", "problem_id").annotate(
+        first_solved_at=Min("created_at"), best_runtime=Min("runtime")
+    ).order_by()
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(UserSolvedProblem(**row))
+        if len(batch) >= batch_size:
+            found += len(UserSolvedProblem.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        found += len(UserSolvedProblem.objects.bulk_create(batch, ignore_conflicts=True))
+    return found
+
+
+def recount_profiles():
+    """Set every UserProfile.problems_solved from the solved table and drop the cached sets."""
+    solved = UserSolvedProblem.objects.filter(user_id=OuterRef("user_id")).order_by().values("user_id").annotate(
+        count=Count("id")
+    ).values("count")
+    updated = UserProfile.objects.update(problems_solved=Coalesce(Subquery(solved), 0))
+    try:
+        keys = list(redis_client.scan_iter(match=SOLVED_KEY.format("*")))
+        if keys:
+            redis_client.delete(*keys)
+    except Exception as e:
+        logger.error(f"Failed to drop solved problem caches: {str(e)}")
+    return updated
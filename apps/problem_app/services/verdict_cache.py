@@ -0,0 +1,191 @@
+# apps/problem_app/services/verdict_cache.py
+
+import dataclasses
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from common.redis_client import redis_client
+from apps.problem_app.judge.execution_base import TIME_LIMIT_EXCEEDED, ExecutionResult
+
+logger = logging.getLogger(__name__)
+
+RESULT_KEY = "judge:verdict:{}"
+STATS_KEY = "judge:verdict:stats"
+
+# Load-dependent outcomes are worth judging again.
+UNCACHEABLE_ERRORS = ("Timeout Error", TIME_LIMIT_EXCEEDED, "Internal Error")
+
+# Shared hit/miss counts are batched locally and ride along with the next
+# Redis GET; a process serving only L1 hits flushes on its own this often.
+STATS_FLUSH_EVERY = 64
+
+_l1 = OrderedDict()
+_l1_lock = threading.Lock()
+_local_stats = {"hits": 0, "misses": 0}
+_pending_stats = {"hits": 0, "misses": 0}
+
+
+def _ttl():
+    return getattr(settings, "JUDGE_VERDICT_CACHE_TTL", 86400)
+
+
+def _l1_size():
+    return getattr(settings, "JUDGE_VERDICT_CACHE_L1_SIZE", 512)
+
+
+def is_enabled():
+    return _ttl() > 0
+
+
+def normalize_code(code):
+    """Ignore differences that cannot change behaviour: line endings and trailing whitespace."""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def cache_key(problem, language, code, fail_fast=False):
+    h = hashlib.sha256()
+    for part in (normalize_code(code), language.lower(), str(problem.id),
+                 str(problem.testcase_version), "ff" if fail_fast else "all"):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _count(name):
+    with _l1_lock:
+        _local_stats[name] += 1
+        _pending_stats[name] += 1
+        pending = sum(_pending_stats.values())
+    if pending >= STATS_FLUSH_EVERY:
+        _flush_stats()
+
+
+def _take_pending():
+    with _l1_lock:
+        pending = {k: v for k, v in _pending_stats.items() if v}
+        _pending_stats.update(hits=0, misses=0)
+    return pending
+
+
+def _restore_pending(pending):
+    with _l1_lock:
+        for name, amount in pending.items():
+            _pending_stats[name] += amount
+
+
+def _queue_stats(pipe, pending):
+    for name, amount in pending.items():
+        pipe.hincrby(STATS_KEY, name, amount)
+
+
+def _flush_stats():
+    pending = _take_pending()
+    if not pending:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        _queue_stats(pipe, pending)
+        pipe.execute()
+    except Exception as e:
+        _restore_pending(pending)
+        logger.error(f"Failed to record verdict cache stats: {str(e)}")
+
+
+def _redis_get(key):
+    """GET the cached verdict, sending any batched stats in the same round trip."""
+    pending = _take_pending()
+    try:
+        pipe = redis_client.pipeline()
+        pipe.get(RESULT_KEY.format(key))
+        _queue_stats(pipe, pending)
+        return pipe.execute()[0]
+    except Exception as e:
+        _restore_pending(pending)
+        logger.error(f"Verdict cache lookup failed: {str(e)}")
+        return None
+
+
+def _l1_get(key):
+    with _l1_lock:
+        entry = _l1.get(key)
+        if entry is None:
+            return None
+        expires, data = entry
+        if expires < time.monotonic():
+            del _l1[key]
+            return None
+        _l1.move_to_end(key)
+        return data
+
+
+def _l1_put(key, data):
+    size = _l1_size()
+    if size <= 0:
+        return
+    with _l1_lock:
+        _l1[key] = (time.monotonic() + _ttl(), data)
+        _l1.move_to_end(key)
+        while len(_l1) > size:
+            _l1.popitem(last=False)
+
+
+def get(key):
+    """Cached ExecutionResult for key, or None. Counts a hit or miss."""
+    data = _l1_get(key)
+    if data is None:
+        data = _redis_get(key)
+        if data is not None:
+            _l1_put(key, data)
+
+    if data is None:
+        _count("misses")
+        return None
+
+    _count("hits")
+    return ExecutionResult(**json.loads(data))
+
+
+def put(key, exec_result):
+    if exec_result.error_type in UNCACHEABLE_ERRORS:
+        return
+    data = dataclasses.asdict(exec_result)
+    data.pop("phases", None)
+    data = json.dumps(data, default=str)
+    _l1_put(key, data)
+    try:
+        redis_client.setex(RESULT_KEY.format(key), _ttl(), data)
+    except Exception as e:
+        logger.error(f"Failed to store cached verdict: {str(e)}")
+
+
+def stats():
+    """Hit/miss counters for this process and across all judge processes."""
+    _flush_stats()
+    try:
+        shared = {k: int(v) for k, v in redis_client.hgetall(STATS_KEY).items()}
+    except Exception as e:
+        logger.error(f"Failed to read verdict cache stats: {str(e)}")
+        shared = {}
+
+    with _l1_lock:
+        local = dict(_local_stats, l1_entries=len(_l1))
+
+    total = shared.get("hits", 0) + shared.get("misses", 0)
+    return {
+        "hits": shared.get("hits", 0),
+        "misses": shared.get("misses", 0),
+        "hit_ratio": round(shared.get("hits", 0) / total, 4) if total else 0.0,
+        "local": local,
+    }
+
+
+def clear_local():
+    with _l1_lock:
+        _l1.clear()
+        _local_stats.update(hits=0, misses=0)
+        _pending_stats.update(hits=0, misses=0)
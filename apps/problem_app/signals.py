@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.problem_app.models import Category, Problem
+from apps.problem_app.services import problem_list_cache
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_problem_list(sender, **kwargs):
+    problem_list_cache.bump_version_on_commit()
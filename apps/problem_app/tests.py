@@ -1,3 +1,1762 @@
-from django.test import TestCase
+import fnmatch
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .judge import compile_cache, cpp_pch, cpp_runner, dispatcher, java_daemon, js_pool, js_runner, python_pool, python_runner, timing, wire, workspace
+from .judge.execution_base import ExecutionResult
+from .judge import comparison
+from .judge.comparison import Comparator, judge
+from .judge.streaming import RECORD_PREFIX, RecordCollector, parse_plain_value
+from .models import Category, PerformanceHistogram, Problem, Submission, TestCases, UserSolvedProblem
+from .serializers import ProblemSerializer
+from .services import judge_admission, judge_bench, judge_bundle, judge_metrics, judge_queue, judge_service, perf_histogram, problem_counters, problem_list_cache, rejudge, solved_problems, verdict_cache
+from .views import JudgeMetricsView, ProblemDetailView, ProblemListView, RunCodeView, SubmitCodeView, SubmissionStatusView, VerdictCacheStatsView
+from common import counters, metrics
+from apps.auth_app.models import UserProfile
+from apps.auth_app.services import profile_counters
+from apps.subscription_app.models import Plan, Subscription
+
+User = get_user_model()
+
+
+def _tc(args, expected=None):
+    return SimpleNamespace(input=args, expected_output=expected)
+
+
+def _reset_python_pool():
+    if python_pool._pool is not None:
+        python_pool._pool.shutdown()
+        python_pool._pool = None
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=1, JUDGE_PYTHON_POOL_MAX_JOBS=2)
+class PythonWorkerPoolTest(SimpleTestCase):
+    def tearDown(self):
+        _reset_python_pool()
+
+    def test_runs_code_in_pooled_worker(self):
+        code = "def add(a, b):\n    print('hi')\n    return a + b\n"
+        result = python_pool.run_python_pooled(code, [_tc([1, 2]), _tc([3, 4])], "add")
+
+        self.assertIsNone(result.error)
+        self.assertEqual(result.outputs, [3, 7])
+        self.assertEqual(len(result.runtimes), 2)
+        self.assertEqual(result.stdout, "hi\nhi")
+
+    def test_each_job_gets_fresh_namespace(self):
+        python_pool.run_python_pooled("LEAK = 1\ndef f():\n    return 0\n", [_tc([])], "f")
+        result = python_pool.run_python_pooled("def f():\n    return LEAK\n", [_tc([])], "f")
+
+        self.assertEqual(result.outputs, ["name 'LEAK' is not defined"])
+
+    def test_worker_recycled_after_max_jobs(self):
+        pool = python_pool.get_pool()
+        first = pool._workers[0]
+        for _ in range(2):
+            python_pool.run_python_pooled("def f():\n    return 1\n", [_tc([])], "f")
+
+        self.assertNotIn(first, pool._workers)
+        self.assertEqual(len(pool._workers), 1)
+
+    def test_timeout_and_syntax_error(self):
+        result = python_pool.run_python_pooled(
+            "def f():\n    while True: pass\n", [_tc([])], "f"
+        )
+        self.assertEqual(result.error_type, "Timeout Error")
+
+        result = python_pool.run_python_pooled("def f(:\n", [_tc([])], "f")
+        self.assertEqual(result.error_type, "Runtime Error")
+        self.assertIn("SyntaxError", result.error)
+
+    def test_cancel_sent_with_the_job_is_not_missed(self):
+        worker = python_pool.PythonWorker()
+        self.addCleanup(worker.close)
+        frames = b""
+        for payload in (
+            {"code": "def f():\n    while True: pass\n", "testcases": [[]], "function_name": "f",
+             "timeout": 30, "record_prefix": "@@JUDGE@@"},
+            {"cancel": True},
+        ):
+            data = json.dumps(payload).encode()
+            frames += python_pool.HEADER.pack(len(data)) + data
+        # One write, so a buffered reader would swallow the cancel with the job.
+        worker.process.stdin.write(frames)
+        worker.process.stdin.flush()
+
+        self.assertTrue(worker._receive(time.monotonic() + 5).get("cancelled"))
+
+
+def _reset_java_daemons():
+    if java_daemon._pool is not None:
+        java_daemon._pool.shutdown()
+        java_daemon._pool = None
+
+
+JAVA_ADD = "class Solution { public int add(int a, int b) { return a + b; } }"
+JAVA_PARAMS = [{"name": "a", "type": "int"}, {"name": "b", "type": "int"}]
+
+
+@override_settings(JUDGE_JAVA_DAEMON_POOL_SIZE=1)
+class JavaDaemonTest(SimpleTestCase):
+    def tearDown(self):
+        _reset_java_daemons()
+
+    def test_falls_back_to_subprocess_without_pool(self):
+        expected = ExecutionResult(outputs=["3"])
+        with mock.patch.object(java_daemon, "get_pool", return_value=None), \
+                mock.patch.object(java_daemon, "run_java", return_value=expected) as run_java:
+            result = java_daemon.run_java_daemon(JAVA_ADD, [_tc([1, 2])], "add", parameters=JAVA_PARAMS)
+
+        self.assertIs(result, expected)
+        run_java.assert_called_once()
+
+    def test_falls_back_when_no_daemon_is_free(self):
+        pool = mock.Mock()
+        pool.lease.side_effect = python_pool.WorkerError("No idle judge worker available")
+        expected = ExecutionResult(outputs=["3"])
+        with mock.patch.object(java_daemon, "get_pool", return_value=pool), \
+                mock.patch.object(java_daemon, "run_java", return_value=expected) as run_java:
+            result = java_daemon.run_java_daemon(JAVA_ADD, [_tc([1, 2])], "add", parameters=JAVA_PARAMS)
+
+        self.assertIs(result, expected)
+        run_java.assert_called_once()
+
+    @skipUnless(shutil.which("java"), "requires a JDK")
+    def test_runs_submissions_in_isolated_loaders(self):
+        code = (
+            "class Solution { static int calls = 0;\n"
+            "  public int add(int a, int b) { calls++; System.out.println(calls); return a + b; } }"
+        )
+        for _ in range(2):
+            result = java_daemon.run_java_daemon(code, [_tc([1, 2]), _tc([3, 4])], "add", parameters=JAVA_PARAMS)
+            self.assertIsNone(result.error)
+            self.assertEqual(result.outputs, ["3", "7"])
+            # Static state starts over for every job.
+            self.assertEqual(result.stdout, "1\n2")
+        self.assertEqual(java_daemon.get_pool()._workers[0].jobs, 2)
+
+    @skipUnless(shutil.which("java"), "requires a JDK")
+    def test_compile_error_and_timeout(self):
+        result = java_daemon.run_java_daemon("class Solution { int add(", [_tc([1, 2])], "add", parameters=JAVA_PARAMS)
+        self.assertEqual(result.error_type, "Compilation Error")
+        self.assertIn("Solution.java", result.error)
+
+        pool = java_daemon.get_pool()
+        first = pool._workers[0]
+        code = "class Solution { public int add(int a, int b) { while (true) {} } }"
+        result = java_daemon.run_java_daemon(code, [_tc([1, 2])], "add", parameters=JAVA_PARAMS, timeout=1)
+        self.assertEqual(result.error_type, "Timeout Error")
+        # The JVM cannot stop the runaway thread, so the daemon is replaced.
+        self.assertNotIn(first, pool._workers)
+
+
+def _reset_js_pool():
+    if js_pool._pool is not None:
+        js_pool._pool.shutdown()
+        js_pool._pool = None
+
+
+@override_settings(JUDGE_JS_POOL_SIZE=1)
+class JsWorkerPoolTest(SimpleTestCase):
+    def tearDown(self):
+        _reset_js_pool()
+
+    def test_each_job_gets_fresh_globals(self):
+        js_pool.run_js_pooled("globalThis.LEAK = 1;\nfunction f() { return 0; }", [_tc([])], "f")
+        result = js_pool.run_js_pooled("function f() { return typeof LEAK; }", [_tc([])], "f")
+
+        self.assertIsNone(result.error)
+        self.assertEqual(result.outputs, ["undefined"])
+        self.assertEqual(js_pool.get_pool()._workers[0].jobs, 2)
+
+    def test_unknown_function_and_syntax_error(self):
+        result = js_pool.run_js_pooled("function g() { return 1; }", [_tc([])], "f")
+        self.assertEqual(result.outputs, ["f is not defined"])
+
+        result = js_pool.run_js_pooled("function f( {", [_tc([])], "f")
+        self.assertEqual(result.error_type, "Runtime Error")
+        self.assertIn("SyntaxError", result.error)
+
+    def test_timeout_keeps_worker(self):
+        pool = js_pool.get_pool()
+        worker = pool._workers[0]
+        result = js_pool.run_js_pooled("function f() { while (true) {} }", [_tc([])], "f", timeout=1)
+        self.assertEqual(result.error_type, "Timeout Error")
+
+        # The isolate is terminated, not the node process.
+        result = js_pool.run_js_pooled("function f() { return 1; }", [_tc([])], "f")
+        self.assertEqual(result.outputs, [1])
+        self.assertEqual(pool._workers, [worker])
+
+    def test_heap_limit(self):
+        code = "function f() { const a = []; while (true) a.push(new Array(1e5).fill(1)); }"
+        result = js_pool.run_js_pooled(code, [_tc([])], "f", memory_limit=32)
+
+        self.assertEqual(result.error_type, "Memory Limit Exceeded")
+
+    def test_fail_fast_cancels_job(self):
+        code = "function f(n) { if (n > 0) while (true) {} return n; }"
+        started = time.monotonic()
+        result = js_pool.run_js_pooled(code, [_tc([0], 1), _tc([1], 1)], "f", fail_fast=True)
+
+        self.assertEqual(result.failed_index, 0)
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class CppHeaderTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    @override_settings(JUDGE_CPP_OPTIMIZATION="O1", JUDGE_CPP_PIPE=False)
+    def test_compile_flags_fall_back_to_settings(self):
+        self.assertEqual(cpp_pch.compile_flags(), ["-O1"])
+        self.assertEqual(cpp_pch.compile_flags("O2", True), ["-O2", "-pipe"])
+        # -pipe doesn't change the code, so it shares the precompiled header.
+        self.assertEqual(cpp_pch._directory(["-O2", "-pipe"]), cpp_pch._directory(["-O2"]))
+        self.assertNotEqual(cpp_pch._directory(["-O2"]), cpp_pch._directory(["-O0"]))
+
+    @override_settings(JUDGE_COMPILE_CACHE_MAX_BYTES=0)
+    def test_builds_with_precompiled_header_and_problem_flags(self):
+        with override_settings(JUDGE_CPP_PCH_DIR=self.tmp.name):
+            directory = cpp_pch.include_dir(["-O2"], wait=True)
+            self.assertTrue(os.path.exists(os.path.join(directory, cpp_pch.HEADER_NAME + ".gch")))
+
+            code = "class Solution { public: int distinct(vector<int> v) { return set<int>(v.begin(), v.end()).size(); } };"
+            with mock.patch.object(cpp_runner.subprocess, "run", wraps=cpp_runner.subprocess.run) as run:
+                result = cpp_runner.run_cpp(
+                    code, [_tc([[1, 1, 2]])], "distinct", parameters=[{"name": "v", "type": "int[]"}],
+                    compile_flags=["-O2", "-pipe"]
+                )
+
+        self.assertEqual(result.outputs, ["2"])
+        compile_cmd = next(c.args[0] for c in run.call_args_list if "solution.cpp" in c.args[0])
+        self.assertEqual(compile_cmd[:5], ["g++", "-O2", "-pipe", "-I", directory])
+
+    def test_failed_header_build_is_not_retried_on_every_compile(self):
+        self.addCleanup(cpp_pch._failed.clear)
+        failed = subprocess.CompletedProcess([], 1)
+        with override_settings(JUDGE_CPP_PCH_DIR=self.tmp.name), \
+                mock.patch.object(cpp_pch.subprocess, "run", return_value=failed) as run:
+            directory = cpp_pch.include_dir(["-O3"], wait=True)
+            self.assertEqual(cpp_pch.include_dir(["-O3"]), directory)
+            cpp_pch.include_dir(["-O3"], wait=True)
+
+        self.assertEqual(run.call_count, 1)
+        self.assertFalse(os.path.exists(os.path.join(directory, cpp_pch.HEADER_NAME + ".gch")))
+
+    def test_default_directory_is_private(self):
+        path = os.path.join(self.tmp.name, "pch")
+        self.assertEqual(cpp_pch._private_dir(path), path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+
+        os.chmod(path, 0o777)
+        fallback = cpp_pch._private_dir(path)
+        self.addCleanup(shutil.rmtree, fallback)
+        self.assertNotEqual(fallback, path)
+        self.assertEqual(os.stat(fallback).st_mode & 0o777, 0o700)
+
+    @override_settings(JUDGE_COMPILE_CACHE_MAX_BYTES=0)
+    def test_user_code_may_reuse_harness_and_std_names(self):
+        code = (
+            "#include <regex>\n"
+            "#define TWICE(x) \\\n"
+            "    ((x) * 2)\n"
+            "int judge_out = 0;\n"
+            "void print_res(int) {}\n"
+            "void read_val(int&) {}\n"
+            "int count(const vector<int>& v) { return v.size(); }\n"
+            "class Solution { public: int f(vector<int> v) {\n"
+            "    judge_out = TWICE(count(v));\n"
+            "    return regex_match(\"ab\", regex(\"a.\")) ? judge_out : -1;\n"
+            "} };\n"
+        )
+        with override_settings(JUDGE_CPP_PCH_DIR=self.tmp.name):
+            result = cpp_runner.run_cpp(code, [_tc([[1, 2, 3]])], "f", parameters=[{"name": "v", "type": "int[]"}])
+
+        self.assertIsNone(result.error, result.error)
+        self.assertEqual(result.outputs, ["6"])
+
+    @override_settings(JUDGE_COMPILE_CACHE_MAX_BYTES=0)
+    def test_user_code_stays_at_global_scope(self):
+        code = (
+            "#include <unordered_set>\n"
+            "struct P { int x; bool operator==(const P& o) const { return x == o.x; } };\n"
+            "namespace std { template<> struct hash<P> { size_t operator()(const P& p) const { return p.x; } }; }\n"
+            "int seen = 0;\n"
+            "class Solution { public: int f(vector<int> v) {\n"
+            "    unordered_set<P> s;\n"
+            "    for (int x : v) s.insert(P{x});\n"
+            "    ::seen = s.size();\n"
+            "    return ::seen;\n"
+            "} };\n"
+        )
+        with override_settings(JUDGE_CPP_PCH_DIR=self.tmp.name):
+            result = cpp_runner.run_cpp(code, [_tc([[1, 2, 2]])], "f", parameters=[{"name": "v", "type": "int[]"}])
+
+        self.assertIsNone(result.error, result.error)
+        self.assertEqual(result.outputs, ["2"])
+
+
+class CompileCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _build(self, name, size):
+        build_dir = os.path.join(self.tmp.name, "build")
+        os.makedirs(build_dir, exist_ok=True)
+        with open(os.path.join(build_dir, name), "wb") as f:
+            f.write(b"x" * size)
+        return build_dir
+
+    def test_key_depends_on_every_input(self):
+        key = compile_cache.CompileCache.key("cpp", ["-O2"], "1", "code")
+        self.assertEqual(key, compile_cache.CompileCache.key("cpp", ["-O2"], "1", "code"))
+        self.assertNotEqual(key, compile_cache.CompileCache.key("cpp", ["-O0"], "1", "code"))
+        self.assertNotEqual(key, compile_cache.CompileCache.key("cpp", ["-O2"], "2", "code"))
+        self.assertNotEqual(key, compile_cache.CompileCache.key("java", ["-O2"], "1", "code"))
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = compile_cache.CompileCache(os.path.join(self.tmp.name, "cache"), max_bytes=250)
+        cache.put("a", self._build("bin", 100), ["bin"])
+        cache.put("b", self._build("bin", 100), ["bin"])
+        old = time.time() - 60
+        os.utime(os.path.join(cache.root, "b"), (old, old))
+        cache.get("a")
+        cache.put("c", self._build("bin", 100), ["bin"])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_scans_only_when_tracked_size_passes_the_limit(self):
+        cache = compile_cache.CompileCache(os.path.join(self.tmp.name, "cache"), max_bytes=1000)
+        with mock.patch.object(cache, "_entries", wraps=cache._entries) as scans:
+            for key in "abcdefgh":
+                cache.put(key, self._build("bin", 100), ["bin"])
+            self.assertEqual(scans.call_count, 1)  # the first put learns the size
+
+            for key in "ijk":
+                cache.put(key, self._build("bin", 100), ["bin"])
+            self.assertEqual(scans.call_count, 2)
+
+        # Trimmed to the low-water mark, leaving room before the next scan.
+        self.assertEqual(len(cache._entries()), 8)
+
+    def test_cpp_cache_hit_skips_compiler(self):
+        cache = compile_cache.CompileCache(os.path.join(self.tmp.name, "cache"), max_bytes=10 ** 8)
+        code = "class Solution { public: int add(int a, int b) { return a + b; } };"
+        testcases = [_tc([1, 2])]
+
+        with mock.patch.object(cpp_runner, "get_compile_cache", return_value=cache), \
+                mock.patch.object(cpp_runner.subprocess, "run", wraps=cpp_runner.subprocess.run) as run:
+            first = cpp_runner.run_cpp(code, testcases, "add")
+            compiles = sum(1 for c in run.call_args_list if "solution.cpp" in c.args[0])
+            second = cpp_runner.run_cpp(code, testcases, "add")
+
+        self.assertEqual(first.outputs, ["3"])
+        self.assertEqual(second.outputs, ["3"])
+        self.assertEqual(compiles, 1)
+        self.assertEqual(sum(1 for c in run.call_args_list if "solution.cpp" in c.args[0]), 1)
+
+
+class WorkspaceTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_sandbox_is_reused_and_emptied(self):
+        ws = workspace.Workspace(self.tmp.name)
+        with ws.sandbox() as first:
+            os.makedirs(os.path.join(first, "sub"))
+            with open(os.path.join(first, "sub", "out.txt"), "w") as f:
+                f.write("x")
+            with ws.sandbox() as concurrent:
+                self.assertNotEqual(concurrent, first)
+        with ws.sandbox() as again:
+            self.assertIn(again, (first, concurrent))
+            self.assertEqual(os.listdir(again), [])
+
+    def test_sweeps_sandboxes_of_exited_processes(self):
+        stale = os.path.join(self.tmp.name, "999999999-0")
+        os.makedirs(stale)
+        workspace.Workspace(self.tmp.name)
+        self.assertFalse(os.path.exists(stale))
+
+    def test_interpreted_runs_leave_workspace_empty(self):
+        cases = (
+            (python_runner.run_python, "def f(a):\n    open('scratch', 'w').write('x')\n    return a * 2"),
+            (js_runner.run_js, "function f(a) { require('fs').writeFileSync('scratch', 'x'); return a * 2; }"),
+        )
+        for memfd in (True, False):
+            with override_settings(JUDGE_WORKSPACE_DIR=self.tmp.name, JUDGE_WORKSPACE_MEMFD=memfd):
+                for run, code in cases:
+                    with self.subTest(run=run.__name__, memfd=memfd):
+                        result = run(code, [_tc([2])], "f")
+                        self.assertEqual(result.outputs, [4])
+                        for name in os.listdir(self.tmp.name):
+                            self.assertEqual(os.listdir(os.path.join(self.tmp.name, name)), [])
+
+
+class WireProtocolTest(SimpleTestCase):
+    def test_parses_parameter_types(self):
+        self.assertEqual(wire.parse_type("int"), ("int", 0))
+        self.assertEqual(wire.parse_type("int[][]"), ("int", 2))
+        self.assertEqual(wire.parse_type("List[str]"), ("string", 1))
+        self.assertEqual(wire.parse_type("vector<vector<bool>>"), ("bool", 2))
+        self.assertIsNone(wire.parse_type("TreeNode"))
+        self.assertIsNone(wire.signature([{"name": "root", "type": "TreeNode"}]))
+
+    def test_encodes_typed_arguments(self):
+        data = wire.encode_typed([_tc([[1, 2], "a b", True])], [("int", 1), ("string", 0), ("bool", 0)])
+        self.assertEqual(data, b"1 2 1 2 3 a b 1\n")
+
+        with self.assertRaises(ValueError):
+            wire.encode_typed([_tc([1])], [("int", 1)])
+
+    def test_cpp_harness_is_reused_across_inputs(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache = compile_cache.CompileCache(os.path.join(tmp.name, "cache"), max_bytes=10 ** 8)
+        code = "class Solution { public: int count(vector<string> words, string sep) { int n = 0; for (auto& w : words) n += w.size(); return n + sep.size(); } };"
+        params = [{"name": "words", "type": "string[]"}, {"name": "sep", "type": "string"}]
+
+        with mock.patch.object(cpp_runner, "get_compile_cache", return_value=cache), \
+                mock.patch.object(cpp_runner.subprocess, "run", wraps=cpp_runner.subprocess.run) as run:
+            first = cpp_runner.run_cpp(code, [_tc([["ab", "c d"], " "])], "count", parameters=params)
+            second = cpp_runner.run_cpp(code, [_tc([[], "\n"]), _tc([["é"], ""])], "count", parameters=params)
+
+        self.assertEqual(first.outputs, ["6"])
+        self.assertEqual(second.outputs, ["1", "2"])
+        self.assertEqual(sum(1 for c in run.call_args_list if "solution.cpp" in c.args[0]), 1)
+
+
+class ComparatorTest(SimpleTestCase):
+    def _matches(self, actual, expected, **kwargs):
+        comparator = Comparator(**kwargs)
+        return comparator.matches(actual, comparator.prepare(expected))
+
+    def test_exact_mode(self):
+        self.assertTrue(self._matches("[1, 2, 3]", [1, 2, 3]))
+        self.assertTrue(self._matches("true", True))
+        self.assertTrue(self._matches("123", '"123"'))
+        self.assertFalse(self._matches("a b", "ab"))
+        self.assertFalse(self._matches(1, True))
+        self.assertFalse(self._matches([1, 2], [1, 2, 3]))
+        self.assertFalse(self._matches(0.30000001, 0.3))
+
+    def test_tolerance_modes(self):
+        self.assertTrue(self._matches("0.33333333", 1 / 3, mode=comparison.FLOAT))
+        self.assertFalse(self._matches(0.34, 1 / 3, mode=comparison.FLOAT))
+        self.assertTrue(self._matches([[2, 1], [3]], [[3], [2, 1]], mode=comparison.UNORDERED))
+        self.assertFalse(self._matches([1, 1, 2], [1, 2, 2], mode=comparison.UNORDERED))
+        self.assertTrue(self._matches("  hello \n world", "hello world", mode=comparison.WHITESPACE))
+        self.assertFalse(self._matches("helloworld", "hello world", mode=comparison.WHITESPACE))
+
+    def test_large_numeric_arrays(self):
+        size = comparison.NUMPY_MIN_SIZE * 4
+        expected = list(range(size))
+        self.assertTrue(self._matches(list(range(size)), expected))
+        self.assertFalse(self._matches(list(range(size - 1)) + [0], expected))
+        self.assertTrue(self._matches([x + 1e-9 for x in expected], expected, mode=comparison.FLOAT))
+
+        with mock.patch.object(comparison, "np", None):
+            self.assertFalse(self._matches(list(range(size - 1)) + [0], expected))
+
+    def test_large_mixed_arrays_match_the_element_wise_walk(self):
+        size = comparison.NUMPY_MIN_SIZE * 2
+        ones = [1] * size
+        self.assertFalse(self._matches([True] + ones[1:], ones))
+        self.assertFalse(self._matches(ones, [True] + ones[1:]))
+
+        big = [2 ** 63 + 1] * size
+        self.assertFalse(self._matches([2 ** 63] * size, big))
+        self.assertTrue(self._matches(list(big), big))
+
+
+class StreamingProtocolTest(SimpleTestCase):
+    def test_collector_separates_records_from_console(self):
+        seen = []
+        collector = RecordCollector(parse_plain_value, lambda *args: seen.append(args))
+        for line in ["hello", f"{RECORD_PREFIX}REC\t1.5\t[1,2]", "world", f"{RECORD_PREFIX}END\t{{}}"]:
+            collector.feed_line(line + "\n")
+
+        self.assertEqual(seen, [(0, [1, 2], 1.5)])
+        self.assertEqual(collector.stdout, "hello\nworld")
+        self.assertTrue(collector.finished)
+
+    def _assert_streams(self, run, code):
+        seen = []
+        result = run(code, [_tc([1, 2]), _tc([3, 4])], "add", lambda i, value, runtime: seen.append((i, value)))
+
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.outputs), 2)
+        self.assertEqual([i for i, _ in seen], [0, 1])
+        self.assertEqual(result.stdout, "log\nlog")
+
+    def test_python_runner_streams_records(self):
+        self._assert_streams(python_runner.run_python, "def add(a, b):\n    print('log')\n    return a + b\n")
+
+    @override_settings(JUDGE_PYTHON_POOL_SIZE=1)
+    def test_python_pool_streams_records(self):
+        self.addCleanup(_reset_python_pool)
+        self._assert_streams(python_pool.run_python_pooled, "def add(a, b):\n    print('log')\n    return a + b\n")
+
+    def test_js_runner_streams_records(self):
+        self._assert_streams(js_runner.run_js, "function add(a, b) { console.log('log'); return a + b; }")
+
+    @override_settings(JUDGE_JS_POOL_SIZE=1)
+    def test_js_pool_streams_records(self):
+        self.addCleanup(_reset_js_pool)
+        self._assert_streams(js_pool.run_js_pooled, "function add(a, b) { console.log('log'); return a + b; }")
+
+    @override_settings(JUDGE_COMPILE_CACHE_MAX_BYTES=0)
+    def test_cpp_runner_streams_records(self):
+        self._assert_streams(
+            cpp_runner.run_cpp,
+            "class Solution { public: int add(int a, int b) { cout << \"log\" << endl; return a + b; } };"
+        )
+
+
+@override_settings(JUDGE_OUTPUT_LIMIT_BYTES=64 * 1024)
+class OutputLimitTest(SimpleTestCase):
+    def _assert_output_limit(self, run, code):
+        started = time.monotonic()
+        result = run(code, [_tc([1])], "spam")
+
+        self.assertEqual(result.error_type, "Output Limit Exceeded")
+        self.assertLess(time.monotonic() - started, 4)
+        self.assertLessEqual(len(result.stdout.encode()), 64 * 1024)
+
+    def test_python_runner_is_killed_past_the_cap(self):
+        self._assert_output_limit(python_runner.run_python, "def spam(n):\n    while True:\n        print('x' * 100)\n")
+
+    @override_settings(JUDGE_PYTHON_POOL_SIZE=1)
+    def test_python_pool_is_killed_past_the_cap(self):
+        self.addCleanup(_reset_python_pool)
+        self._assert_output_limit(
+            python_pool.run_python_pooled, "def spam(n):\n    while True:\n        print('x' * 100)\n"
+        )
+
+    def test_js_runner_is_killed_past_the_cap(self):
+        self._assert_output_limit(js_runner.run_js, "function spam(n) { while (true) console.error('x'.repeat(100)); }")
+
+    @override_settings(JUDGE_JS_POOL_SIZE=1)
+    def test_js_pool_is_stopped_past_the_cap(self):
+        self.addCleanup(_reset_js_pool)
+        self._assert_output_limit(
+            js_pool.run_js_pooled, "function spam(n) { while (true) console.error('x'.repeat(100)); }"
+        )
+
+    @override_settings(JUDGE_COMPILE_CACHE_MAX_BYTES=0)
+    def test_cpp_runner_is_killed_past_the_cap(self):
+        self._assert_output_limit(
+            cpp_runner.run_cpp, "class Solution { public: int spam(int n) { while (true) cout << string(100, 'x'); } };"
+        )
+
+    def test_console_cannot_forge_records(self):
+        code = f"def spam(n):\n    print({RECORD_PREFIX!r} + 'REC\\t0\\t42')\n    return n\n"
+        result = python_runner.run_python(code, [_tc([1])], "spam")
+
+        self.assertIsNone(result.error)
+        self.assertEqual(result.outputs, [1])
+        self.assertIn("REC", result.stdout)
+
+    def test_submission_verdict_is_output_limit_exceeded(self):
+        exec_result = ExecutionResult(error="too much", error_type="Output Limit Exceeded")
+        problem = SimpleNamespace(
+            function_name="spam", parameters=[], time_limit=None, memory_limit=None, id=1, testcase_version=1
+        )
+        bundle = SimpleNamespace(testcases=[_tc([1], 1)])
+        with mock.patch.object(judge_service.judge_bundle, "get_bundle", return_value=bundle), \
+                mock.patch.object(judge_service, "execute", return_value=exec_result):
+            graded = judge_service.grade_submission(problem, "python", "x")
+
+        self.assertEqual(graded["status"], "Output Limit Exceeded")
+
+
+class FailFastTest(SimpleTestCase):
+    code = (
+        "def f(n):\n"
+        "    if n == 3:\n"
+        "        while True: pass\n"
+        "    return n * 2\n"
+    )
+    testcases = [_tc([1], 2), _tc([2], 5), _tc([3], 6)]
+
+    def _assert_stops_at_first_failure(self, run):
+        started = time.monotonic()
+        result = run(self.code, self.testcases, "f", None, True)
+
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.failed_index, 1)
+        self.assertEqual(result.outputs, [2, 4])
+
+    def test_cold_runner_stops_at_first_failure(self):
+        self._assert_stops_at_first_failure(python_runner.run_python)
+
+    @override_settings(JUDGE_PYTHON_POOL_SIZE=1)
+    def test_pooled_worker_stops_and_stays_usable(self):
+        self.addCleanup(_reset_python_pool)
+        self._assert_stops_at_first_failure(python_pool.run_python_pooled)
+
+        result = python_pool.run_python_pooled("def f(n):\n    return n\n", [_tc([7])], "f")
+        self.assertEqual(result.outputs, [7])
+        self.assertEqual(len(python_pool.get_pool()._workers), 1)
+
+    def test_judge_reports_only_executed_tests(self):
+        result = python_runner.run_python(self.code, self.testcases, "f", None, True)
+        results = judge(result, self.testcases)
+
+        self.assertEqual([r["passed"] for r in results], [True, False])
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=0, JUDGE_SHARD_MIN_TESTS=2)
+class ShardedDispatchTest(SimpleTestCase):
+    def test_shards_merge_in_order(self):
+        testcases = [_tc([n], n * n) for n in range(8)]
+        seen = []
+        with mock.patch.object(dispatcher.os, "cpu_count", return_value=4):
+            self.assertEqual(len(dispatcher._shards(testcases)), 4)
+            result = dispatcher.dispatch(
+                "python", "def sq(n):\n    print(n)\n    return n * n\n", testcases, "sq",
+                on_record=lambda index, actual, runtime: seen.append((index, actual))
+            )
+
+        self.assertIsNone(result.error)
+        self.assertEqual(result.outputs, [n * n for n in range(8)])
+        self.assertEqual(len(result.runtimes), 8)
+        self.assertEqual(sorted(seen), [(n, n * n) for n in range(8)])
+        self.assertEqual(result.stdout.split(), [str(n) for n in range(8)])
+
+    def test_merge_stops_at_first_failed_shard(self):
+        shards = [[_tc([0]), _tc([1])], [_tc([2]), _tc([3])], [_tc([4])]]
+        results = [
+            ExecutionResult(outputs=[0, 1], runtimes=[1, 1], memory=2),
+            ExecutionResult(outputs=[2, 9], runtimes=[1, 1], memory=5, failed_index=1),
+            ExecutionResult(error="boom", error_type="Runtime Error"),
+        ]
+        merged = dispatcher._merge(shards, results)
+
+        self.assertEqual(merged.failed_index, 3)
+        self.assertEqual(merged.outputs, [0, 1, 2, 9])
+        self.assertEqual(merged.memory, 5)
+
+        errored = dispatcher._merge(shards, [results[0], results[2], results[1]])
+        self.assertEqual(errored.error_type, "Runtime Error")
+
+    def test_errored_merge_keeps_every_shards_phases_and_usage(self):
+        shards = [[_tc([0])], [_tc([1])]]
+        results = [
+            ExecutionResult(outputs=[0], runtimes=[1], memory=7, cpu_time=30,
+                            phases={timing.COMPILE: 200.0, timing.EXECUTE: 5.0}),
+            ExecutionResult(error="boom", error_type="Runtime Error", memory=3, cpu_time=12,
+                            phases={timing.COMPILE: 150.0, timing.EXECUTE: 9.0}),
+        ]
+        merged = dispatcher._merge(shards, results)
+
+        self.assertEqual(merged.error_type, "Runtime Error")
+        self.assertEqual(merged.phases, {timing.COMPILE: 200.0, timing.EXECUTE: 9.0})
+        self.assertEqual((merged.memory, merged.cpu_time), (7, 42))
+
+    @override_settings(JUDGE_RUN_TIMEOUT=10)
+    def test_run_timeout_scales_up_to_a_ceiling(self):
+        self.assertEqual(dispatcher._timeout(None, 50), dispatcher.DEFAULT_TIMEOUT)
+        self.assertEqual(dispatcher._timeout(2, 3), 2 * 3 + dispatcher.STARTUP_GRACE)
+        self.assertEqual(dispatcher._timeout(2, 200), 10)
+        self.assertEqual(dispatcher._timeout(15, 200), 15 + dispatcher.STARTUP_GRACE)
+
+    def test_merge_keeps_cases_before_a_time_limit_exceeded(self):
+        shards = [[_tc([0]), _tc([1])], [_tc([2]), _tc([3])]]
+        results = [
+            ExecutionResult(outputs=[0, 1], runtimes=[1, 1]),
+            ExecutionResult(outputs=[2], runtimes=[1], failed_index=1, error="slow", error_type="Time Limit Exceeded"),
+        ]
+        merged = dispatcher._merge(shards, results)
+
+        self.assertEqual(merged.outputs, [0, 1, 2])
+        self.assertEqual(merged.failed_index, 3)
+        self.assertEqual(merged.error_type, "Time Limit Exceeded")
+
+
+class CaseTimeLimitTest(SimpleTestCase):
+    testcases = [_tc([1], 1), _tc([2], 2), _tc([3], 3)]
+
+    def test_hanging_case_is_stopped_at_its_limit(self):
+        code = "def f(n):\n    while n == 2: pass\n    return n\n"
+        started = time.monotonic()
+        result = python_runner.run_python(code, self.testcases, "f", timeout=30, time_limit=1)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(result.error_type, "Time Limit Exceeded")
+        self.assertEqual((result.outputs, result.failed_index), ([1], 1))
+        self.assertEqual([r["passed"] for r in judge(result, self.testcases)], [True, False])
+
+    def test_slow_case_is_judged_by_its_own_runtime(self):
+        code = "import time\ndef f(n):\n    if n == 3: time.sleep(1.2)\n    return n\n"
+        result = python_runner.run_python(code, self.testcases, "f", timeout=30, time_limit=1)
+
+        self.assertEqual(result.error_type, "Time Limit Exceeded")
+        self.assertEqual((result.outputs, result.failed_index), ([1, 2], 2))
+
+    @override_settings(JUDGE_PYTHON_POOL_SIZE=1)
+    def test_pooled_worker_stops_and_stays_usable(self):
+        self.addCleanup(_reset_python_pool)
+        code = "def f(n):\n    while n == 1: pass\n    return n\n"
+        result = python_pool.run_python_pooled(code, self.testcases, "f", timeout=30, time_limit=1)
+        self.assertEqual((result.error_type, result.failed_index), ("Time Limit Exceeded", 0))
+
+        result = python_pool.run_python_pooled("def f(n):\n    return n\n", [_tc([7])], "f", time_limit=1)
+        self.assertEqual(result.outputs, [7])
+
+
+class JudgeBenchTest(SimpleTestCase):
+    def test_process_phases_split_at_first_test(self):
+        phases = timing.process_phases(10.0, 10.05, 10.2, first_runtime=10)
+        self.assertAlmostEqual(phases[timing.START], 40)
+        self.assertAlmostEqual(phases[timing.EXECUTE], 160)
+        # No record at all: the process never got past start-up.
+        self.assertAlmostEqual(timing.process_phases(10.0, None, 10.1, 0)[timing.START], 100)
+        self.assertEqual(timing.process_phases(None, None, None, 0), {})
+
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertAlmostEqual(judge_bench.percentile(values, 50), 50.5)
+        self.assertAlmostEqual(judge_bench.percentile(values, 99), 99.01)
+        self.assertEqual(judge_bench.percentile([7], 95), 7)
+
+        summary = judge_bench.summarize([{timing.PARSE: 1.0, judge_bench.TOTAL: 3.0}, {timing.PARSE: 3.0}])
+        self.assertEqual(summary[timing.PARSE]["p50"], 2.0)
+        self.assertEqual(summary[judge_bench.TOTAL]["mean"], 3.0)
+        self.assertNotIn(timing.COMPILE, summary)
+
+    def test_reference_solution_reports_every_runtime_phase(self):
+        cases = judge_bench.build_cases("prefix_sums", 50, 3)
+        phases, error = judge_bench.run_once("python", "prefix_sums", cases)
+
+        self.assertIsNone(error)
+        for name in (timing.HARNESS, timing.START, timing.EXECUTE, timing.PARSE, timing.COMPARE, judge_bench.TOTAL):
+            self.assertIn(name, phases)
+        self.assertGreaterEqual(phases[judge_bench.TOTAL], phases[timing.EXECUTE])
+
+    def test_compare_reports(self):
+        row = {"benchmark": "b", "language": "cpp", "size": 10, "phases": {"compile": {"p50": 100.0}}}
+        faster = {**row, "phases": {"compile": {"p50": 80.0}}}
+        rows = judge_bench.compare_reports({"results": [row]}, {"results": [faster]})
+        self.assertEqual(rows, [("b/cpp/10", "compile", 100.0, 80.0, -20.0)])
+
+
+class ResourceLimitsTest(SimpleTestCase):
+    hog = "def f(n):\n    return len(bytearray(n * 1024 * 1024))\n"
+
+    def test_reports_cpu_time_and_peak_rss(self):
+        result = python_runner.run_python(self.hog, [_tc([8])], "f", memory_limit=128)
+
+        self.assertIsNone(result.error)
+        self.assertGreater(result.cpu_time, 0)
+        self.assertGreater(result.memory, 8)
+
+    def test_memory_limit_is_enforced(self):
+        result = python_runner.run_python(self.hog, [_tc([512])], "f", memory_limit=64)
+        self.assertEqual(result.error_type, "Memory Limit Exceeded")
+
+    @override_settings(JUDGE_PYTHON_POOL_SIZE=1)
+    def test_pooled_worker_enforces_limits(self):
+        self.addCleanup(_reset_python_pool)
+        result = python_pool.run_python_pooled(self.hog, [_tc([512])], "f", memory_limit=64)
+        self.assertEqual(result.error_type, "Memory Limit Exceeded")
+
+        result = python_pool.run_python_pooled(self.hog, [_tc([8])], "f", memory_limit=64)
+        self.assertIsNone(result.error)
+        self.assertGreater(result.memory, 8)
+
+    def test_cpu_limit_is_reported_as_timeout(self):
+        result = cpp_runner.run_cpp(
+            "class Solution { public: int f(int n) { volatile long x = 0; while (true) x += n; return x; } };",
+            [_tc([1])], "f", parameters=[{"name": "n", "type": "int"}], timeout=1
+        )
+        self.assertEqual(result.error_type, "Timeout Error")
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.values = {}
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def blmove(self, src, dst, timeout, src_side="LEFT", dst_side="RIGHT"):
+        items = self.lists.get(src)
+        if not items:
+            return None
+        value = items.pop() if src_side == "RIGHT" else items.pop(0)
+        target = self.lists.setdefault(dst, [])
+        target.insert(0, value) if dst_side == "LEFT" else target.append(value)
+        return value
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key, amount=1):
+        self.values[key] = str(int(self.values.get(key, 0)) + amount)
+        return int(self.values[key])
+
+    def hincrby(self, key, field, amount=1):
+        counters = self.values.setdefault(key, {})
+        counters[field] = counters.get(field, 0) + amount
+        return counters[field]
+
+    def hgetall(self, key):
+        return dict(self.values.get(key, {}))
+
+    def hmget(self, key, names):
+        fields = self.values.get(key, {})
+        return [fields.get(name) for name in names]
+
+    def hdel(self, key, *names):
+        for name in names:
+            self.values.get(key, {}).pop(name, None)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def rename(self, key, new_key):
+        self.values[new_key] = self.values.pop(key)
+
+    def sadd(self, key, *members):
+        self.values.setdefault(key, set()).update(str(m) for m in members)
+
+    def sismember(self, key, member):
+        return str(member) in self.values.get(key, set())
+
+    def smismember(self, key, members):
+        return [int(self.sismember(key, m)) for m in members]
+
+    def scan_iter(self, match):
+        return [key for key in self.values if fnmatch.fnmatch(key, match)]
+
+    def hset(self, key, mapping=None):
+        self.values.setdefault(key, {}).update(mapping)
+
+    def hsetnx(self, key, field, value):
+        fields = self.values.setdefault(key, {})
+        if field in fields:
+            return False
+        fields[field] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def expire(self, key, ttl):
+        return True
+
+    def zadd(self, key, mapping):
+        self.values.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.values.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.values.get(key, {})
+        for member, score in list(zset.items()):
+            if score <= float(high):
+                del zset[member]
+
+    def zrank(self, key, member):
+        ranked = sorted(self.values.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        members = [m for m, _ in ranked]
+        return members.index(member) if member in members else None
+
+    def zcount(self, key, low, high):
+        return sum(1 for score in self.values.get(key, {}).values() if float(low) <= score <= float(high))
+
+    def eval(self, script, numkeys, key, token, *args):
+        # Only the token-checked lock scripts in common.counters.
+        if self.values.get(key) != token:
+            return 0
+        if script == counters._RELEASE_LOCK:
+            del self.values[key]
+        return 1
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=0)
+class AsyncJudgeQueueTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (judge_queue, verdict_cache, judge_bundle, judge_admission, perf_histogram, counters, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        verdict_cache.clear_local()
+        judge_bundle.clear_local()
+
+        self.user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[{"name": "a", "type": "int"}, {"name": "b", "type": "int"}],
+            return_type="int",
+        )
+        TestCases.objects.create(problem=self.problem, input=[1, 2], expected_output=3, order=0)
+        TestCases.objects.create(problem=self.problem, input=[5, 5], expected_output=10, order=1)
+        self.factory = APIRequestFactory()
+
+    def _post(self, data):
+        request = self.factory.post("/api/problems/submit/", data, format="json")
+        force_authenticate(request, user=self.user)
+        return SubmitCodeView.as_view()(request)
+
+    def test_async_submission_is_queued_then_judged_by_worker(self):
+        response = self._post({
+            "problem_id": self.problem.id,
+            "language": "python",
+            "code": "def add(a, b):\n    return a + b\n",
+            "async": True,
+        })
+
+        self.assertEqual(response.status_code, 202)
+        submission = Submission.objects.get(id=response.data["submission_id"])
+        self.assertEqual(submission.status, "Pending")
+        self.assertEqual(judge_queue.queue_depth(), 1)
+
+        call_command("run_judge_worker", "--burst", stdout=io.StringIO())
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.status, "Accepted")
+        self.assertEqual(submission.passed_count, 2)
+        self.assertEqual(
+            list(submission.phase_timings),
+            [timing.QUEUE_WAIT, timing.FETCH, timing.HARNESS, timing.START, timing.EXECUTE,
+             timing.PARSE, timing.COMPARE, timing.DB_WRITE, timing.PERCENTILES]
+        )
+
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+        status_response = SubmissionStatusView.as_view()(request, submission_id=submission.id)
+        self.assertEqual(status_response.data["status"], "Accepted")
+        self.assertEqual(status_response.data["result"]["overallStatus"], "Accepted")
+
+    def test_failed_enqueue_leaves_no_pending_submission(self):
+        with mock.patch.object(judge_queue, "enqueue_submission", side_effect=ConnectionError("redis down")), \
+                self.assertLogs("apps.problem_app.views.submission_views", "ERROR"):
+            response = self._post({
+                "problem_id": self.problem.id,
+                "language": "python",
+                "code": "def add(a, b):\n    return a + b\n",
+                "async": True,
+            })
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_job_of_a_dead_worker_is_requeued(self):
+        response = self._post({
+            "problem_id": self.problem.id,
+            "language": "python",
+            "code": "def add(a, b):\n    return a + b\n",
+            "async": True,
+        })
+        job = judge_queue.pop_job(timeout=0)
+        self.assertEqual(judge_queue.queue_depth(), 0)
+        self.assertEqual(judge_queue.requeue_stale(), 0)
+
+        self.redis.values[judge_queue.CLAIMS_KEY][job["id"]] = time.time() - 3600
+        with self.assertLogs("apps.problem_app.management.commands.run_judge_worker", "WARNING"):
+            call_command("run_judge_worker", "--burst", stdout=io.StringIO())
+
+        self.assertEqual(Submission.objects.get(id=response.data["submission_id"]).status, "Accepted")
+        self.assertEqual(self.redis.lists[judge_queue.PROCESSING_KEY], [])
+        self.assertEqual(self.redis.hgetall(judge_queue.CLAIMS_KEY), {})
+
+    @override_settings(JUDGE_ADMISSION_SLOTS=4)
+    def test_failed_result_store_keeps_the_worker_running(self):
+        for _ in range(2):
+            self.assertEqual(self._post({
+                "problem_id": self.problem.id,
+                "language": "python",
+                "code": "def add(a, b):\n    return a + b\n",
+                "async": True,
+            }).status_code, 202)
+
+        with mock.patch.object(judge_queue, "store_result", side_effect=[ConnectionError("redis down"), None]), \
+                self.assertLogs("apps.problem_app.management.commands.run_judge_worker", "ERROR"):
+            call_command("run_judge_worker", "--burst", stdout=io.StringIO())
+
+        self.assertEqual(Submission.objects.filter(status="Accepted").count(), 2)
+        self.assertEqual(len(self.redis.lists[judge_queue.PROCESSING_KEY]), 1)
+        self.assertEqual(self.redis.hgetall(judge_admission.USER_KEY.format(self.user.id)), {})
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=0, JUDGE_ADMISSION_SLOTS=4, JUDGE_ADMISSION_USER_LIMIT=1)
+class AdmissionControlTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (judge_queue, verdict_cache, judge_bundle, judge_admission, perf_histogram, counters, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        verdict_cache.clear_local()
+        judge_bundle.clear_local()
+
+        self.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="password")
+            for i in range(4)
+        ]
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[{"name": "a", "type": "int"}, {"name": "b", "type": "int"}],
+            return_type="int",
+        )
+        TestCases.objects.create(problem=self.problem, input=[1, 2], expected_output=3, order=0)
+        self.factory = APIRequestFactory()
+
+    def _subscribe(self, user, features):
+        plan = Plan.objects.create(name="Pro", role_type="USER", price=10, duration_days=30, features=features)
+        Subscription.objects.create(user=user, plan=plan, status="ACTIVE")
+
+    def _post(self, user, **extra):
+        request = self.factory.post("/api/problems/submit/", {
+            "problem_id": self.problem.id,
+            "language": "python",
+            "code": "def add(a, b):\n    return a + b\n",
+            **extra,
+        }, format="json")
+        force_authenticate(request, user=user)
+        return SubmitCodeView.as_view()(request)
+
+    def test_user_in_flight_limit(self):
+        ticket = judge_admission.acquire(self.users[0])
+        with self.assertRaises(judge_admission.AdmissionRejected) as rejected:
+            judge_admission.acquire(self.users[0])
+        self.assertEqual(rejected.exception.reason, "user_limit")
+
+        judge_admission.release(ticket)
+        judge_admission.release(judge_admission.acquire(self.users[0]))
+
+    def test_lanes_reserve_slots_for_higher_plans(self):
+        # The free lane may fill half of the 4 slots.
+        tickets = [judge_admission.acquire(user) for user in self.users[:2]]
+        with self.assertRaises(judge_admission.AdmissionRejected) as rejected:
+            judge_admission.acquire(self.users[2])
+        self.assertEqual(rejected.exception.reason, "busy")
+        self.assertGreaterEqual(rejected.exception.retry_after, 1)
+
+        self._subscribe(self.users[3], {"judge_lane": "priority", "judge_concurrency": 3})
+        self.assertEqual(judge_admission.lane_for(self.users[3]), ("priority", 3))
+        tickets.append(judge_admission.acquire(self.users[3]))
+        self.assertEqual(judge_admission.slots_in_use(), 3)
+        self.assertEqual(judge_metrics.SLOTS_IN_USE.value(), 3)
+
+        for ticket in tickets:
+            judge_admission.release(ticket)
+        self.assertEqual(judge_admission.slots_in_use(), 0)
+
+    def test_saturated_submit_returns_429_with_retry_after(self):
+        ticket = judge_admission.acquire(self.users[0])
+        response = self._post(self.users[0])
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        judge_admission.release(ticket)
+        response = self._post(self.users[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(judge_admission.slots_in_use(), 0)
+
+    def test_plan_lookup_failure_admits_unthrottled(self):
+        with mock.patch.object(judge_admission, "get_active_subscription", side_effect=RuntimeError("db down")), \
+                self.assertLogs(judge_admission.logger, "ERROR"):
+            self.assertIsNone(judge_admission.acquire(self.users[0]))
+
+    def test_run_checks_auth_and_plan_before_taking_a_slot(self):
+        tickets = [judge_admission.acquire(user) for user in self.users[:2]]
+        data = {"problem_id": self.problem.id, "language": "python", "code": "def add(a, b):\n    return a + b\n"}
+
+        anonymous = RunCodeView.as_view()(self.factory.post("/api/problems/run/", data, format="json"))
+        self.assertIn(anonymous.status_code, (401, 403))
+
+        request = self.factory.post("/api/problems/run/", data, format="json")
+        force_authenticate(request, user=self.users[2])
+        self.assertEqual(RunCodeView.as_view()(request).status_code, 403)
+        self.assertEqual(judge_admission.slots_in_use(), 2)
+
+        for ticket in tickets:
+            judge_admission.release(ticket)
+
+    def test_queued_ticket_is_released_by_worker(self):
+        response = self._post(self.users[0], **{"async": True})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self._post(self.users[0], **{"async": True}).status_code, 429)
+
+        call_command("run_judge_worker", "--burst", stdout=io.StringIO())
+        self.assertEqual(self._post(self.users[0], **{"async": True}).status_code, 202)
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=0)
+class RejudgeTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (verdict_cache, judge_bundle, perf_histogram, counters, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        verdict_cache.clear_local()
+        judge_bundle.clear_local()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint = os.path.join(self.tmp.name, "rejudge.json")
+
+        user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[{"name": "a", "type": "int"}, {"name": "b", "type": "int"}],
+            return_type="int", total_submissions=7, accepted_submissions=7,
+        )
+        TestCases.objects.create(problem=self.problem, input=[1, 2], expected_output=3, order=0)
+        right = "def add(a, b):\n    return a + b\n"
+        wrong = "def add(a, b):\n    return a - b\n"
+        self.submissions = [
+            Submission.objects.create(user=user, problem=self.problem, language="python", code=code, status=status)
+            for code, status in ((right, "Wrong Answer"), (wrong, "Accepted"), (right, "Pending"))
+        ]
+
+    def _rejudge(self, *args):
+        out = io.StringIO()
+        call_command(
+            "rejudge", "--problem", str(self.problem.id), "--workers", "0", "--checkpoint", self.checkpoint,
+            *args, stdout=out
+        )
+        return out.getvalue()
+
+    def _statuses(self):
+        return [Submission.objects.get(pk=s.pk).status for s in self.submissions]
+
+    def test_rewrites_verdicts_and_counters(self):
+        output = self._rejudge()
+
+        self.assertEqual(self._statuses(), ["Accepted", "Wrong Answer", "Pending"])
+        self.assertIn("2 verdicts changed", output)
+        self.problem.refresh_from_db()
+        self.assertEqual((self.problem.total_submissions, self.problem.accepted_submissions), (2, 1))
+        self.assertEqual(UserSolvedProblem.objects.filter(problem=self.problem).count(), 1)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        checkpoint = rejudge.Checkpoint(self.checkpoint, self.problem, None, None)
+        checkpoint.last_id = self.submissions[0].pk
+        checkpoint.judged = 1
+        checkpoint.save()
+
+        output = self._rejudge()
+
+        self.assertIn(f"Resuming after submission {self.submissions[0].pk}", output)
+        self.assertEqual(self._statuses(), ["Wrong Answer", "Wrong Answer", "Pending"])
+
+    def test_refuses_checkpoint_from_another_run(self):
+        rejudge.Checkpoint(self.checkpoint, self.problem, None, ["Accepted"]).save()
+
+        with self.assertRaises(CommandError):
+            self._rejudge()
+        self._rejudge("--restart")
+        self.assertEqual(self._statuses()[:2], ["Accepted", "Wrong Answer"])
+
+
+class PerformanceHistogramTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(perf_histogram, "redis_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[], return_type="int", supported_languages=["python", "cpp"],
+        )
+
+    def test_percent_above_matches_exact_counts(self):
+        values = [0.5 * 1.3 ** i for i in range(60)]
+        counts = {}
+        for value in values:
+            index = perf_histogram.RUNTIME.index(value)
+            counts[index] = counts.get(index, 0) + 1
+
+        for probe, own in ((values[0], 1), (values[17], 1), (values[42], 1), (2.0, 0), (1e9, 0)):
+            exact = sum(1 for v in values if v > probe) / len(values) * 100
+            self.assertAlmostEqual(
+                perf_histogram.percent_above(counts, perf_histogram.RUNTIME, probe, own), exact, delta=1
+            )
+        self.assertEqual(perf_histogram.percent_above({3: 1}, perf_histogram.RUNTIME, 1.0), 100.0)
+
+    def test_accepted_runs_are_recorded_and_ranked_per_language(self):
+        for runtime in (10, 20, 30, 40):
+            perf_histogram.observe(self.problem, "python", runtime, 8, accepted=True)
+        perf_histogram.observe(self.problem, "cpp", 1, 8, accepted=True)
+
+        self.assertEqual(perf_histogram.observe(self.problem, "python", 25, 8, accepted=False)[0], 50.0)
+        self.assertEqual(perf_histogram.observe(self.problem, "python", 5, 8, accepted=True)[0], 80.0)
+        self.assertEqual(perf_histogram.observe(self.problem, "cpp", 0.5, 8, accepted=True)[0], 50.0)
+
+    @override_settings(JUDGE_HISTOGRAM_SNAPSHOT_EVERY=2)
+    def test_reseeds_lost_redis_data_from_snapshot(self):
+        perf_histogram.observe(self.problem, "python", 10, 8, accepted=True)
+        perf_histogram.observe(self.problem, "python", 30, 8, accepted=True)
+        snapshot = PerformanceHistogram.objects.get(problem=self.problem, language="python")
+        self.assertEqual(snapshot.count, 2)
+
+        self.redis.values.clear()
+        self.assertEqual(perf_histogram.observe(self.problem, "python", 20, 8, accepted=False)[0], 50.0)
+        self.assertEqual(self.redis.hgetall("judge:hist:%d:python" % self.problem.id)["n"], 2)
+
+    def test_backfill_command_rebuilds_histograms(self):
+        for language, runtime, status in (("python", 10, "Accepted"), ("python", 30, "Accepted"),
+                                          ("java", 5, "Accepted"), ("python", 1, "Wrong Answer")):
+            Submission.objects.create(
+                user=self.user, problem=self.problem, language=language, code="", status=status,
+                runtime=runtime, memory=8,
+            )
+        perf_histogram.observe(self.problem, "cpp", 1, 8, accepted=True)
+
+        call_command("build_histograms", "--problem", str(self.problem.id), stdout=io.StringIO())
+
+        snapshots = {h.language: h.count for h in PerformanceHistogram.objects.filter(problem=self.problem)}
+        self.assertEqual(snapshots, {"python": 2, "java": 1})
+        self.assertEqual(self.redis.hgetall("judge:hist:%d:cpp" % self.problem.id), {})
+        self.assertEqual(perf_histogram.observe(self.problem, "python", 20, 8, accepted=False)[0], 50.0)
+
+
+class WriteBehindCounterTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (counters, problem_list_cache, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[], return_type="int", total_submissions=3, accepted_submissions=1,
+        )
+
+    def _submit(self, status):
+        submission = Submission.objects.create(
+            user=self.user, problem=self.problem, language="python", code="", status=status
+        )
+        judge_service.update_submission_stats(submission, status)
+
+    def _fresh_problem(self):
+        return Problem.objects.get(pk=self.problem.pk)
+
+    def test_increments_are_buffered_until_flushed(self):
+        self._submit("Accepted")
+        self._submit("Wrong Answer")
+
+        problem = self._fresh_problem()
+        self.assertEqual((problem.total_submissions, problem.accepted_submissions), (3, 1))
+        self.assertEqual(ProblemSerializer(problem).data["acceptanceRate"], 40.0)
+
+        call_command("flush_counters", "--once", stdout=io.StringIO())
+
+        problem = self._fresh_problem()
+        self.assertEqual((problem.total_submissions, problem.accepted_submissions), (5, 2))
+        self.assertEqual(problem_counters.live(problem), {"total_submissions": 5, "accepted_submissions": 2})
+        self.assertEqual(problem_counters.COUNTERS.flush(), 0)
+
+    def test_profile_counters_count_first_solves_and_create_the_profile(self):
+        self._submit("Wrong Answer")
+        self._submit("Accepted")
+        self._submit("Accepted")
+
+        profile_counters.COUNTERS.flush()
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.total_submissions, profile.problems_solved), (3, 1))
+
+    def test_writes_through_when_redis_is_down(self):
+        with mock.patch.object(self.redis, "pipeline", side_effect=ConnectionError("down")), \
+                self.assertLogs("common.counters", level="ERROR"):
+            self._submit("Accepted")
+
+        problem = self._fresh_problem()
+        self.assertEqual((problem.total_submissions, problem.accepted_submissions), (4, 2))
+
+    def test_failed_flush_resumes_without_reapplying_committed_batches(self):
+        other = Problem.objects.create(
+            title="Sub", description="", difficulty="EASY", function_name="f", parameters=[], return_type="int"
+        )
+        problem_counters.COUNTERS.incr(self.problem.pk, total_submissions=2)
+        problem_counters.COUNTERS.incr(other.pk, total_submissions=1)
+
+        apply_batch = problem_counters.COUNTERS._apply_batch
+        calls = []
+
+        def fail_second_batch(pending, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError("db down")
+            apply_batch(pending, batch)
+
+        with mock.patch.object(problem_counters.COUNTERS, "_apply_batch", side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                problem_counters.COUNTERS.flush(batch_size=1)
+        self.assertFalse(self.redis.exists("counters:problem_app.problem:lock"))
+
+        problem_counters.COUNTERS.flush(batch_size=1)
+        self.assertEqual(self._fresh_problem().total_submissions, 5)
+        other.refresh_from_db()
+        self.assertEqual(other.total_submissions, 1)
+
+    def test_flush_does_not_release_a_lock_it_no_longer_owns(self):
+        problem_counters.COUNTERS.incr(self.problem.pk, total_submissions=1)
+        lock = "counters:problem_app.problem:lock"
+        apply_batch = problem_counters.COUNTERS._apply_batch
+
+        def expire_and_apply(pending, batch):
+            self.redis.values[lock] = "other-flusher"
+            apply_batch(pending, batch)
+
+        with mock.patch.object(problem_counters.COUNTERS, "_apply_batch", side_effect=expire_and_apply):
+            problem_counters.COUNTERS.flush()
+        self.assertEqual(self.redis.values[lock], "other-flusher")
+
+    def test_negative_corrections_stop_at_zero(self):
+        profile_counters.COUNTERS.incr(self.user.id, problems_solved=-1)
+        profile_counters.COUNTERS.flush()
+        self.assertEqual(UserProfile.objects.get(user=self.user).problems_solved, 0)
+
+
+class SolvedProblemsTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (counters, problem_list_cache, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.problems = [
+            Problem.objects.create(
+                title=f"P{i}", description="", difficulty="EASY", function_name="f", parameters=[], return_type="int"
+            )
+            for i in range(3)
+        ]
+
+    def _accept(self, problem, runtime):
+        submission = Submission.objects.create(
+            user=self.user, problem=problem, language="python", code="", status="Accepted", runtime=runtime
+        )
+        return solved_problems.record_accepted(submission)
+
+    def _list(self):
+        request = APIRequestFactory().get("/api/problems/")
+        force_authenticate(request, user=self.user)
+        response = ProblemListView.as_view()(request)
+        return {p["id"]: p["is_solved"] for p in response.data["data"]["problems"]}
+
+    def test_first_acceptance_creates_row_and_keeps_best_runtime(self):
+        self.assertTrue(self._accept(self.problems[0], 30))
+        self.assertFalse(self._accept(self.problems[0], 10))
+        self.assertFalse(self._accept(self.problems[0], 20))
+
+        solved = UserSolvedProblem.objects.get(user=self.user, problem=self.problems[0])
+        self.assertEqual(solved.best_runtime, 10)
+
+    def test_list_checks_only_page_ids_against_cached_set(self):
+        self._accept(self.problems[1], 5)
+
+        with mock.patch.object(solved_problems, "_load", wraps=solved_problems._load) as load:
+            first = self._list()
+            self._accept(self.problems[2], 5)
+            second = self._list()
+
+        self.assertEqual(load.call_count, 1)
+        p0, p1, p2 = (p.id for p in self.problems)
+        self.assertEqual(first, {p0: False, p1: True, p2: False})
+        self.assertEqual(second, {p0: False, p1: True, p2: True})
+
+    def test_backfill_command_fills_table_and_recounts_profiles(self):
+        for problem in self.problems[:2]:
+            Submission.objects.create(user=self.user, problem=problem, language="python", code="", status="Accepted")
+        Submission.objects.create(user=self.user, problem=self.problems[2], language="python", code="", status="Wrong Answer")
+        UserProfile.objects.create(user=self.user)
+
+        call_command("build_solved_problems", stdout=io.StringIO())
+
+        self.assertEqual(UserSolvedProblem.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(UserProfile.objects.get(user=self.user).problems_solved, 2)
+
+
+class ProblemListSerializerTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (counters, problem_list_cache, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        category = Category.objects.create(name="Arrays", slug="arrays")
+        self.problems = []
+        for i in range(4):
+            problem = Problem.objects.create(
+                title=f"P{i}", description="secret statement", solution="secret", difficulty="EASY",
+                category=category, function_name="f", parameters=[{"name": "a", "type": "int"}], return_type="int",
+            )
+            TestCases.objects.create(problem=problem, input=[1], expected_output=1, is_sample=True, order=0)
+            TestCases.objects.create(problem=problem, input=[2], expected_output=2, is_sample=False, order=1)
+            self.problems.append(problem)
+
+    def _get(self, view, path, **kwargs):
+        return view.as_view()(APIRequestFactory().get(path), **kwargs)
+
+    def test_list_is_slim_and_query_count_is_flat(self):
+        # count + page, whatever the page size.
+        with self.assertNumQueries(2):
+            response = self._get(ProblemListView, "/api/problems/")
+
+        row = response.data["data"]["problems"][0]
+        self.assertEqual(
+            set(row),
+            {"id", "title", "difficulty", "category", "tags", "is_premium", "status", "is_solved", "acceptanceRate"},
+        )
+        self.assertEqual(row["category"]["slug"], "arrays")
+
+    def test_fields_projection(self):
+        response = self._get(ProblemListView, "/api/problems/?fields=id,title")
+        self.assertEqual([set(row) for row in response.data["data"]["problems"]], [{"id", "title"}] * 4)
+
+        response = self._get(ProblemListView, "/api/problems/?fields=id,solution")
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_returns_only_sample_testcases(self):
+        response = self._get(ProblemDetailView, "/api/problems/", problem_id=self.problems[0].id)
+
+        self.assertEqual([tc["input"] for tc in response.data["testcases"]], [[1]])
+
+    def test_detail_returns_every_testcase_to_staff(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", is_staff=True)
+        request = APIRequestFactory().get("/api/problems/")
+        force_authenticate(request, user=admin)
+        response = ProblemDetailView.as_view()(request, problem_id=self.problems[0].id)
+
+        self.assertEqual([tc["input"] for tc in response.data["testcases"]], [[1], [2]])
+
+
+class ProblemListCacheTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (counters, problem_list_cache, solved_problems):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        metrics.REGISTRY.reset()
+
+        self.user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        self.category = Category.objects.create(name="Arrays", slug="arrays")
+        self.problems = [
+            Problem.objects.create(
+                title=f"P{i}", description="", difficulty="EASY", category=self.category,
+                function_name="f", parameters=[], return_type="int",
+            )
+            for i in range(12)
+        ]
+
+    def _list(self, path="/api/problems/", user=None):
+        request = APIRequestFactory().get(path)
+        if user:
+            force_authenticate(request, user=user)
+        return ProblemListView.as_view()(request).data["data"]
+
+    def test_pages_are_shared_and_solved_flags_overlaid_per_user(self):
+        UserSolvedProblem.objects.create(user=self.user, problem=self.problems[1], first_solved_at=timezone.now())
+
+        anonymous = self._list()
+        with self.assertNumQueries(1):  # the user's solved set; the page itself is cached
+            mine = self._list(user=self.user)
+
+        self.assertFalse(any(p["is_solved"] for p in anonymous["problems"]))
+        self.assertEqual([p["id"] for p in mine["problems"] if p["is_solved"]], [self.problems[1].id])
+        self.assertEqual(mine["pagination"]["next"], "http://testserver/api/problems/?page=2")
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="miss"), 1)
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="hit"), 1)
+        self.assertIn("problem_list_build_seconds_count 1", metrics.render())
+
+    def test_filters_and_pages_have_their_own_entries(self):
+        self._list("/api/problems/?page=2")
+        second = self._list("/api/problems/?page=2")
+        self._list("/api/problems/?difficulty=hard")
+
+        self.assertEqual(len(second["problems"]), 2)
+        self.assertEqual(second["pagination"]["previous"], "http://testserver/api/problems/")
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="miss"), 2)
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="hit"), 1)
+
+    def test_problem_and_category_writes_invalidate_pages(self):
+        self._list()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.problems[0].title = "Renamed"
+            self.problems[0].save()
+        self.assertEqual(self._list()["problems"][0]["title"], "Renamed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.status = "InActive"
+            self.category.save()
+        self.assertEqual(self._list()["problems"], [])
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="hit"), 0)
+
+    def test_only_bad_page_numbers_are_client_errors(self):
+        view = ProblemListView.as_view()
+        self.assertEqual(view(APIRequestFactory().get("/api/problems/?page=99")).status_code, 400)
+
+        with mock.patch.object(ProblemListView, "build_page", side_effect=RuntimeError("db down")):
+            self.assertEqual(view(APIRequestFactory().get("/api/problems/")).status_code, 500)
+
+    @override_settings(PROBLEM_LIST_CACHE_TTL=0)
+    def test_disabled_cache_builds_every_page(self):
+        self._list()
+        self._list()
+
+        self.assertEqual(problem_list_cache.REQUESTS.value(result="bypass"), 2)
+        self.assertEqual(self.redis.values, {})
+
+
+class MetricsTest(TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = metrics.Registry()
+        hist = registry.histogram("phase_seconds", "Phase time.", ("phase",), buckets=(0.1, 1.0))
+        hist.observe(0.05, phase="compile")
+        hist.observe(0.5, phase="compile")
+        hist.observe(5, phase="compile")
+        registry.counter("jobs_total", "Jobs.", ("status",)).inc(status='Wrong "Answer"')
+
+        text = registry.render()
+        self.assertIn('phase_seconds_bucket{phase="compile",le="0.1"} 1\n', text)
+        self.assertIn('phase_seconds_bucket{phase="compile",le="1"} 2\n', text)
+        self.assertIn('phase_seconds_bucket{phase="compile",le="+Inf"} 3\n', text)
+        self.assertIn('phase_seconds_count{phase="compile"} 3\n', text)
+        self.assertIn('jobs_total{status="Wrong \\"Answer\\""} 1\n', text)
+        self.assertIn("# TYPE phase_seconds histogram", text)
+
+        with self.assertRaises(ValueError):
+            hist.observe(1, language="cpp")
+        with self.assertRaises(ValueError):
+            registry.counter("phase_seconds", "Clash.")
+
+    def test_metrics_endpoint_is_admin_only(self):
+        judge_service.judge_metrics.record("run", "Brainfuck", {timing.COMPILE: 250.0}, "Accepted")
+        user = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="password", is_staff=True
+        )
+        factory = APIRequestFactory()
+
+        request = factory.get("/")
+        force_authenticate(request, user=user)
+        self.assertEqual(JudgeMetricsView.as_view()(request).status_code, 403)
+
+        request = factory.get("/")
+        force_authenticate(request, user=admin)
+        with mock.patch.object(judge_queue, "queue_depth", return_value=4), \
+                mock.patch.object(judge_admission, "slots_in_use", return_value=1):
+            response = JudgeMetricsView.as_view()(request)
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn('judge_phase_seconds_count{kind="run",language="other",phase="compile"}', body)
+        self.assertIn("judge_queue_depth 4\n", body)
+        self.assertIn("judge_slots_in_use 1\n", body)
+
+
+@override_settings(JUDGE_PYTHON_POOL_SIZE=0)
+class VerdictCacheTest(TestCase):
+    code = "def add(a, b):\n    return a + b\n"
+
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for module in (verdict_cache, judge_bundle):
+            patcher = mock.patch.object(module, "redis_client", self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        verdict_cache.clear_local()
+        judge_bundle.clear_local()
+        self.addCleanup(verdict_cache.clear_local)
+
+        self.problem = Problem.objects.create(
+            title="Add", description="Add two numbers", difficulty="EASY",
+            function_name="add", parameters=[{"name": "a", "type": "int"}, {"name": "b", "type": "int"}],
+            return_type="int",
+        )
+        TestCases.objects.create(problem=self.problem, input=[1, 2], expected_output=3, order=0)
+
+    def test_identical_code_is_judged_once(self):
+        with mock.patch.object(judge_service, "dispatch", wraps=judge_service.dispatch) as dispatch:
+            first = judge_service.grade_submission(self.problem, "python", self.code)
+            streamed = []
+            with mock.patch.object(judge_service.judge_queue, "publish_verdict",
+                                   side_effect=lambda *args: streamed.append(args)):
+                second = judge_service.grade_submission(self.problem, "python", self.code.replace("\n", "  \r\n"), "job-1")
+
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertEqual(first["status"], "Accepted")
+        self.assertEqual(second["status"], "Accepted")
+        self.assertEqual(second["exec_result"].outputs, [3])
+        self.assertEqual(len(streamed), 1)
+        self.assertEqual(verdict_cache.stats()["hits"], 1)
+
+    def test_streamed_verdicts_hide_hidden_cases(self):
+        TestCases.objects.filter(problem=self.problem).update(is_sample=True)
+        TestCases.objects.create(problem=self.problem, input=[4, 4], expected_output=8, order=1)
+        streamed = []
+        with mock.patch.object(judge_service.judge_queue, "publish_verdict",
+                               side_effect=lambda *args: streamed.append(args)):
+            judge_service.grade_submission(self.problem, "python", self.code, "job-1")
+
+        sample, hidden = (verdict for _, _, _, verdict in streamed)
+        self.assertEqual((sample["input"], sample["expected"]), ([1, 2], 3))
+        self.assertNotIn("input", hidden)
+        self.assertNotIn("expected", hidden)
+        self.assertTrue(hidden["passed"])
+
+    def test_testcase_changes_invalidate_cached_verdicts(self):
+        judge_service.grade_submission(self.problem, "python", self.code)
+
+        serializer = ProblemSerializer(self.problem, data={
+            "testcases": [{"input": [2, 2], "expected_output": 5, "order": 0}]
+        }, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.problem.testcase_version, 2)
+
+        graded = judge_service.grade_submission(self.problem, "python", self.code)
+        self.assertEqual(graded["status"], "Wrong Answer")
+        self.assertEqual(verdict_cache.stats()["misses"], 2)
+
+    def test_timeouts_are_not_cached(self):
+        key = verdict_cache.cache_key(self.problem, "python", self.code)
+        verdict_cache.put(key, ExecutionResult(error="Execution timed out", error_type="Timeout Error"))
+        self.assertIsNone(verdict_cache.get(key))
+
+    def test_stats_ride_along_with_the_next_lookup(self):
+        with mock.patch.object(self.redis, "hincrby", wraps=self.redis.hincrby) as hincrby, \
+                mock.patch.object(self.redis, "pipeline", wraps=self.redis.pipeline) as pipeline:
+            self.assertIsNone(verdict_cache.get("first"))
+            self.assertEqual(hincrby.call_count, 0)
+            self.assertEqual(pipeline.call_count, 1)
+
+            self.assertIsNone(verdict_cache.get("second"))
+            self.assertEqual(pipeline.call_count, 2)
+            self.assertEqual(self.redis.hgetall(verdict_cache.STATS_KEY), {"misses": 1})
+
+        self.assertEqual(verdict_cache.stats()["misses"], 2)
+
+    def test_stats_are_admin_only(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", is_staff=True)
+        coder = User.objects.create_user(username="coder", email="coder@example.com", password="password")
+        factory = APIRequestFactory()
+
+        for user, expected in ((coder, 403), (admin, 200)):
+            request = factory.get("/api/admin/judge/verdict-cache/")
+            force_authenticate(request, user=user)
+            self.assertEqual(VerdictCacheStatsView.as_view()(request).status_code, expected)
+
+
+class JudgeBundleTest(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(judge_bundle, "redis_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        judge_bundle.clear_local()
+        self.addCleanup(judge_bundle.clear_local)
+
+        self.problem = Problem.objects.create(
+            title="Join", description="Join words", difficulty="EASY",
+            function_name="join", parameters=[{"name": "words", "type": "string[]"}],
+            return_type="string",
+        )
+        TestCases.objects.create(problem=self.problem, input=[["a", "b"]], expected_output='"ab"', order=1)
+        TestCases.objects.create(problem=self.problem, input=[["x"]], expected_output="x", order=0, is_sample=True)
+
+    def test_bundle_is_built_once_per_version(self):
+        bundle = judge_bundle.get_bundle(self.problem)
+
+        self.assertEqual([tc.input for tc in bundle.testcases], [[["x"]], [["a", "b"]]])
+        self.assertEqual([tc.expected_value for tc in bundle.testcases], ["x", "ab"])
+        self.assertEqual(bundle.testcases.typed, b"2 1 1 x 2 1 a 1 b\n")
+        self.assertEqual(len(bundle.samples), 1)
+
+        with self.assertNumQueries(0):
+            self.assertIs(judge_bundle.get_bundle(self.problem), bundle)
+
+        # Another process finds it in Redis.
+        judge_bundle.clear_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(judge_bundle.get_bundle(self.problem).testcases), 2)
+
+    def test_version_bump_rebuilds_bundle(self):
+        old = judge_bundle.get_bundle(self.problem)
+        TestCases.objects.create(problem=self.problem, input=[["c"]], expected_output="c", order=2)
+        self.problem.bump_testcase_version()
+
+        new = judge_bundle.get_bundle(self.problem)
+        self.assertIsNot(new, old)
+        self.assertEqual(len(new.testcases), 3)
+        self.assertIsNone(self.redis.get(judge_bundle.BUNDLE_KEY.format(self.problem.id, old.version)))
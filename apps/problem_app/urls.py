@@ -6,6 +6,8 @@ from .views import (
     ProblemListView,
     ProblemDetailView,
     ProblemToggleView,  
+    VerdictCacheStatsView,
+    JudgeMetricsView,
     CategoryCreateView,
     CategoryListView,
     CategoryToggleView,
@@ -13,7 +15,9 @@ from .views import (
     CategoryDeleteView,
     ProblemDeleteView,
     RunCodeView,
+    RunStatusView,
     SubmitCodeView,
+    SubmissionStatusView,
     UserSubmissionsView,  
     AllSubmissionsView,
 )
@@ -22,6 +26,8 @@ urlpatterns = [
     path("admin/problems/", AdminProblemCreateView.as_view()),
     path("admin/problems/<int:problem_id>/", ProblemUpdateView.as_view()),
     path("admin/problems/<int:problem_id>/delete/", ProblemDeleteView.as_view()),
+    path("admin/judge/verdict-cache/", VerdictCacheStatsView.as_view(), name="verdict-cache-stats"),
+    path("admin/judge/metrics/", JudgeMetricsView.as_view(), name="judge-metrics"),
     
     path("problems/", ProblemListView.as_view()),
     path("problems/<int:problem_id>/", ProblemDetailView.as_view()),
@@ -35,7 +41,9 @@ urlpatterns = [
     path("deletecategory/<int:category_id>/", CategoryDeleteView.as_view(), name="category-delete"),
 
     path("problems/run/", RunCodeView.as_view(), name = "run-code"),
+    path("problems/run/<str:run_id>/status/", RunStatusView.as_view(), name="run-status"),
     path("problems/submit/", SubmitCodeView.as_view(), name="submit-code"),
+    path("problems/submissions/<int:submission_id>/status/", SubmissionStatusView.as_view(), name="submission-status"),
     path("problems/<int:problem_id>/submissions/me/", UserSubmissionsView.as_view(), name="user-submissions"),
     path("problems/<int:problem_id>/submissions/", AllSubmissionsView.as_view(), name="all-submissions"),
 ]
@@ -1,8 +1,12 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from django.http import HttpResponse
+from common import metrics
 from ..models import Problem
 from ..serializers import ProblemSerializer
+from ..services import judge_admission, judge_metrics, judge_queue, verdict_cache
 
 import logging
 
@@ -169,3 +173,34 @@ class ProblemToggleView(APIView):
                 "message": "An unexpected error occurred during problem status toggle",
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class VerdictCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            return Response({
+                "success": True,
+                "data": verdict_cache.stats()
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": "Failed to fetch verdict cache stats",
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class JudgeMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            judge_metrics.QUEUE_DEPTH.set(judge_queue.queue_depth())
+            if judge_admission.is_enabled():
+                judge_admission.report_slots()
+        except Exception as e:
+            logger.error(f"Failed to read judge queue metrics: {str(e)}")
+
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
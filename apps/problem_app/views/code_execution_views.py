@@ -1,22 +1,34 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Problem, TestCases
-from ..judge.dispatcher import dispatch
-from ..judge.comparison import judge
+from rest_framework.permissions import IsAuthenticated
+from ..models import Problem
+from ..services import judge_admission, judge_queue
+from ..services.judge_service import run_code
 import logging
 from apps.subscription_app.services.subscription_services.feature_code import can_run_code
 
 logger = logging.getLogger(__name__)
 
 class RunCodeView(APIView):
-    def post(self, request):
+    permission_classes = [IsAuthenticated]
 
+    def post(self, request):
+        # Callers the plan turns away never reach the judge's slots.
         allowed, info = can_run_code(request.user)
 
         if not allowed:
             return Response(info, status=403)
 
+        try:
+            ticket = judge_admission.acquire(request.user, hold_slot=not judge_queue.is_async_request(request))
+        except judge_admission.AdmissionRejected as e:
+            return Response(
+                {"success": False, "message": str(e)},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
         try:
             problem_id = request.data.get("problem_id")
             code = request.data.get("code")
@@ -41,18 +53,26 @@ class RunCodeView(APIView):
                     "message": "Invalid problem ID format"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                testcases = TestCases.objects.filter(problem=problem).order_by("order")
-            except Exception as e:
-                logger.error(f"Error fetching test cases: {str(e)}")
+            if judge_queue.is_async_request(request):
+                try:
+                    run_id = judge_queue.enqueue_run(request.user, problem, language, code, ticket)
+                    # The worker releases the ticket once the run is judged.
+                    ticket = None
+                except Exception as e:
+                    logger.error(f"Error enqueuing run: {str(e)}")
+                    return Response({
+                        "success": False,
+                        "message": "Failed to queue code execution"
+                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
                 return Response({
-                    "success": False,
-                    "message": "Failed to fetch test cases"
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                    "success": True,
+                    "run_id": run_id,
+                    "overallStatus": "Pending"
+                }, status=status.HTTP_202_ACCEPTED)
 
             try:
-                exec_result = dispatch(language, code, testcases, problem.function_name)
-                results = judge(exec_result, testcases)
+                payload = run_code(problem, language, code)
             except Exception as e:
                 logger.error(f"Error during code execution: {str(e)}")
                 return Response({
@@ -61,27 +81,36 @@ class RunCodeView(APIView):
                     "error": str(e)
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            error_msg = exec_result.error or ""
-            
-            if exec_result.error_type:
-                error_msg = f"{exec_result.error_type}:\n{error_msg}"
+            return Response(payload, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": "An unexpected error occurred during code execution",
+                "error": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            judge_admission.release(ticket)
+
 
-            overall = "Accepted" if results and all(r["passed"] for r in results) else "Wrong Answer"
-            if exec_result.error and not results:
-                overall = "Error"
+class RunStatusView(APIView):
+    def get(self, request, run_id):
+        try:
+            result = judge_queue.get_result(run_id)
+            if not result or result.get("user_id") != str(request.user.id):
+                return Response({
+                    "success": False,
+                    "message": "Run not found"
+                }, status=status.HTTP_404_NOT_FOUND)
 
             return Response({
                 "success": True,
-                "overallStatus": overall,
-                "testResults": results,
-                "consoleOutput": exec_result.stdout,
-                "error": error_msg,
-                "memory": round(exec_result.memory, 2),
-                "runtime": round(sum(exec_result.runtimes), 2)
+                "run_id": run_id,
+                "status": result.get("status"),
+                "result": result if result.get("status") == "Done" else None
             }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
                 "success": False,
-                "message": "An unexpected error occurred during code execution",
+                "message": "Failed to fetch run status",
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,65 +1,87 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from ..models import Problem, Submission
-from ..serializers import ProblemSerializer
+from django.db.models import Prefetch
+from ..models import Problem, TestCases
+from ..serializers import ProblemListSerializer, ProblemSerializer
+from ..services import problem_counters, problem_list_cache, solved_problems
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class ProblemPagination(PageNumberPagination):
     page_size = 10
 
+    def links(self, request, number, num_pages):
+        """(next, previous) links for page `number`, as get_next_link/get_previous_link build them."""
+        url = request.build_absolute_uri()
+        next_link = replace_query_param(url, self.page_query_param, number + 1) if number < num_pages else None
+        if number <= 1:
+            previous_link = None
+        elif number == 2:
+            previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            previous_link = replace_query_param(url, self.page_query_param, number - 1)
+        return next_link, previous_link
+
+
+def _requested_fields(request):
+    """Fields named in ?fields=a,b (None for all); raises ValueError on unknown names."""
+    param = request.query_params.get("fields")
+    if not param:
+        return None
+    fields = [name.strip() for name in param.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in ProblemListSerializer.Meta.fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
 
 class ProblemListView(APIView):
     def get(self, request):
         try:
-            queryset = Problem.objects.select_related("category").order_by("id")
-            queryset = queryset.exclude(category__status="InActive")
-
-            difficulty = request.query_params.get("difficulty")
-            if difficulty:
-                queryset = queryset.filter(difficulty=difficulty.upper())
-
-            tag = request.query_params.get("tag")
-            if tag:
-                queryset = queryset.filter(tags__icontains=tag)
+            try:
+                fields = _requested_fields(request)
+            except ValueError as e:
+                return Response({"success": False, "message": str(e)}, status=400)
 
+            params = {
+                "difficulty": (request.query_params.get("difficulty") or "").upper(),
+                "tag": request.query_params.get("tag") or "",
+                "page": request.query_params.get(ProblemPagination.page_query_param) or "1",
+                "fields": fields,
+            }
             paginator = ProblemPagination()
             try:
-                page = paginator.paginate_queryset(queryset, request)
-            except Exception as pag_err:
+                page = problem_list_cache.get_or_build(
+                    params, lambda: self.build_page(request, paginator, params, fields)
+                )
+            except NotFound as pag_err:
+                # paginate_queryset's wrapper for InvalidPage; anything else is a 500.
                 print(f"Pagination error in ProblemListView: {pag_err}")
                 return Response({
                     "success": False,
                     "message": "Invalid page number or pagination error"
                 }, status=400)
 
-            solved_ids = set()
-            if request.user.is_authenticated:
-                try:
-                    solved_ids = set(
-                        Submission.objects.filter(user=request.user, status="Accepted")
-                        .values_list("problem_id", flat=True)
-                    )
-                except Exception as sub_err:
-                    print(f"Error fetching solved status: {sub_err}")
-                    # Not critical, continue without solved status
-
-            serializer = ProblemSerializer(
-                page,
-                many=True,
-                context={"solved_problem_ids": solved_ids}
-            )
+            # The cached page is shared by everyone; is_solved is per user.
+            problems = [dict(row) for row in page["problems"]]
+            if fields is None or "is_solved" in fields:
+                solved_ids = solved_problems.solved_among(request.user, [row["id"] for row in problems])
+                for row in problems:
+                    row["is_solved"] = row["id"] in solved_ids
 
+            next_link, previous_link = paginator.links(request, page["current"], page["pages"])
             return Response({
                 "success": True,
                 "data": {
-                    "problems": serializer.data,
+                    "problems": problems,
                     "pagination": {
-                        "count": paginator.page.paginator.count,
-                        "pages": paginator.page.paginator.num_pages,
-                        "current": paginator.page.number,
-                        "next": paginator.get_next_link(),
-                        "previous": paginator.get_previous_link(),
+                        "count": page["count"],
+                        "pages": page["pages"],
+                        "current": page["current"],
+                        "next": next_link,
+                        "previous": previous_link,
                     }
                 }
             })
@@ -70,26 +92,50 @@ class ProblemListView(APIView):
                 "error": str(e)
             }, status=500)
 
+    @staticmethod
+    def build_page(request, paginator, params, fields):
+        columns = ProblemListSerializer.columns(fields)
+        queryset = Problem.objects.only(*columns).order_by("id")
+        if "category" in columns:
+            queryset = queryset.select_related("category")
+        queryset = queryset.exclude(category__status="InActive")
+
+        if params["difficulty"]:
+            queryset = queryset.filter(difficulty=params["difficulty"])
+        if params["tag"]:
+            queryset = queryset.filter(tags__icontains=params["tag"])
+
+        page = paginator.paginate_queryset(queryset, request)
+        if fields is None or "acceptanceRate" in fields:
+            problem_counters.COUNTERS.merge(page)
+
+        serializer = ProblemListSerializer(page, many=True, fields=fields)
+        return {
+            "problems": serializer.data,
+            "count": paginator.page.paginator.count,
+            "pages": paginator.page.paginator.num_pages,
+            "current": paginator.page.number,
+        }
+
 
 class ProblemDetailView(APIView):
     def get(self, request, problem_id):
         try:
             try:
-                problem = Problem.objects.get(id=problem_id)
+                # Hidden test cases stay on the server; only the samples are shown.
+                # Staff get all of them: the admin editor saves back the full list.
+                testcases = TestCases.objects.all()
+                if not request.user.is_staff:
+                    testcases = testcases.filter(is_sample=True)
+                problem = Problem.objects.prefetch_related(
+                    Prefetch("testcases", queryset=testcases)
+                ).get(id=problem_id)
             except Problem.DoesNotExist:
                 return Response({"success": False, "message": "Problem not found"}, status=404)
             except (ValueError, TypeError):
                  return Response({"success": False, "message": "Invalid problem ID format"}, status=400)
 
-            solved_ids = set()
-            if request.user.is_authenticated:
-                try:
-                    if Submission.objects.filter(
-                        user=request.user, problem=problem, status="Accepted"
-                    ).exists():
-                        solved_ids.add(problem.id)
-                except Exception as sub_err:
-                    print(f"Error checking solved status for detail view: {sub_err}")
+            solved_ids = solved_problems.solved_among(request.user, [problem.id])
 
             serializer = ProblemSerializer(problem, context={"solved_problem_ids": solved_ids})
             return Response(serializer.data)
@@ -1,15 +1,28 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from ..models import Problem, Submission, TestCases
-from ..judge.dispatcher import dispatch
-from ..judge.comparison import judge
+from ..models import Problem, Submission
+from ..services import judge_admission, judge_queue
+from ..services.judge_service import grade_submission, finalize_submission
+from ..judge.timing import DB_WRITE, span
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class SubmitCodeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        try:
+            ticket = judge_admission.acquire(request.user, hold_slot=not judge_queue.is_async_request(request))
+        except judge_admission.AdmissionRejected as e:
+            return Response(
+                {"success": False, "message": str(e)},
+                status=429,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
         try:
             user = request.user
             problem_id = request.data.get("problem_id")
@@ -29,11 +42,41 @@ class SubmitCodeView(APIView):
             except (ValueError, TypeError):
                 return Response({"success": False, "message": "Invalid problem ID format"}, status=400)
 
-            testcases = TestCases.objects.filter(problem=problem)
+            fail_fast = judge_queue.request_flag(request, "fail_fast", problem.fail_fast)
+
+            if judge_queue.is_async_request(request):
+                try:
+                    submission = Submission.objects.create(
+                        user=user,
+                        problem=problem,
+                        language=language,
+                        code=code,
+                        status="Pending",
+                    )
+                    try:
+                        judge_queue.enqueue_submission(submission, fail_fast, ticket)
+                    except Exception:
+                        # No worker will ever pick it up; don't leave it Pending forever.
+                        submission.delete()
+                        raise
+                    # The worker releases the ticket once the submission is judged.
+                    ticket = None
+                except Exception as queue_err:
+                    logger.error(f"Failed to queue submission: {str(queue_err)}")
+                    return Response({
+                        "success": False,
+                        "message": "Failed to queue submission",
+                        "error": str(queue_err)
+                    }, status=503)
+
+                return Response({
+                    "success": True,
+                    "submission_id": submission.id,
+                    "overallStatus": "Pending"
+                }, status=202)
 
             try:
-                exec_result = dispatch(language, code, testcases, problem.function_name)
-                results = judge(exec_result, testcases)
+                graded = grade_submission(problem, language, code, fail_fast=fail_fast)
             except Exception as judge_err:
                 print(f"Code execution or judging error: {judge_err}")
                 return Response({
@@ -42,31 +85,19 @@ class SubmitCodeView(APIView):
                     "error": str(judge_err)
                 }, status=500)
 
-            if not results and exec_result.error:
-                status_value = exec_result.error_type if exec_result.error_type else "Runtime Error"
-                passed = 0
-                total = testcases.count()
-                total_runtime = 0.0
-                memory_usage = 0.0
-            else:
-                passed = sum(1 for r in results if r.get("passed", False))
-                total = len(results)
-                total_runtime = sum(r.get("runtime", 0.0) for r in results)
-                status_value = "Accepted" if passed == total else "Wrong Answer"
-                memory_usage = exec_result.memory
-
             try:
-                submission = Submission.objects.create(
-                    user=user,
-                    problem=problem,
-                    language=language,
-                    code=code,
-                    status=status_value,
-                    passed_count=passed,
-                    total_count=total,
-                    runtime=total_runtime,
-                    memory=memory_usage,
-                )
+                with span(graded["exec_result"].phases, DB_WRITE):
+                    submission = Submission.objects.create(
+                        user=user,
+                        problem=problem,
+                        language=language,
+                        code=code,
+                        status=graded["status"],
+                        passed_count=graded["passed"],
+                        total_count=graded["total"],
+                        runtime=graded["runtime"],
+                        memory=graded["memory"],
+                    )
             except Exception as sub_err:
                 print(f"Failed to create submission record: {sub_err}")
                 return Response({
@@ -75,54 +106,45 @@ class SubmitCodeView(APIView):
                     "error": str(sub_err)
                 }, status=500)
 
-            try:
-                problem.total_submissions += 1
-                if status_value == "Accepted":
-                    problem.accepted_submissions += 1
-                problem.save()
-            except Exception as prob_save_err:
-                print(f"Failed to update problem stats: {prob_save_err}")
+            return Response(finalize_submission(submission, graded))
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": "An unexpected error occurred during submission",
+                "error": str(e)
+            }, status=500)
+        finally:
+            judge_admission.release(ticket)
 
+
+class SubmissionStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, submission_id):
+        try:
             try:
-                all_submissions = Submission.objects.filter(problem=problem, status="Accepted")
-                total_accepted = all_submissions.count()
-                
-                runtime_percentile = 100.0
-                memory_percentile = 100.0
-                
-                if total_accepted > 1:
-                    slower_submissions = all_submissions.filter(runtime__gt=total_runtime).count()
-                    runtime_percentile = round((slower_submissions / total_accepted) * 100, 2)
-                    
-                    larger_memory = all_submissions.filter(memory__gt=memory_usage).count()
-                    memory_percentile = round((larger_memory / total_accepted) * 100, 2)
-            except Exception as stats_err:
-                print(f"Error calculating percentiles: {stats_err}")
-                runtime_percentile = 100.0
-                memory_percentile = 100.0
-
-            error_msg = exec_result.error or ""
-            if exec_result.error_type and exec_result.error:
-                error_msg = f"{exec_result.error_type}:\n{error_msg}"
+                submission = Submission.objects.get(id=submission_id, user=request.user)
+            except Submission.DoesNotExist:
+                return Response({"success": False, "message": "Submission not found"}, status=404)
+
+            result = None
+            if submission.status not in ("Pending", "Judging"):
+                result = judge_queue.get_result(str(submission.id))
 
             return Response({
                 "success": True,
                 "submission_id": submission.id,
-                "overallStatus": status_value,
-                "passed": passed,
-                "total": total,
-                "runtime": round(total_runtime, 2),
-                "memory": round(memory_usage, 2),
-                "runtime_percentile": runtime_percentile,
-                "memory_percentile": memory_percentile,
-                "consoleOutput": exec_result.stdout,
-                "error": error_msg,
-                "testResults": results
+                "status": submission.status,
+                "passed": submission.passed_count,
+                "total": submission.total_count,
+                "runtime": round(submission.runtime, 2),
+                "memory": round(submission.memory, 2),
+                "result": result
             })
         except Exception as e:
             return Response({
                 "success": False,
-                "message": "An unexpected error occurred during submission",
+                "message": "Failed to fetch submission status",
                 "error": str(e)
             }, status=500)
 
@@ -0,0 +1,176 @@
+# common/counters.py
+"""
+Write-behind counters for hot model columns. Increments are Redis HINCRBYs
+into one pending hash per model; `manage.py flush_counters` periodically
+applies them to the database as batched F() UPDATEs. Readers add whatever
+is still pending to the stored column values.
+"""
+
+import logging
+import uuid
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from common.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+LOCK_SECONDS = 60
+
+# The flush lock holds a per-flusher token; it is only extended or released
+# by the flusher that still owns it.
+_EXTEND_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CounterGroup:
+    """
+    Counter columns of one model. Rows are identified by `lookup` (the
+    primary key by default); with `create_missing`, flushing creates rows
+    that don't exist yet instead of dropping their increments.
+    """
+
+    def __init__(self, model, fields, lookup="pk", create_missing=False):
+        self.model = model
+        self.fields = tuple(fields)
+        self.lookup = lookup
+        self.create_missing = create_missing
+        self.key = f"counters:{model._meta.label_lower}"
+        self.flushing_key = f"{self.key}:flushing"
+
+    @staticmethod
+    def _parse(raw):
+        pending = {}
+        for name, value in raw.items():
+            ident, _, field = name.rpartition(":")
+            if int(value):
+                pending.setdefault(ident, {})[field] = int(value)
+        return pending
+
+    def incr(self, ident, **amounts):
+        """Add field=amount increments to the row whose lookup value is ident."""
+        amounts = {field: amount for field, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        try:
+            pipe = redis_client.pipeline()
+            for field, amount in amounts.items():
+                pipe.hincrby(self.key, f"{ident}:{field}", amount)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to buffer {self.key} increment for {ident}: {str(e)}")
+            # Write through rather than lose the increment.
+            self._apply({str(ident): amounts})
+
+    def pending(self, idents):
+        """{ident: {field: delta}} not yet flushed, for the given rows."""
+        names = [f"{ident}:{field}" for ident in idents for field in self.fields]
+        if not names:
+            return {}
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hmget(self.key, names)
+            # Deltas being flushed right now aren't in the database yet either.
+            pipe.hmget(self.flushing_key, names)
+            buffered, flushing = pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to read pending {self.key} increments: {str(e)}")
+            return {}
+        totals = {
+            name: int(a or 0) + int(b or 0) for name, a, b in zip(names, buffered, flushing)
+        }
+        return self._parse(totals)
+
+    def merge(self, instances):
+        """Attach live values (stored + pending) to each instance, with one Redis round trip."""
+        pending = self.pending([getattr(instance, self.lookup) for instance in instances])
+        for instance in instances:
+            deltas = pending.get(str(getattr(instance, self.lookup)), {})
+            instance._live_counters = {
+                field: getattr(instance, field) + deltas.get(field, 0) for field in self.fields
+            }
+        return instances
+
+    def live(self, instance):
+        """{field: value} including increments that haven't been flushed yet."""
+        if getattr(instance, "_live_counters", None) is None:
+            self.merge([instance])
+        return instance._live_counters
+
+    def discard(self, ident):
+        """Drop pending increments for a row whose counters are being recomputed from scratch."""
+        try:
+            redis_client.hdel(self.key, *(f"{ident}:{field}" for field in self.fields))
+        except Exception as e:
+            logger.error(f"Failed to discard pending {self.key} increments for {ident}: {str(e)}")
+
+    def _apply_batch(self, pending, batch):
+        rows = self.model.objects.filter(**{f"{self.lookup}__in": batch})
+        with transaction.atomic():
+            if self.create_missing:
+                existing = {str(value) for value in rows.values_list(self.lookup, flat=True)}
+                self.model.objects.bulk_create(
+                    [self.model(**{self.lookup: ident}) for ident in batch if ident not in existing],
+                    ignore_conflicts=True,
+                )
+            updates = {}
+            for field in self.fields:
+                whens = [
+                    When(**{self.lookup: ident}, then=Value(pending[ident][field]))
+                    for ident in batch if pending[ident].get(field)
+                ]
+                if whens:
+                    # Corrections (e.g. after a rejudge) can be negative; counters stop at zero.
+                    updates[field] = Greatest(
+                        F(field) + Case(*whens, default=Value(0), output_field=IntegerField()), Value(0)
+                    )
+            if updates:
+                rows.update(**updates)
+
+    def _apply(self, pending, batch_size=500):
+        idents = list(pending)
+        for start in range(0, len(idents), batch_size):
+            self._apply_batch(pending, idents[start:start + batch_size])
+
+    def flush(self, batch_size=500):
+        """
+        Apply everything pending to the database; returns the number of rows
+        touched. The pending hash is renamed away first so increments that
+        arrive meanwhile wait for the next flush. Each batch's fields are
+        removed from it once the batch commits, so a flush that fails part
+        way is resumed by the next one; only a crash between a commit and
+        its cleanup can apply that batch twice.
+        """
+        lock = f"{self.key}:lock"
+        token = uuid.uuid4().hex
+        if not redis_client.set(lock, token, nx=True, ex=LOCK_SECONDS):
+            return 0
+        try:
+            if not redis_client.exists(self.flushing_key):
+                if not redis_client.exists(self.key):
+                    return 0
+                redis_client.rename(self.key, self.flushing_key)
+            pending = self._parse(redis_client.hgetall(self.flushing_key))
+            idents = list(pending)
+            for start in range(0, len(idents), batch_size):
+                if start and not redis_client.eval(_EXTEND_LOCK, 1, lock, token, LOCK_SECONDS):
+                    logger.error(f"Lost the {self.key} flush lock; leaving the rest for the next flush")
+                    return start
+                batch = idents[start:start + batch_size]
+                self._apply_batch(pending, batch)
+                applied = [f"{ident}:{field}" for ident in batch for field in pending[ident]]
+                redis_client.hdel(self.flushing_key, *applied)
+            redis_client.delete(self.flushing_key)
+            return len(pending)
+        finally:
+            redis_client.eval(_RELEASE_LOCK, 1, lock, token)
@@ -314,3 +314,123 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+
+# ============================================================================
+# JUDGE
+# ============================================================================
+# Pre-started Python workers leased by the judge (0 disables the pool).
+JUDGE_PYTHON_POOL_SIZE = int(os.getenv("JUDGE_PYTHON_POOL_SIZE", 4))
+JUDGE_PYTHON_POOL_MAX_JOBS = int(os.getenv("JUDGE_PYTHON_POOL_MAX_JOBS", 200))
+JUDGE_PYTHON_POOL_LEASE_TIMEOUT = float(os.getenv("JUDGE_PYTHON_POOL_LEASE_TIMEOUT", 1.0))
+JUDGE_PYTHON_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv("JUDGE_PYTHON_POOL_HEALTH_CHECK_INTERVAL", 30))
+
+# Pre-started node processes (judge/js_worker.js) that run each JavaScript job
+# in a fresh worker_threads isolate (0 disables the pool).
+JUDGE_JS_POOL_SIZE = int(os.getenv("JUDGE_JS_POOL_SIZE", 4))
+JUDGE_JS_POOL_MAX_JOBS = int(os.getenv("JUDGE_JS_POOL_MAX_JOBS", 500))
+JUDGE_JS_POOL_LEASE_TIMEOUT = float(os.getenv("JUDGE_JS_POOL_LEASE_TIMEOUT", 1.0))
+JUDGE_JS_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv("JUDGE_JS_POOL_HEALTH_CHECK_INTERVAL", 30))
+
+# Compiled C++/Java artifacts, keyed by a hash of the generated sources (0 disables).
+JUDGE_COMPILE_CACHE_DIR = os.getenv("JUDGE_COMPILE_CACHE_DIR")
+JUDGE_COMPILE_CACHE_MAX_BYTES = int(os.getenv("JUDGE_COMPILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Default g++ optimisation level and -pipe for C++ runs; problems can override
+# both. The harness header (judge/cpp_pch.py) is precompiled per flag set into
+# JUDGE_CPP_PCH_DIR (by default a 0700 directory in the temp dir, owned by the
+# app's user). Point it only at a directory other users cannot write to.
+JUDGE_CPP_OPTIMIZATION = os.getenv("JUDGE_CPP_OPTIMIZATION", "O0")
+JUDGE_CPP_PIPE = os.getenv("JUDGE_CPP_PIPE", "True") == "True"
+JUDGE_CPP_PCH = os.getenv("JUDGE_CPP_PCH", "True") == "True"
+JUDGE_CPP_PCH_DIR = os.getenv("JUDGE_CPP_PCH_DIR")
+
+# Scratch space for judge runs. Each concurrent run reuses a sandbox directory
+# under JUDGE_WORKSPACE_DIR (default: /dev/shm when it is writable and allows
+# exec, else the temp directory) that is emptied between jobs; point it at a
+# RAM disk to keep judge files off real disks. With JUDGE_WORKSPACE_MEMFD,
+# Python and JavaScript harnesses are passed to the interpreter as in-memory
+# files and never touch the workspace at all.
+JUDGE_WORKSPACE_DIR = os.getenv("JUDGE_WORKSPACE_DIR")
+JUDGE_WORKSPACE_MEMFD = os.getenv("JUDGE_WORKSPACE_MEMFD", "True") == "True"
+
+# Queue run/submit requests for `manage.py run_judge_worker` instead of judging
+# inside the web request. Clients may override per request with "async".
+JUDGE_ASYNC = os.getenv("JUDGE_ASYNC", "False") == "True"
+JUDGE_RESULT_TTL = int(os.getenv("JUDGE_RESULT_TTL", 3600))
+# A job still on the processing list this long after a worker took it is
+# queued again when a worker starts; its worker died before finishing it.
+JUDGE_QUEUE_STALE_SECONDS = int(os.getenv("JUDGE_QUEUE_STALE_SECONDS", 300))
+
+# Split submissions with at least 2x this many test cases into shards that run
+# concurrently (0 disables). JUDGE_MAX_CONCURRENCY caps shard processes per
+# judge process; 0 means the number of CPU cores.
+JUDGE_SHARD_MIN_TESTS = int(os.getenv("JUDGE_SHARD_MIN_TESTS", 10))
+JUDGE_MAX_CONCURRENCY = int(os.getenv("JUDGE_MAX_CONCURRENCY", 0))
+
+# Each test case is held to its problem's time_limit; a whole run (or shard)
+# additionally stops after this many seconds, however many cases it has.
+JUDGE_RUN_TIMEOUT = int(os.getenv("JUDGE_RUN_TIMEOUT", 10))
+
+# Address-space headroom (MB) on top of Problem.memory_limit for the language
+# runtime itself when RLIMIT_AS is applied to Python and C++ harnesses.
+JUDGE_MEMORY_OVERHEAD_MB = int(os.getenv("JUDGE_MEMORY_OVERHEAD_MB", 64))
+
+# Cache judge results by (normalised code, language, problem, test case version)
+# in Redis for this many seconds (0 disables), fronted by a per-process LRU.
+JUDGE_VERDICT_CACHE_TTL = int(os.getenv("JUDGE_VERDICT_CACHE_TTL", 86400))
+JUDGE_VERDICT_CACHE_L1_SIZE = int(os.getenv("JUDGE_VERDICT_CACHE_L1_SIZE", 512))
+
+# Per-problem judge bundles (test cases plus pre-encoded runner inputs), cached
+# in Redis for this many seconds and in a per-process LRU of this many problems.
+JUDGE_BUNDLE_TTL = int(os.getenv("JUDGE_BUNDLE_TTL", 86400))
+JUDGE_BUNDLE_L1_SIZE = int(os.getenv("JUDGE_BUNDLE_L1_SIZE", 256))
+
+# Runtime/memory percentiles come from per-problem, per-language histograms in
+# Redis; the DB snapshot (PerformanceHistogram) is refreshed every this many
+# accepted submissions. `manage.py build_histograms` rebuilds both.
+JUDGE_HISTOGRAM_SNAPSHOT_EVERY = int(os.getenv("JUDGE_HISTOGRAM_SNAPSHOT_EVERY", 50))
+
+# Problem and profile submission counters are buffered in Redis and written
+# to the database by `manage.py flush_counters` every this many seconds.
+COUNTER_FLUSH_INTERVAL = int(os.getenv("COUNTER_FLUSH_INTERVAL", 5))
+
+# Per-user Redis sets of solved problem ids (backed by UserSolvedProblem) used
+# for the is_solved flags on problem pages, kept for this many seconds.
+SOLVED_CACHE_TTL = int(os.getenv("SOLVED_CACHE_TTL", 86400))
+
+# Shared problem list pages are cached in Redis for this many seconds (0
+# disables); problem and category writes invalidate them immediately, so
+# the TTL only bounds how stale acceptance rates get.
+PROBLEM_LIST_CACHE_TTL = int(os.getenv("PROBLEM_LIST_CACHE_TTL", 60))
+
+# Console output (stdout + stderr) one run may produce before it is killed with
+# an Output Limit Exceeded verdict (0 disables).
+JUDGE_OUTPUT_LIMIT_BYTES = int(os.getenv("JUDGE_OUTPUT_LIMIT_BYTES", 8 * 1024 * 1024))
+
+# Long-lived JVMs (judge/JudgeDaemon.java) that compile Java submissions in
+# memory and run them in throwaway class loaders; 0 disables them and every
+# Java run starts its own JVM. The heap is shared by the daemon's jobs.
+JUDGE_JAVA_DAEMON_POOL_SIZE = int(os.getenv("JUDGE_JAVA_DAEMON_POOL_SIZE", 2))
+JUDGE_JAVA_DAEMON_MAX_JOBS = int(os.getenv("JUDGE_JAVA_DAEMON_MAX_JOBS", 500))
+JUDGE_JAVA_DAEMON_HEAP_MB = int(os.getenv("JUDGE_JAVA_DAEMON_HEAP_MB", 512))
+JUDGE_JAVA_DAEMON_START_TIMEOUT = int(os.getenv("JUDGE_JAVA_DAEMON_START_TIMEOUT", 30))
+JUDGE_JAVA_DAEMON_LEASE_TIMEOUT = float(os.getenv("JUDGE_JAVA_DAEMON_LEASE_TIMEOUT", 1.0))
+JUDGE_JAVA_DAEMON_HEALTH_CHECK_INTERVAL = int(os.getenv("JUDGE_JAVA_DAEMON_HEALTH_CHECK_INTERVAL", 30))
+
+# Admission control for run/submit requests, shared through Redis. At most
+# JUDGE_ADMISSION_SLOTS synchronous runs execute at once across all web
+# processes (0 disables admission control). Each lane may fill this share of
+# the slots; plans choose a lane with the "judge_lane" feature and raise the
+# per-user in-flight limit with "judge_concurrency". Rejected requests get a
+# 429 whose Retry-After assumes JUDGE_ADMISSION_JOB_SECONDS per queued job.
+# The default of two slots per CPU gives the free lane (half the slots) one
+# run per CPU; set it to the judge hosts' total CPU count times two when the
+# web and judge processes run on different machines.
+JUDGE_ADMISSION_SLOTS = int(os.getenv("JUDGE_ADMISSION_SLOTS", 2 * (os.cpu_count() or 2)))
+JUDGE_ADMISSION_LANES = {"free": 0.5, "standard": 0.8, "priority": 1.0}
+JUDGE_ADMISSION_DEFAULT_LANE = os.getenv("JUDGE_ADMISSION_DEFAULT_LANE", "free")
+JUDGE_ADMISSION_USER_LIMIT = int(os.getenv("JUDGE_ADMISSION_USER_LIMIT", 2))
+JUDGE_ADMISSION_MAX_QUEUE = int(os.getenv("JUDGE_ADMISSION_MAX_QUEUE", 1000))
+JUDGE_ADMISSION_LEASE_SECONDS = int(os.getenv("JUDGE_ADMISSION_LEASE_SECONDS", 300))
+JUDGE_ADMISSION_JOB_SECONDS = int(os.getenv("JUDGE_ADMISSION_JOB_SECONDS", 2))